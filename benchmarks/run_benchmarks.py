@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import itertools
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import yaml
+
+from benchmarks.synthetic_cases import generate_case
+from validators import json_validator, yaml_validator, mdpa_validator
+from result_io import load_arrays
+from process_data import find_reference_node, process_plot_data
+
+
+def time_stage(function, repeat: int) -> dict:
+    """
+    Times a pipeline stage.
+
+    Parameters:
+        function (callable): Function without arguments that runs the stage.
+        repeat (int): Number of repetitions.
+
+    Returns:
+        dict: Wall times of the repetitions and their minimum and median [s].
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"times": times, "min": min(times), "median": statistics.median(times)}
+
+
+def benchmark_case(yaml_file: str, repeat: int) -> dict:
+    """
+    Times every stage of the pipeline for one test case.
+
+    Parameters:
+        yaml_file (str): Path of the YAML file of the test case.
+        repeat (int): Number of repetitions.
+
+    Returns:
+        dict: Timings per stage.
+    """
+    folder = os.path.dirname(yaml_file)
+    with open(yaml_file, "r") as f:
+        meta = yaml.safe_load(f)
+    json_file = os.path.join(folder, meta["json-file"])
+    mdpa_file = os.path.join(folder, meta["mdpa-file"])
+
+    data = load_arrays(json_file)
+    with open(mdpa_file, "r") as f:
+        mdpa = f.read().splitlines()
+
+    def read_json():
+        load_arrays(json_file)
+
+    def read_mdpa():
+        with open(mdpa_file, "r") as f:
+            f.read().splitlines()
+
+    stages = {"yaml_validator": lambda: yaml_validator(yaml_file),
+              "json_decode": read_json,
+              "json_validator": lambda: json_validator(json_file, str(meta["STEM-version"])),
+              "mdpa_validator": lambda: mdpa_validator(mdpa_file),
+              "mdpa_read": read_mdpa,
+              "mdpa_node_search": lambda: find_reference_node(mdpa),
+              "process_plot_data": lambda: process_plot_data(data, meta, mdpa)}
+
+    return {stage: time_stage(function, repeat) for stage, function in stages.items()}
+
+
+def run(nodes: list, steps: list, mesh_nodes: list, versions: list, repeat: int, output: str):
+    """
+    Generates the synthetic cases for every combination of parameters, benchmarks them and writes the results.
+
+    Parameters:
+        nodes (list): Numbers of output nodes.
+        steps (list): Numbers of time steps.
+        mesh_nodes (list): Numbers of mesh nodes.
+        versions (list): STEM versions (JSON layouts).
+        repeat (int): Number of repetitions per stage.
+        output (str): Path of the JSON file with the results.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        cwd = os.getcwd()
+        # process_plot_data writes its outputs relative to the working directory
+        os.chdir(work_dir)
+        try:
+            for i, (n_nodes, n_steps, n_mesh, version) in enumerate(itertools.product(nodes, steps, mesh_nodes,
+                                                                                       versions)):
+                yaml_file = generate_case(os.path.join(work_dir, "data"), f"case_{i}", n_nodes=n_nodes,
+                                          n_steps=n_steps, n_mesh_nodes=n_mesh, stem_version=version, seed=i)
+                parameters = {"nodes": n_nodes, "steps": n_steps, "mesh_nodes": n_mesh, "stem_version": version}
+                timings = benchmark_case(yaml_file, repeat)
+                results.append({"parameters": parameters, "stages": timings})
+                print(parameters, " ".join(f"{stage}={value['median']:.4f}s" for stage, value in timings.items()))
+        finally:
+            os.chdir(cwd)
+
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "repeat": repeat,
+              "results": results}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline on synthetic STEM cases.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[3, 30], help="numbers of output nodes")
+    parser.add_argument("--steps", type=int, nargs="+", default=[2000, 20000], help="numbers of time steps")
+    parser.add_argument("--mesh-nodes", type=int, nargs="+", default=[10000], help="numbers of mesh nodes")
+    parser.add_argument("--versions", nargs="+", default=["1.2.3", "1.2.4.a"], help="STEM versions (JSON layout)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per stage")
+    parser.add_argument("--output", default="build/benchmarks.json", help="JSON file with the results")
+    args = parser.parse_args()
+
+    run(args.nodes, args.steps, args.mesh_nodes, args.versions, args.repeat, args.output)
@@ -0,0 +1,119 @@
+import os
+import json
+import datetime
+
+import numpy as np
+
+
+# same reference coordinates as in scripts/process_data.py
+COORD_REF = [25, 0.7, 45]
+VERSIONS = ["1.2.3", "1.2.4.a"]
+
+
+def train_passage(time: np.ndarray, rng: np.random.Generator, amplitude: float = 2e-3) -> np.ndarray:
+    """
+    Synthetic velocity signal of a train passage: a Gaussian burst modulated by a sine carrier, plus noise.
+
+    Parameters:
+        time (np.ndarray): Time vector.
+        rng (np.random.Generator): Random generator.
+        amplitude (float): Peak amplitude of the velocity [m/s].
+
+    Returns:
+        np.ndarray: The velocity signal.
+    """
+    duration = time[-1] - time[0]
+    centre = time[0] + duration * rng.uniform(0.3, 0.6)
+    width = duration * 0.1
+    envelope = np.exp(-0.5 * ((time - centre) / width) ** 2)
+    carrier = np.sin(2 * np.pi * rng.uniform(5, 20) * time + rng.uniform(0, 2 * np.pi))
+    return amplitude * envelope * carrier + amplitude * 1e-3 * rng.standard_normal(time.size)
+
+
+def generate_case(folder: str, name: str, n_nodes: int = 3, n_steps: int = 1000, n_mesh_nodes: int = 1000,
+                  stem_version: str = "1.2.3", dt: float = 1e-3, seed: int = 0) -> str:
+    """
+    Writes a synthetic, schema-valid test case: YAML, JSON results, MDPA and input file.
+
+    The MDPA has `n_mesh_nodes` nodes, of which `n_nodes` are in the `json_output` submodel part; one of them
+    is located at the reference coordinates.
+
+    Parameters:
+        folder (str): Output folder.
+        name (str): Name of the test case, used for the file names.
+        n_nodes (int): Number of output nodes in the JSON file.
+        n_steps (int): Number of time steps.
+        n_mesh_nodes (int): Number of nodes in the MDPA mesh.
+        stem_version (str): STEM version, which defines the JSON layout (1.2.3 or 1.2.4.a).
+        dt (float): Time step [s].
+        seed (int): Seed of the random generator.
+
+    Returns:
+        str: Path of the YAML file.
+    """
+    if stem_version not in VERSIONS:
+        raise ValueError(f"Unsupported STEM version: {stem_version}")
+    if n_nodes > n_mesh_nodes:
+        raise ValueError("The number of output nodes cannot exceed the number of mesh nodes.")
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    # mesh: random coordinates, with the reference node in the middle of the numbering
+    coordinates = rng.uniform([0, 0, 0], [50, 10, 90], size=(n_mesh_nodes, 3))
+    output_ids = np.sort(rng.choice(np.arange(1, n_mesh_nodes + 1), size=n_nodes, replace=False))
+    reference_id = output_ids[n_nodes // 2]
+    coordinates[reference_id - 1] = COORD_REF
+
+    mdpa_file = f"{name}.mdpa"
+    with open(os.path.join(folder, mdpa_file), "w") as f:
+        f.write("Begin Properties 0\nEnd Properties\n\n")
+        f.write("Begin Nodes\n")
+        for node_id, (x, y, z) in enumerate(coordinates, start=1):
+            f.write(f"  {node_id} {x:.10e} {y:.10e} {z:.10e}\n")
+        f.write("End Nodes\n\n")
+        f.write("Begin SubModelPart json_output\n"
+                "  Begin SubModelPartTables\n"
+                "  End SubModelPartTables\n"
+                "  Begin SubModelPartNodes\n")
+        for node_id in output_ids:
+            f.write(f"  {node_id}\n")
+        f.write("  End SubModelPartNodes\n"
+                "  Begin SubModelPartElements\n"
+                "  End SubModelPartElements\n"
+                "  Begin SubModelPartConditions\n"
+                "  End SubModelPartConditions\n"
+                "End SubModelPart\n")
+
+    # JSON results in the layout of the STEM version
+    time = dt * np.arange(1, n_steps + 1)
+    data = {"TIME": time.tolist()}
+    for node_id in output_ids:
+        node = {}
+        if stem_version == "1.2.4.a":
+            node["COORDINATES"] = coordinates[node_id - 1].tolist()
+        for component, scale in [("VELOCITY_X", 0.3), ("VELOCITY_Y", 1.), ("VELOCITY_Z", 0.5)]:
+            node[component] = train_passage(time, rng, amplitude=2e-3 * scale).tolist()
+        data[f"NODE_{node_id}"] = node
+
+    json_file = f"json_output_{name}.json"
+    with open(os.path.join(folder, json_file), "w") as f:
+        json.dump(data, f, indent=2)
+
+    input_file = f"{name}.py"
+    with open(os.path.join(folder, input_file), "w") as f:
+        f.write(f"# synthetic test case {name}: {n_nodes} output nodes, {n_steps} steps, {n_mesh_nodes} mesh nodes\n")
+
+    yaml_file = os.path.join(folder, f"{name}.yaml")
+    with open(yaml_file, "w") as f:
+        f.write("organisation: Synthetic\n"
+                f"title: Synthetic {name}\n"
+                "test-description: >\n"
+                f"  Synthetic test case with {n_nodes} output nodes, {n_steps} time steps and {n_mesh_nodes} mesh nodes\n"
+                f"date: {datetime.date(2025, 1, 1)}\n"
+                f"json-file: {json_file}\n"
+                f"input-file: {input_file}\n"
+                f"mdpa-file: {mdpa_file}\n"
+                f"STEM-version: {stem_version}\n")
+
+    return yaml_file
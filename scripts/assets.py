@@ -0,0 +1,114 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+
+from hashing import file_hash
+
+
+RAW_PLOT_FOLDER = "build/plots"
+ASSET_FOLDER = "STEM-cases/static/plots"
+MANIFEST_FILE = "build/assets_manifest.json"
+THUMBNAIL_WIDTH = 480
+HASH_LENGTH = 10
+
+
+def optimise_image(source: str, output_folder: str, digest: str) -> dict:
+    """
+    Writes the optimised variants of a plot: a palette PNG, a WebP (when supported) and a thumbnail.
+
+    The file names contain the hash of the source plot, so that browsers never use an outdated cached image.
+
+    Parameters:
+        source (str): Path of the source plot.
+        output_folder (str): Folder for the optimised images.
+        digest (str): Hash of the source plot.
+
+    Returns:
+        dict: File names of the variants, relative to the output folder.
+    """
+    name = os.path.splitext(os.path.basename(source))[0]
+    stem = f"{name}.{digest[:HASH_LENGTH]}"
+    webp = features.check("webp")
+
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+
+        variants = {"hash": digest, "png": f"{stem}.png"}
+        # plots have few colours, so a palette image is lossless in practice and much smaller
+        image.quantize(colors=256).save(os.path.join(output_folder, variants["png"]), optimize=True)
+
+        if webp:
+            variants["webp"] = f"{stem}.webp"
+            image.save(os.path.join(output_folder, variants["webp"]), "WEBP", quality=85, method=6)
+
+        height = round(image.height * THUMBNAIL_WIDTH / image.width)
+        thumbnail = image.resize((THUMBNAIL_WIDTH, height), Image.Resampling.LANCZOS)
+        if webp:
+            variants["thumbnail"] = f"{stem}.thumb.webp"
+            thumbnail.save(os.path.join(output_folder, variants["thumbnail"]), "WEBP", quality=80, method=6)
+        else:
+            variants["thumbnail"] = f"{stem}.thumb.png"
+            thumbnail.quantize(colors=256).save(os.path.join(output_folder, variants["thumbnail"]), optimize=True)
+
+    return variants
+
+
+def _remove_variants(variants: dict, output_folder: str):
+    """
+    Removes the optimised variants of a plot.
+    """
+    for key in variants:
+        if key != "hash" and os.path.isfile(os.path.join(output_folder, variants[key])):
+            os.remove(os.path.join(output_folder, variants[key]))
+
+
+def optimise_plots(plots: list, raw_folder: str = RAW_PLOT_FOLDER, output_folder: str = ASSET_FOLDER,
+                   manifest_file: str = MANIFEST_FILE, workers: int = None, prune: bool = False) -> dict:
+    """
+    Optimises the plots in parallel, skipping the plots whose source is unchanged since the last run.
+
+    Parameters:
+        plots (list): File names of the plots in the raw folder.
+        raw_folder (str): Folder with the plots written by matplotlib.
+        output_folder (str): Folder for the optimised images.
+        manifest_file (str): Manifest with the hash and variants of every optimised plot.
+        workers (int): Number of worker threads (optional: default based on the number of CPUs).
+        prune (bool): Remove the variants and manifest entries of the plots that are not in `plots`, e.g. of
+            deleted or renamed test cases (only after a full run).
+
+    Returns:
+        dict: Variants of every plot, keyed by the plot file name.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+
+    manifest = {}
+    if os.path.isfile(manifest_file):
+        with open(manifest_file, "r") as f:
+            manifest = json.load(f)
+
+    def process(plot: str) -> dict:
+        source = os.path.join(raw_folder, plot)
+        digest = file_hash(source)
+        previous = manifest.get(plot)
+        if previous is not None and previous["hash"] == digest and \
+                all(os.path.isfile(os.path.join(output_folder, previous[key])) for key in previous if key != "hash"):
+            return previous
+        if previous is not None:
+            # remove the outdated variants
+            _remove_variants(previous, output_folder)
+        return optimise_image(source, output_folder, digest)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        variants = dict(zip(plots, executor.map(process, plots)))
+
+    manifest.update(variants)
+    if prune:
+        for plot in set(manifest) - set(plots):
+            _remove_variants(manifest.pop(plot), output_folder)
+    os.makedirs(os.path.dirname(manifest_file) or ".", exist_ok=True)
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return variants
@@ -0,0 +1,64 @@
+import os
+import subprocess
+
+import yaml
+
+
+REFERENCE_FIELDS = ["json-file", "input-file", "mdpa-file"]
+
+
+def changed_paths(base_ref: str) -> list:
+    """
+    Lists the files changed between a base reference and HEAD, with `git diff`.
+
+    Deleted files are not listed, as there is nothing left to validate.
+
+    Parameters:
+        base_ref (str): Git reference to compare with (e.g. origin/main).
+
+    Returns:
+        list: Paths of the changed files, relative to the root of the repository.
+    """
+    result = subprocess.run(["git", "diff", "--name-only", "--diff-filter=d", f"{base_ref}...HEAD"],
+                            capture_output=True, text=True, check=True)
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def affected_cases(paths: list, folder: str = "data") -> list:
+    """
+    Resolves changed files into the test cases they belong to.
+
+    A test case is affected if its YAML file changed, or one of the files it references in `json-file`,
+    `input-file` or `mdpa-file`.
+
+    Parameters:
+        paths (list): Paths of the changed files.
+        folder (str): Folder with the test cases.
+
+    Returns:
+        list: Sorted list of the YAML files of the affected test cases.
+    """
+    changed = {os.path.normpath(path) for path in paths}
+    # only the files in the folder with test cases can affect them
+    if not any(os.path.dirname(path) == os.path.normpath(folder) for path in changed):
+        return []
+
+    cases = []
+    for file in sorted(os.listdir(folder)):
+        if not file.endswith(".yaml"):
+            continue
+        yaml_file = os.path.join(folder, file)
+        if os.path.normpath(yaml_file) in changed:
+            cases.append(yaml_file)
+            continue
+
+        with open(yaml_file, "r") as f:
+            meta = yaml.safe_load(f)
+        if not isinstance(meta, dict):
+            continue
+        references = {os.path.normpath(os.path.join(folder, str(meta[field])))
+                      for field in REFERENCE_FIELDS if meta.get(field)}
+        if references & changed:
+            cases.append(yaml_file)
+
+    return cases
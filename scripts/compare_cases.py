@@ -0,0 +1,243 @@
+import os
+import json
+
+import numpy as np
+
+from pyramid import read_header, read_window
+from node_blocks import spectra
+from hugo_content import write_if_changed
+
+
+COMPARISON_FILE = "STEM-cases/data/comparison.json"
+PYRAMID_FOLDER = "STEM-cases/static"
+HEATMAP_PLOT = "comparison.png"
+# upper frequency of the spectral distance [Hz], as the frequency axis of the plots
+FREQUENCY_MAX = 100.
+PEAK_METRICS = ["peak_velocity_y", "peak_v_eff", "peak_fft"]
+# minimum number of steps where two signals are both defined to compare them
+MIN_OVERLAP = 2
+
+
+def read_reference_signal(path: str, channel: str = "VELOCITY_Y") -> tuple:
+    """
+    Reads the full resolution signal of the reference node from its pyramid file.
+
+    Parameters:
+        path (str): Path of the pyramid file.
+        channel (str): Velocity component.
+
+    Returns:
+        tuple: Time vector and velocity [m/s].
+    """
+    header = read_header(path)
+    n_samples = header["n_samples"]
+    end = header["t0"] + header["dt"] * (n_samples - 1)
+    time, values, _ = read_window(path, channel, header["t0"], end, max_points=n_samples, header=header)
+    return time, values.astype(float)
+
+
+def common_grid(times: list) -> np.ndarray:
+    """
+    Common time grid of the signals: the time window covered by any of them, at the coarsest time step.
+
+    Parameters:
+        times (list): Time vectors of the signals.
+
+    Returns:
+        np.ndarray: The common time vector.
+    """
+    start = min(time[0] for time in times)
+    end = max(time[-1] for time in times)
+    step = max((time[-1] - time[0]) / (len(time) - 1) for time in times)
+    return start + step * np.arange(int(np.floor((end - start) / step * (1 + 1e-9))) + 1)
+
+
+def _pairwise_rms(block: np.ndarray, mask: np.ndarray = None) -> tuple:
+    """
+    RMS of the differences between all the rows of a block, where both rows are valid, from matrix products.
+
+    Returns:
+        tuple: The RMS differences, the RMS of every row where both rows are valid and the number of values
+               compared (one row and column per row of the block).
+    """
+    if mask is None:
+        mask = np.ones(block.shape)
+    block = np.where(mask > 0, block, 0)
+    squares = (block ** 2) @ mask.T
+    count = mask @ mask.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distance = np.maximum(squares + squares.T - 2 * block @ block.T, 0) / count
+        rms = np.sqrt(squares / count)
+    np.fill_diagonal(distance, 0)
+    return np.sqrt(distance), rms, count
+
+
+def _relative_deviation(values: np.ndarray) -> np.ndarray:
+    """
+    Relative deviation between all the pairs of values: |a - b| / max(|a|, |b|).
+    """
+    scale = np.maximum(np.abs(values[:, None]), np.abs(values[None, :]))
+    return np.abs(values[:, None] - values[None, :]) / np.where(scale > 0, scale, 1)
+
+
+def compare_signals(signals: dict, peaks: dict = None, frequency_max: float = FREQUENCY_MAX) -> dict:
+    """
+    Compares the reference signals of the test cases pairwise.
+
+    The signals are interpolated on a common time grid, and their spectra on a common frequency grid, and every
+    pairwise metric is computed for all the pairs at once with broadcasting and matrix products. The signals do
+    not need to cover the same time window: every pair is compared where both signals are defined, and pairs
+    that overlap in less than MIN_OVERLAP steps are not compared (NaN).
+
+    Parameters:
+        signals (dict): Per test case, its time vector and velocity [m/s].
+        peaks (dict): Per test case, its summary metrics (optional: default None, the peak deviations of
+            PEAK_METRICS are not computed).
+        frequency_max (float): Upper frequency of the spectral distance [Hz].
+
+    Returns:
+        dict: The test cases, and matrices (one row and column per test case) of:
+
+        * `rms_difference`: RMS of the difference of the velocities where both are defined [mm/s].
+        * `spectral_distance`: RMS of the difference of the amplitude spectra up to frequency_max [mm/s].
+        * `similarity`: 1 - rms_difference / (RMS velocity of both test cases), between 0 and 1.
+        * `peak_deviation`: per metric of PEAK_METRICS, relative deviation of the metrics.
+        * `overlap`: duration where both signals are defined [s].
+    """
+    cases = list(signals)
+    times = [np.asarray(signals[case][0], dtype=float) for case in cases]
+    grid = common_grid(times)
+    step = grid[1] - grid[0] if len(grid) > 1 else 0.
+    block = np.zeros((len(cases), len(grid)))
+    mask = np.zeros((len(cases), len(grid)))
+    spectra_cases = []
+    for i, (case, time) in enumerate(zip(cases, times)):
+        valid = (grid >= time[0] - 1e-9 * step) & (grid <= time[-1] + 1e-9 * step)
+        mask[i] = valid
+        block[i, valid] = np.interp(grid[valid], time, signals[case][1]) * 1000
+        spectra_cases.append(spectra(grid[valid], block[i:i + 1, valid]) if np.count_nonzero(valid) > 1 else None)
+
+    # common frequency grid at the coarsest frequency resolution
+    resolution = max(frequency[1] - frequency[0] for frequency, _ in filter(None, spectra_cases))
+    frequency = np.arange(0, frequency_max + resolution / 2, resolution)
+    amplitude = np.array([np.interp(frequency, spectrum[0], spectrum[1][0]) if spectrum is not None
+                          else np.full(len(frequency), np.nan) for spectrum in spectra_cases])
+
+    rms_difference, rms, count = _pairwise_rms(block, mask)
+    rms_difference[count < MIN_OVERLAP] = np.nan
+    scale = rms + rms.T
+
+    result = {"cases": cases,
+              "time": [float(grid[0]), float(grid[-1]), len(grid)],
+              "frequency_max": float(frequency_max),
+              "overlap": np.maximum(count - 1, 0) * step,
+              "rms_difference": rms_difference,
+              "spectral_distance": _pairwise_rms(amplitude)[0],
+              "similarity": 1 - rms_difference / np.where(scale > 0, scale, 1),
+              "peak_deviation": {}}
+    if peaks is not None:
+        for metric in PEAK_METRICS:
+            result["peak_deviation"][metric] = _relative_deviation(np.array([peaks[case][metric]
+                                                                             for case in cases], dtype=float))
+    return result
+
+
+def plot_heatmap(comparison: dict, path: str, labels: list = None):
+    """
+    Plots the similarity matrix of the test cases as a heatmap.
+
+    Parameters:
+        comparison (dict): Result of `compare_signals`.
+        path (str): Path of the image.
+        labels (list): Labels of the test cases (optional: default the names of the test cases).
+    """
+    # imported here, so that the comparison itself does not pay for it
+    import matplotlib.pyplot as plt
+
+    labels = labels or comparison["cases"]
+    size = len(labels)
+    similarity = comparison["similarity"]
+    fig, ax = plt.subplots(figsize=(4 + 0.5 * size, 3 + 0.5 * size))
+    # the pairs that are not compared (NaN) are left blank
+    image = ax.imshow(similarity, vmin=0, vmax=1, cmap="viridis")
+    ax.set_xticks(range(size))
+    ax.set_yticks(range(size))
+    ax.set_xticklabels(labels, rotation=45, ha="right")
+    ax.set_yticklabels(labels)
+    if size <= 20:
+        for i in range(size):
+            for j in range(size):
+                if np.isnan(similarity[i, j]):
+                    ax.text(j, i, "n/a", ha="center", va="center", color="gray")
+                else:
+                    ax.text(j, i, f"{similarity[i, j]:.2f}", ha="center", va="center",
+                            color="black" if similarity[i, j] > 0.5 else "white")
+    fig.colorbar(image, ax=ax, label="Similarity of v$_{y}$")
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def write_comparison(comparison: dict, labels: list = None, plot_location: str = None,
+                     data_file: str = COMPARISON_FILE) -> bool:
+    """
+    Writes the comparison into a Hugo data file.
+
+    Parameters:
+        comparison (dict): Result of `compare_signals`.
+        labels (list): Labels of the test cases (optional: default the names of the test cases).
+        plot_location (str): Location of the heatmap on the website (optional).
+        data_file (str): Path of the Hugo data file.
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date.
+    """
+    def rounded(matrix):
+        # the pairs that are not compared (NaN) are written as null
+        return [[None if np.isnan(value) else value for value in row] for row in np.round(matrix, 6).tolist()]
+
+    content = {"cases": comparison["cases"],
+               "labels": labels or comparison["cases"],
+               "time": comparison["time"],
+               "frequency_max": comparison["frequency_max"],
+               "overlap": rounded(comparison["overlap"]),
+               "rms_difference": rounded(comparison["rms_difference"]),
+               "spectral_distance": rounded(comparison["spectral_distance"]),
+               "similarity": rounded(comparison["similarity"]),
+               "peak_deviation": {metric: rounded(matrix) for metric, matrix in comparison["peak_deviation"].items()}}
+    if plot_location is not None:
+        content["plot_location"] = plot_location
+    return write_if_changed(data_file, json.dumps(content, indent=2, sort_keys=True) + "\n")
+
+
+def compare_records(records: dict, pyramid_folder: str = PYRAMID_FOLDER) -> dict:
+    """
+    Compares the test cases processed by `process_data`, from the signals of their reference nodes, which are
+    read from their pyramid files (so the stored results of unchanged test cases can be compared as well).
+
+    Parameters:
+        records (dict): Records of the test cases (see `hugo_content.case_record`), keyed by case key.
+        pyramid_folder (str): Folder of the pyramid files.
+
+    Returns:
+        dict: Result of `compare_signals`, or None if there are less than two test cases with a readable pyramid
+              file.
+    """
+    signals = {}
+    for key in sorted(records):
+        location = records[key].get("pyramid_location")
+        if not location or not os.path.isfile(os.path.join(pyramid_folder, location)):
+            continue
+        try:
+            time, velocity = read_reference_signal(os.path.join(pyramid_folder, location))
+        except ValueError as e:
+            print(f"{key} is not compared: {e}")
+            continue
+        if len(time) < MIN_OVERLAP:
+            print(f"{key} is not compared: its signal has less than {MIN_OVERLAP} steps.")
+            continue
+        signals[key] = (time, velocity)
+    if len(signals) < 2:
+        return None
+    return compare_signals(signals, {key: records[key] for key in signals})
@@ -0,0 +1,155 @@
+import os
+import time
+
+import yaml
+
+from validators import REFERENCED_FILES, file_errors, metadata_errors
+
+
+def _folder(path: str) -> str:
+    return os.path.dirname(os.path.normpath(path)) or "."
+
+
+class _StatCache:
+    """
+    Stats of the files, collected with one os.scandir pass per folder.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.folders = set()
+
+    def scan(self, folder: str) -> list:
+        """
+        Scans a folder once, and caches the stats of its files.
+
+        Returns:
+            list: Sorted paths of the YAML files in the folder.
+        """
+        folder = os.path.normpath(folder)
+        if folder not in self.folders:
+            self.folders.add(folder)
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self.stats[os.path.normpath(entry.path)] = entry.stat()
+        return sorted(path for path in self.stats if _folder(path) == folder and path.endswith(".yaml"))
+
+    def stat(self, path: str) -> os.stat_result:
+        """
+        Stat of a file, or None if it does not exist.
+        """
+        path = os.path.normpath(path)
+        if path not in self.stats:
+            if _folder(path) in self.folders:
+                return None
+            try:
+                self.stats[path] = os.stat(path)
+            except OSError:
+                self.stats[path] = None
+        return self.stats[path]
+
+
+def _describe(yaml_file: str, cache: _StatCache) -> dict:
+    """
+    Builds the descriptor of a test case, checking its YAML file and the files it references.
+    """
+    start = time.perf_counter()
+    folder = os.path.dirname(yaml_file)
+    case = {"name": os.path.basename(yaml_file),
+            "yaml_file": yaml_file,
+            "folder": folder,
+            "meta": None,
+            "files": {"yaml": yaml_file},
+            "stats": {},
+            "errors": []}
+
+    def error(kind, message):
+        case["errors"].append({"kind": kind, "file": case["files"].get(kind), "message": message})
+
+    stat = cache.stat(yaml_file)
+    messages = file_errors("YAML", yaml_file, stat and stat.st_size)
+    for message in messages:
+        error("yaml", message)
+    if not messages:
+        case["stats"][yaml_file] = (stat.st_size, stat.st_mtime_ns)
+        try:
+            with open(yaml_file, "r") as f:
+                case["meta"] = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            error("yaml", f"YAML file {yaml_file} is invalid: {e}")
+
+    meta = case["meta"]
+    if meta is not None and not isinstance(meta, dict):
+        error("yaml", f"YAML file {yaml_file} is not a mapping.")
+        case["meta"] = meta = None
+
+    if meta is not None:
+        for message in metadata_errors(meta):
+            error("yaml", message)
+
+        for field, (kind, label) in REFERENCED_FILES.items():
+            if not meta.get(field):
+                continue
+            path = os.path.join(folder, str(meta[field]))
+            case["files"][kind] = path
+            stat = cache.stat(path)
+            messages = file_errors(label, meta[field], stat and stat.st_size)
+            for message in messages:
+                error(kind, message)
+            if not messages:
+                case["stats"][path] = (stat.st_size, stat.st_mtime_ns)
+
+    case["scan_time"] = time.perf_counter() - start
+    return case
+
+
+def scan_cases(paths: list) -> list:
+    """
+    Discovers the test cases, and resolves and checks every file they reference (YAML, JSON, input and MDPA).
+
+    Every folder is listed once with os.scandir, and the stats of its files are reused, so that no file is
+    stat-ed twice. The descriptors are used by the later stages instead of the paths.
+
+    A descriptor holds:
+
+    * `name`, `yaml_file`, `folder`: name of the test case, its YAML file and the folder of the YAML file.
+    * `meta`: content of the YAML file (None if it cannot be read).
+    * `files`: paths of the `yaml`, `json`, `input` and `mdpa` files.
+    * `stats`: (size, mtime_ns) of the existing files.
+    * `errors`: problems found, with the kind of file, the path and the message.
+    * `scan_time`: time to describe the test case [s].
+
+    Parameters:
+        paths (list): YAML files or folders with YAML files.
+
+    Returns:
+        list: Descriptors of the test cases, sorted by YAML file.
+    """
+    cache = _StatCache()
+    yaml_files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            yaml_files.update(os.path.join(path, os.path.basename(file)) for file in cache.scan(path))
+        else:
+            # the referenced files are next to the YAML file
+            if os.path.isdir(_folder(path)):
+                cache.scan(_folder(path))
+            yaml_files.add(path)
+
+    return [_describe(yaml_file, cache) for yaml_file in sorted(yaml_files)]
+
+
+def print_errors(case: dict) -> bool:
+    """
+    Prints the problems found in the files of a test case.
+
+    Parameters:
+        case (dict): Descriptor of the test case.
+
+    Returns:
+        bool: True if there are no problems.
+    """
+    for error in case["errors"]:
+        print(error["message"])
+    return not case["errors"]
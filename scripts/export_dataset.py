@@ -0,0 +1,175 @@
+import os
+import json
+import argparse
+
+import numpy as np
+
+from discovery import scan_cases
+from validate_cases import load_valid_case
+from hugo_content import case_key
+from mdpa import read_mdpa, node_coordinates
+
+
+DATASET_FOLDER = "build/dataset"
+COMPONENTS = ["VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]
+# name, dtype and number of columns of every array in the dataset
+COLUMNS = {"time": ("<f8", 1),
+           "node_case": ("<i4", 1),
+           "node_id": ("<i8", 1),
+           "coordinates": ("<f8", 3),
+           "velocity_x": ("<f8", 1),
+           "velocity_y": ("<f8", 1),
+           "velocity_z": ("<f8", 1)}
+
+
+def export_dataset(paths: list, output: str = DATASET_FOLDER, compressed: bool = False) -> dict:
+    """
+    Streams every valid test case into one columnar dataset.
+
+    Every array is stored as a raw little-endian binary file, so that it can be memory mapped:
+
+    * `time`: time vectors of all the test cases, one after the other.
+    * `node_case`, `node_id`, `coordinates`: test case index, id and coordinates of every node.
+    * `velocity_x`, `velocity_y`, `velocity_z`: velocities of every node, one after the other.
+
+    `dataset.json` holds the metadata of the test cases with the offsets of their blocks, so that the
+    velocities of a test case are a contiguous (nodes, steps) block. Only one test case is in memory at a time.
+
+    Parameters:
+        paths (list): YAML files or folders with YAML files.
+        output (str): Output folder.
+        compressed (bool): Also write all the arrays into a compressed `dataset.npz` (not memory mappable).
+
+    Returns:
+        dict: Metadata of the dataset.
+    """
+    os.makedirs(output, exist_ok=True)
+    files = {name: open(os.path.join(output, f"{name}.bin"), "wb") for name in COLUMNS}
+
+    cases = []
+    n_time = n_nodes = n_samples = 0
+    try:
+        for case in scan_cases(paths):
+            # the JSON file is decoded once, for the validation and the export
+            data = load_valid_case(case)
+            if data is None:
+                print(f"Skipping invalid test case: {case['yaml_file']}")
+                continue
+
+            meta = case["meta"]
+
+            nodes = sorted((key for key in data if key.startswith("NODE_")), key=lambda key: int(key[5:]))
+            ids = np.array([int(key[5:]) for key in nodes], dtype=np.int64)
+            if all("COORDINATES" in data[key] for key in nodes):
+                coordinates = np.array([data[key]["COORDINATES"] for key in nodes], dtype=float)
+            else:
+                coordinates = node_coordinates(read_mdpa(case["files"]["mdpa"]), ids)
+
+            time = np.asarray(data["TIME"], dtype="<f8")
+            time.tofile(files["time"])
+            np.full(len(nodes), len(cases), dtype="<i4").tofile(files["node_case"])
+            ids.astype("<i8").tofile(files["node_id"])
+            coordinates.astype("<f8").tofile(files["coordinates"])
+            for component in COMPONENTS:
+                for key in nodes:
+                    np.asarray(data[key][component], dtype="<f8").tofile(files[component.lower()])
+
+            cases.append({"case_key": case_key(meta),
+                          "organisation": meta["organisation"],
+                          "title": meta["title"],
+                          "stem_version": str(meta["STEM-version"]),
+                          "date": str(meta["date"]),
+                          "time_start": n_time,
+                          "n_steps": len(time),
+                          "node_start": n_nodes,
+                          "n_nodes": len(nodes),
+                          "sample_start": n_samples})
+            n_time += len(time)
+            n_nodes += len(nodes)
+            n_samples += len(nodes) * len(time)
+            del data
+    finally:
+        for f in files.values():
+            f.close()
+
+    lengths = {"time": n_time, "node_case": n_nodes, "node_id": n_nodes, "coordinates": n_nodes,
+               "velocity_x": n_samples, "velocity_y": n_samples, "velocity_z": n_samples}
+    dataset = {"version": 1,
+               "cases": cases,
+               "columns": {name: {"file": f"{name}.bin",
+                                  "dtype": dtype,
+                                  "shape": [lengths[name], width] if width > 1 else [lengths[name]]}
+                           for name, (dtype, width) in COLUMNS.items()}}
+
+    with open(os.path.join(output, "dataset.json"), "w") as f:
+        json.dump(dataset, f, indent=2)
+
+    if compressed:
+        columns = load_dataset(output)["columns"]
+        np.savez_compressed(os.path.join(output, "dataset.npz"), **columns)
+
+    print(f"Exported {len(cases)} test cases with {n_nodes} nodes to {output}")
+    return dataset
+
+
+def load_dataset(path: str = DATASET_FOLDER) -> dict:
+    """
+    Opens an exported dataset. The arrays are memory mapped, so only the parts that are used are read.
+
+    Parameters:
+        path (str): Folder of the dataset.
+
+    Returns:
+        dict: Metadata of the dataset, with the arrays in `columns`.
+    """
+    with open(os.path.join(path, "dataset.json"), "r") as f:
+        dataset = json.load(f)
+
+    columns = {}
+    for name, column in dataset["columns"].items():
+        if column["shape"][0] == 0:
+            columns[name] = np.empty(column["shape"], dtype=column["dtype"])
+        else:
+            columns[name] = np.memmap(os.path.join(path, column["file"]), dtype=column["dtype"], mode="r",
+                                      shape=tuple(column["shape"]))
+    dataset["columns"] = columns
+    return dataset
+
+
+def case_data(dataset: dict, key: str) -> dict:
+    """
+    Selects the arrays of one test case in a dataset, without copying them.
+
+    Parameters:
+        dataset (dict): Dataset opened with `load_dataset`.
+        key (str): Key of the test case (organisation/title).
+
+    Returns:
+        dict: Time vector, node ids, node coordinates and velocities (with shape (nodes, steps)) of the test case.
+    """
+    for case in dataset["cases"]:
+        if case["case_key"] == key:
+            break
+    else:
+        raise ValueError(f"Test case {key} not found in the dataset.")
+
+    columns = dataset["columns"]
+    nodes = slice(case["node_start"], case["node_start"] + case["n_nodes"])
+    samples = slice(case["sample_start"], case["sample_start"] + case["n_nodes"] * case["n_steps"])
+    result = {"time": columns["time"][case["time_start"]:case["time_start"] + case["n_steps"]],
+              "node_id": columns["node_id"][nodes],
+              "coordinates": columns["coordinates"][nodes]}
+    for component in COMPONENTS:
+        result[component] = columns[component.lower()][samples].reshape(case["n_nodes"], case["n_steps"])
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export all the valid test cases into one columnar dataset.")
+    parser.add_argument("paths", nargs="*", default=["data"], help="YAML files or folders (default: data)")
+    parser.add_argument("--output", default=DATASET_FOLDER, help=f"output folder (default: {DATASET_FOLDER})")
+    parser.add_argument("--compressed", action="store_true",
+                        help="also write a compressed dataset.npz with all the arrays")
+    args = parser.parse_args()
+
+    export_dataset(args.paths, args.output, args.compressed)
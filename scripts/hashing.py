@@ -0,0 +1,18 @@
+import hashlib
+
+
+def file_hash(path: str) -> str:
+    """
+    Computes the SHA-256 hash of a file.
+
+    Parameters:
+        path (str): Path of the file.
+
+    Returns:
+        str: Hexadecimal hash of the file content.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+
+
+RESULTS_FOLDER = "STEM-cases/content/results"
+SUMMARY_DATA_FILE = "STEM-cases/data/summary.json"
+SUMMARY_METRICS = ["peak_velocity_y", "peak_v_eff", "peak_fft", "freq_peak_fft"]
+
+
+def case_record(case_summary: dict) -> dict:
+    """
+    Converts the summary of a test case into the compact record used by the content writers.
+
+    The record only holds the fields of the metadata shown on the website, the plot locations and the
+    summary metrics, so that the records of many test cases can be kept while their full summaries are released.
+    A record is returned as it is.
+
+    Parameters:
+        case_summary (dict): Summary of the test case, as returned by `process_data.process_plot_data`.
+
+    Returns:
+        dict: The compact record of the test case.
+    """
+    if "meta" not in case_summary:
+        return case_summary
+
+    meta = case_summary["meta"]
+    record = {"key": case_key(meta),
+              "title": meta["title"],
+              "organisation": meta["organisation"],
+              "description": meta["test-description"],
+              "date": str(meta["date"]),
+              "stem_version": str(meta["STEM-version"]),
+              "plot_location": case_summary["plot_location"]}
+    for location in ["thumbnail_location", "pyramid_location"]:
+        if location in case_summary:
+            record[location] = case_summary[location]
+    for metric in SUMMARY_METRICS:
+        record[metric] = float(case_summary[metric])
+    return record
+
+
+def edit_content_results(summary: dict, prune: bool = True, results_folder: str = RESULTS_FOLDER):
+    """
+    Writes the Hugo results section: one page per test case, grouped in one section per organisation.
+
+    Pages are only rewritten when their content changes, so unchanged cases keep their files (and
+    modification times) and both this step and the Hugo build only touch the changed cases.
+
+    Parameters:
+        summary (dict): Records of the test cases (see `case_record`), or their full summaries.
+        prune (bool): Remove the pages of cases that are not in the summary (only for a full run).
+        results_folder (str): Path of the Hugo results section.
+    """
+
+    written = set()
+
+    for key in sorted(summary.keys()):
+        record = case_record(summary[key])
+        organisation_folder = os.path.join(results_folder, slugify(record["organisation"]))
+
+        # organisation index page
+        index_file = os.path.join(organisation_folder, "_index.md")
+        write_if_changed(index_file, "---\n"
+                                     f"title: {json.dumps(record['organisation'])}\n"
+                                     "---\n")
+        written.add(index_file)
+
+        # thumbnail shown in the list pages
+        cover = ""
+        if "thumbnail_location" in record:
+            cover = ("cover:\n"
+                     f"  image: \"/TestCases/{record['thumbnail_location']}\"\n"
+                     f"  alt: {json.dumps(record['title'])}\n"
+                     "  hiddenInSingle: true\n")
+
+        # test case page
+        case_file = os.path.join(organisation_folder, f"{slugify(record['title'])}.md")
+        write_if_changed(case_file, "---\n"
+                                    f"title: {json.dumps(record['title'])}\n"
+                                    f"date: {record['date']}\n"
+                                    f"summary: {json.dumps(' '.join(record['description'].split()))}\n"
+                                    f"organisation: {json.dumps(record['organisation'])}\n"
+                                    f"stem_version: {json.dumps(record['stem_version'])}\n"
+                                    f"{cover}"
+                                    "---\n\n"
+                                    f"**Description:** {record['description']}\n"
+                                    f"**Organization:** {record['organisation']}\n\n"
+                                    f"**Date:** {record['date']}\n\n"
+                                    f"**STEM Version:** {record['stem_version']}\n\n"
+                                    f"![{record['title']}](/TestCases/{record['plot_location']})\n")
+        written.add(case_file)
+
+    if not prune:
+        return
+
+    # remove the pages of cases that no longer exist
+    for root, _, files in os.walk(results_folder, topdown=False):
+        for file in files:
+            path = os.path.join(root, file)
+            if root != results_folder and path not in written:
+                os.remove(path)
+        if root != results_folder and not os.listdir(root):
+            os.rmdir(root)
+
+
+def edit_content_summary(summary: dict, prune: bool = True, data_file: str = SUMMARY_DATA_FILE):
+    """
+    Updates the Hugo data file with the summary metrics of the test cases.
+
+    The rows of the cases in the summary are replaced and all other rows are kept as they are,
+    so a partial run only touches the changed cases. The table is rendered by the `summary_table`
+    shortcode, which sorts and filters it in the browser.
+
+    Parameters:
+        summary (dict): Records of the test cases (see `case_record`), or their full summaries.
+        prune (bool): Remove the rows of cases that are not in the summary (only for a full run).
+        data_file (str): Path of the Hugo data file.
+    """
+
+    rows = {}
+    if os.path.isfile(data_file):
+        with open(data_file, "r") as f:
+            rows = json.load(f)["cases"]
+
+    new_rows = {}
+    for value in summary.values():
+        record = case_record(value)
+        new_rows[record["key"]] = summary_row(record)
+
+    if prune:
+        rows = new_rows
+    else:
+        rows.update(new_rows)
+
+    write_if_changed(data_file, json.dumps({"cases": rows}, indent=2, sort_keys=True) + "\n")
+
+
+def case_key(meta: dict) -> str:
+    """
+    Unique key of a test case, which is also its path in the results section.
+
+    Parameters:
+        meta (dict): The metadata dictionary.
+
+    Returns:
+        str: The key of the test case.
+    """
+    return f"{slugify(meta['organisation'])}/{slugify(meta['title'])}"
+
+
+def summary_row(case_summary: dict) -> dict:
+    """
+    Converts the summary of a test case into a row of the summary data file.
+
+    Parameters:
+        case_summary (dict): Record of the test case (see `case_record`), or its full summary.
+
+    Returns:
+        dict: The metadata and metrics of the test case.
+    """
+    record = case_record(case_summary)
+    row = {"title": record["title"],
+           "organisation": record["organisation"],
+           "description": " ".join(record["description"].split()),
+           "date": record["date"],
+           "stem_version": record["stem_version"],
+           "page": f"results/{record['key']}/"}
+    for metric in SUMMARY_METRICS:
+        row[metric] = record[metric]
+    return row
+
+
+def slugify(text: str) -> str:
+    """
+    Converts a text into a name that can be used for files and URLs.
+
+    Parameters:
+        text (str): The text to convert.
+
+    Returns:
+        str: Lower case text with every sequence of non alphanumeric characters replaced by a hyphen.
+    """
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """
+    Writes a file only if its content differs from the content on disk.
+
+    Parameters:
+        path (str): Path of the file.
+        content (str): New content of the file.
+
+    Returns:
+        bool: True if the file was written, False if it was already up to date.
+    """
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+    return True
@@ -0,0 +1,307 @@
+import os
+import re
+import sys
+import json
+import time
+import cProfile
+import threading
+import contextlib
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+ENV_VARIABLE = "STEM_INSTRUMENT"
+DEFAULT_REPORT = "build/instrumentation.json"
+PROFILE_ENV_VARIABLE = "STEM_PROFILE"
+PROFILE_THRESHOLD_ENV_VARIABLE = "STEM_PROFILE_THRESHOLD"
+
+# records of the stages; None when the instrumentation is disabled
+_records = None
+# stages in progress, per thread (e.g. the prefetch thread of the pipeline)
+_local = threading.local()
+_NULL_CONTEXT = contextlib.nullcontext()
+# profiling settings; None when the profiling is disabled
+_profile = None
+
+
+def enable(trace_memory: bool = True):
+    """
+    Enables the instrumentation of the pipeline stages.
+
+    The peak memory of tracemalloc is global to the process: when stages run in several threads at the same time
+    (e.g. with the prefetch thread of the pipeline), their peaks mix, so the memory should not be traced.
+
+    Parameters:
+        trace_memory (bool): Trace the peak Python memory of every stage with tracemalloc (slows down the run).
+    """
+    global _records
+    _records = []
+    _stack().clear()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def disable():
+    """
+    Disables the instrumentation and discards the records.
+    """
+    global _records
+    _records = None
+    _stack().clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def enable_from_environment(trace_memory: bool = True) -> str:
+    """
+    Enables the instrumentation if the environment variable `STEM_INSTRUMENT` is set.
+
+    The variable is either the path of the report or `1` for the default path.
+
+    Parameters:
+        trace_memory (bool): Trace the peak Python memory of every stage (see `enable`).
+
+    Returns:
+        str: Path of the report, or None if the instrumentation is not enabled.
+    """
+    value = os.environ.get(ENV_VARIABLE, "")
+    if value in ["", "0"]:
+        return None
+    enable(trace_memory)
+    return DEFAULT_REPORT if value == "1" else value
+
+
+def _stack() -> list:
+    """
+    Stages in progress in the current thread.
+    """
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def is_enabled() -> bool:
+    """
+    Returns:
+        bool: True if the instrumentation is enabled.
+    """
+    return _records is not None
+
+
+def peak_rss() -> float:
+    """
+    Peak resident set size of the process.
+
+    Returns:
+        float: Peak RSS [MB], or None when not available on the platform.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+
+class _Stage:
+    """
+    Context manager that records the wall time, CPU time and peak memory of a stage.
+    """
+
+    def __init__(self, case: str, name: str):
+        self.case = case
+        self.name = name
+        self.child_peak = 0
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            # keep the peak of the enclosing stage before resetting it for this stage
+            stack = _stack()
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        _stack().append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        stack = _stack()
+        stack.pop()
+
+        peak = None
+        if tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+            peak /= 1024 ** 2
+
+        if _records is not None:
+            _records.append({"case": self.case,
+                             "stage": self.name,
+                             "wall_time": wall,
+                             "cpu_time": cpu,
+                             "peak_tracemalloc_mb": peak,
+                             "peak_rss_mb": peak_rss()})
+        return False
+
+
+def stage(case: str, name: str):
+    """
+    Context manager around a stage of the pipeline. It does nothing when the instrumentation is disabled.
+
+    Parameters:
+        case (str): Name of the test case.
+        name (str): Name of the stage.
+
+    Returns:
+        context manager: Records the stage when the instrumentation is enabled.
+    """
+    if _records is None:
+        return _NULL_CONTEXT
+    return _Stage(case, name)
+
+
+def report() -> dict:
+    """
+    Builds the instrumentation report: all records and the totals per stage.
+
+    Returns:
+        dict: The report.
+    """
+    totals = {}
+    for record in _records or []:
+        total = totals.setdefault(record["stage"], {"calls": 0, "wall_time": 0., "cpu_time": 0.,
+                                                    "peak_tracemalloc_mb": 0.})
+        total["calls"] += 1
+        total["wall_time"] += record["wall_time"]
+        total["cpu_time"] += record["cpu_time"]
+        if record["peak_tracemalloc_mb"] is not None:
+            total["peak_tracemalloc_mb"] = max(total["peak_tracemalloc_mb"], record["peak_tracemalloc_mb"])
+
+    return {"records": list(_records or []), "stages": totals, "peak_rss_mb": peak_rss()}
+
+
+def top_table(n: int = 10) -> str:
+    """
+    Human-readable table of the N slowest stages.
+
+    Parameters:
+        n (int): Number of stages in the table.
+
+    Returns:
+        str: The table.
+    """
+    records = sorted(_records or [], key=lambda r: r["wall_time"], reverse=True)[:n]
+    lines = [f"{'case':<40} {'stage':<20} {'wall (s)':>10} {'cpu (s)':>10} {'tracemalloc (MB)':>17} "
+             f"{'RSS (MB)':>10}"]
+    for r in records:
+        memory = "-" if r["peak_tracemalloc_mb"] is None else f"{r['peak_tracemalloc_mb']:.1f}"
+        rss = "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.1f}"
+        lines.append(f"{r['case'][:40]:<40} {r['stage'][:20]:<20} {r['wall_time']:>10.3f} {r['cpu_time']:>10.3f} "
+                     f"{memory:>17} {rss:>10}")
+    return "\n".join(lines)
+
+
+def write_report(path: str, n: int = 10):
+    """
+    Writes the JSON report and prints the table of the slowest stages.
+
+    Parameters:
+        path (str): Path of the JSON report.
+        n (int): Number of stages in the printed table.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+    print(top_table(n))
+
+
+def enable_profiling(folder: str, threshold: float = 0.):
+    """
+    Enables the profiling of every test case with cProfile.
+
+    Parameters:
+        folder (str): Folder for the profiles.
+        threshold (float): Only keep the profiles of the cases whose processing takes longer than this [s].
+    """
+    global _profile
+    os.makedirs(folder, exist_ok=True)
+    _profile = {"folder": folder, "threshold": threshold}
+
+
+def disable_profiling():
+    """
+    Disables the profiling of the test cases.
+    """
+    global _profile
+    _profile = None
+
+
+def enable_profiling_from_environment(folder: str = None, threshold: float = None) -> bool:
+    """
+    Enables the profiling if the environment variable `STEM_PROFILE` is set to the folder for the profiles.
+    The threshold is read from `STEM_PROFILE_THRESHOLD` [s].
+
+    Parameters:
+        folder (str): Folder for the profiles, instead of `STEM_PROFILE` (optional: e.g. from the command line).
+        threshold (float): Threshold [s], instead of `STEM_PROFILE_THRESHOLD` (optional: e.g. from the command
+            line).
+
+    Returns:
+        bool: True if the profiling is enabled.
+    """
+    folder = folder or os.environ.get(PROFILE_ENV_VARIABLE, "")
+    if folder in ["", "0"]:
+        return False
+    if threshold is None:
+        threshold = float(os.environ.get(PROFILE_THRESHOLD_ENV_VARIABLE, 0.))
+    enable_profiling(folder, threshold)
+    return True
+
+
+@contextlib.contextmanager
+def _profile_case(case: str):
+    """
+    Profiles a test case and writes the profile if the case is slower than the threshold.
+
+    Parameters:
+        case (str): Name of the test case.
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        if elapsed >= _profile["threshold"]:
+            path = os.path.join(_profile["folder"], f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', case)}.prof")
+            profiler.dump_stats(path)
+            print(f"Profile of {case} ({elapsed:.2f} s) written to {path}")
+
+
+def profile_case(case: str):
+    """
+    Context manager around the processing of a test case. It does nothing when the profiling is disabled.
+
+    The profiles are written in the pstats format, which can be read with `python -m pstats` or converted
+    into a flame graph (e.g. with snakeviz or flameprof).
+
+    Parameters:
+        case (str): Name of the test case.
+
+    Returns:
+        context manager: Profiles the test case when the profiling is enabled.
+    """
+    if _profile is None:
+        return _NULL_CONTEXT
+    return _profile_case(case)
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+def read_mdpa(mdpa_path: str) -> list:
+    """
+    Reads a MDPA file.
+
+    Parameters:
+        mdpa_path (str): Path to the MDPA file.
+
+    Returns:
+        list: The MDPA content as a list of strings.
+    """
+    with open(mdpa_path, "r") as f:
+        return f.read().splitlines()
+
+
+def node_table(mdpa: list) -> tuple:
+    """
+    Parses the `Nodes` block of a MDPA file into arrays.
+
+    Parameters:
+        mdpa (list): The MDPA content as a list of strings.
+
+    Returns:
+        tuple: Node ids (int64 array) and node coordinates (float64 array with shape (n, 3)).
+    """
+    start = mdpa.index("Begin Nodes")
+    end = mdpa.index("End Nodes", start)
+
+    values = np.fromstring(" ".join(mdpa[start + 1:end]), sep=" ").reshape(-1, 4)
+    return values[:, 0].astype(np.int64), values[:, 1:]
+
+
+def submodel_part_nodes(mdpa: list, name: str = "json_output") -> np.ndarray:
+    """
+    Reads the node ids of a submodel part of a MDPA file.
+
+    Parameters:
+        mdpa (list): The MDPA content as a list of strings.
+        name (str): Name of the submodel part.
+
+    Returns:
+        np.ndarray: Node ids (int64) of the submodel part.
+    """
+    start = mdpa.index(f"Begin SubModelPart {name}")
+    lines = [line.strip() for line in mdpa[start:]]
+    begin = lines.index("Begin SubModelPartNodes")
+    end = lines.index("End SubModelPartNodes", begin)
+
+    return np.array(" ".join(lines[begin + 1:end]).split(), dtype=np.int64)
+
+
+def node_coordinates(mdpa: list, ids: np.ndarray) -> np.ndarray:
+    """
+    Looks up the coordinates of a set of nodes.
+
+    Parameters:
+        mdpa (list): The MDPA content as a list of strings.
+        ids (np.ndarray): Node ids.
+
+    Returns:
+        np.ndarray: Coordinates of the nodes (float64 array with shape (n, 3)).
+    """
+    all_ids, coordinates = node_table(mdpa)
+    order = np.argsort(all_ids)
+    position = np.searchsorted(all_ids, ids, sorter=order)
+    position = np.clip(position, 0, len(all_ids) - 1)
+    found = all_ids[order[position]] == ids
+    if not np.all(found):
+        raise ValueError(f"Nodes not found in the MDPA file: {np.asarray(ids)[~found].tolist()}")
+    return coordinates[order[position]]
+
+
+def compare_nodes(json_ids: np.ndarray, mdpa: list, json_coordinates: np.ndarray = None,
+                  tolerance: float = 1e-6) -> dict:
+    """
+    Compares the nodes of the JSON results with the `json_output` submodel part of the MDPA file.
+
+    Parameters:
+        json_ids (np.ndarray): Node ids in the JSON results.
+        mdpa (list): The MDPA content as a list of strings.
+        json_coordinates (np.ndarray): Coordinates of the nodes in the JSON results, with shape (n, 3)
+            (optional: the coordinates are not compared).
+        tolerance (float): Maximum distance between the coordinates of a node in both files.
+
+    Returns:
+        dict: Ids of the nodes `missing` in the JSON results, `extra` in the JSON results, and whose
+            coordinates do not match (`moved`).
+    """
+    json_ids = np.asarray(json_ids, dtype=np.int64)
+    output_ids = submodel_part_nodes(mdpa)
+    result = {"missing": np.setdiff1d(output_ids, json_ids),
+              "extra": np.setdiff1d(json_ids, output_ids),
+              "moved": np.empty(0, dtype=np.int64)}
+
+    if json_coordinates is not None:
+        common = np.isin(json_ids, output_ids)
+        distance = np.linalg.norm(node_coordinates(mdpa, json_ids[common]) -
+                                  np.asarray(json_coordinates, dtype=float)[common], axis=1)
+        result["moved"] = np.sort(json_ids[common][distance > tolerance])
+    return result
@@ -0,0 +1,214 @@
+import argparse
+
+import numpy as np
+
+from result_io import iter_result, DEFAULT_BACKEND
+
+
+COMPONENTS = ["VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]
+# number of nodes analysed at a time
+BLOCK_SIZE = 256
+# metrics per node: peak velocities, peak particle velocity (largest component), and the effective velocity
+# and spectrum of the vertical velocity [mm/s and Hz], as in `process_data.signal_metrics`
+METRICS = ["peak_velocity_x", "peak_velocity_y", "peak_velocity_z", "ppv", "peak_v_eff", "peak_fft",
+           "freq_peak_fft"]
+
+
+def sampling_frequency(time: np.ndarray) -> int:
+    """
+    Acquisition frequency of a time vector, as computed by SignalProcessingTools.
+
+    Parameters:
+        time (np.ndarray): Time vector.
+
+    Returns:
+        int: Acquisition frequency [Hz].
+    """
+    return int(np.ceil(1 / np.mean(np.diff(time))))
+
+
+def spectra(time: np.ndarray, block: np.ndarray) -> tuple:
+    """
+    Single-sided amplitude spectra of a block of signals, as `TimeSignalProcessing.fft(half_representation=True)`.
+
+    Parameters:
+        time (np.ndarray): Time vector.
+        block (np.ndarray): Signals, with shape (signals, steps).
+
+    Returns:
+        tuple: The frequencies [Hz] and the amplitudes, with shape (signals, frequencies).
+    """
+    n_steps = block.shape[-1]
+    # an odd signal is padded with a zero, but normalised by its own length
+    n_fft = n_steps + n_steps % 2
+    frequency = np.linspace(0, 1, n_fft)[:n_fft // 2] * sampling_frequency(time)
+    amplitude = 2 * np.abs(np.fft.rfft(block, n_fft, axis=-1)[..., :n_fft // 2]) / n_steps
+    return frequency, amplitude
+
+
+def v_eff(time: np.ndarray, block: np.ndarray, n: int = 4, tau: float = 0.125) -> np.ndarray:
+    """
+    Effective velocity of a block of signals, as `TimeSignalProcessing.v_eff_SBR` (SBR deel B, 2006).
+
+    As in `process_data.signal_metrics`, a signal with an odd length is shortened by one step. The moving RMS is
+    computed for all the signals at once with a convolution through the FFT.
+
+    Parameters:
+        time (np.ndarray): Time vector.
+        block (np.ndarray): Velocities [m/s], with shape (signals, steps).
+        n (int): Number of time constants.
+        tau (float): Time constant of the exponential decay [s].
+
+    Returns:
+        np.ndarray: Effective velocities [mm/s], with shape (signals, even number of steps).
+    """
+    fs = sampling_frequency(time)
+    block = block[..., :block.shape[-1] - block.shape[-1] % 2]
+    n_steps = block.shape[-1]
+    half = n_steps // 2
+
+    # frequency weighting (human perception) with a low-pass filter at 50 Hz
+    df = fs / n_steps
+    v0 = 1 / 1000
+    f0 = 5.6
+    weight = np.append(0, (1 / v0) / np.sqrt(1 + (f0 / (df * np.arange(1, half + 1))) ** 2))
+    cut_off = int(np.ceil(50 / df))
+    if cut_off < half:
+        weight[cut_off + 1:] = 0
+    weighted = np.fft.irfft(weight * np.fft.rfft(block, axis=-1)[..., :half + 1], n_steps, axis=-1)
+
+    # moving RMS: convolution of the squared signal with the exponential decay
+    qsi = np.linspace(0, n * tau, int(n * tau * fs + 1))
+    decay = np.exp(-qsi / tau) / (1 - np.exp(-n))
+    size = n_steps + len(decay) - 1
+    running = np.fft.irfft(np.fft.rfft(weighted ** 2, size, axis=-1) * np.fft.rfft(decay, size), size,
+                           axis=-1)[..., :n_steps]
+    return np.sqrt(np.maximum(running, 0) / fs / tau)
+
+
+def block_metrics(time: np.ndarray, block: np.ndarray) -> dict:
+    """
+    Metrics of every node of a block.
+
+    Parameters:
+        time (np.ndarray): Time vector.
+        block (np.ndarray): Velocities [m/s], with shape (nodes, components, steps).
+
+    Returns:
+        dict: Per metric (see METRICS) an array with a value per node.
+    """
+    peaks = np.max(np.abs(block), axis=-1) * 1000
+    vertical = block[:, COMPONENTS.index("VELOCITY_Y")]
+    frequency, amplitude = spectra(time, vertical)
+    return {"peak_velocity_x": peaks[:, 0],
+            "peak_velocity_y": peaks[:, 1],
+            "peak_velocity_z": peaks[:, 2],
+            "ppv": peaks.max(axis=1),
+            "peak_v_eff": v_eff(time, vertical).max(axis=-1),
+            "peak_fft": amplitude.max(axis=-1) * 1000,
+            "freq_peak_fft": frequency[np.argmax(amplitude, axis=-1)]}
+
+
+def merge_metrics(blocks: list) -> dict:
+    """
+    Merges the metrics of the blocks, and finds the node with the largest value of every metric.
+
+    Parameters:
+        blocks (list): Node names and metrics (from `block_metrics`) of every block.
+
+    Returns:
+        dict: The node names, per metric the values of all the nodes, and per metric the largest value and its node
+              (`max`).
+    """
+    blocks = list(blocks)
+    nodes = [name for names, _ in blocks for name in names]
+    result = {"nodes": nodes, "max": {}}
+    for metric in METRICS:
+        values = np.concatenate([metrics[metric] for _, metrics in blocks]) if blocks else np.empty(0)
+        result[metric] = values
+        if len(values):
+            result["max"][metric] = (float(values.max()), nodes[int(np.argmax(values))])
+    return result
+
+
+def result_blocks(path: str, block_size: int = BLOCK_SIZE, backend: str = DEFAULT_BACKEND):
+    """
+    Reads the velocities of a result file block by block.
+
+    The file (plain, compressed or compact) is read one node at a time, so only one block of nodes is in memory.
+
+    Parameters:
+        path (str): Path to the result file.
+        block_size (int): Number of nodes per block.
+        backend (str): Parser of the numbers (see `result_io.BACKENDS`).
+
+    Yields:
+        tuple: The time vector, the node names and the velocities with shape (nodes, components, steps).
+    """
+    time = None
+    names = []
+    block = None
+    for key, value in iter_result(path, backend):
+        if key == "TIME":
+            time = value
+        if not key.startswith("NODE_"):
+            continue
+        if time is None:
+            raise ValueError(f"{path}: the nodes come before TIME.")
+        if block is None:
+            block = np.empty((block_size, len(COMPONENTS), len(time)))
+        block[len(names)] = [value[component] for component in COMPONENTS]
+        names.append(key)
+        if len(names) == block_size:
+            yield time, names, block[:len(names)]
+            names = []
+            block = None
+    if names:
+        yield time, names, block[:len(names)]
+
+
+def dataset_blocks(case: dict, block_size: int = BLOCK_SIZE):
+    """
+    Reads the velocities of a test case of the binary dataset (see `export_dataset`) block by block.
+
+    The columns of the dataset are memory mapped, so only the pages of the current block are read.
+
+    Parameters:
+        case (dict): Arrays of the test case, from `export_dataset.case_data`.
+        block_size (int): Number of nodes per block.
+
+    Yields:
+        tuple: The time vector, the node names and the velocities with shape (nodes, components, steps).
+    """
+    time = np.asarray(case["time"])
+    for start in range(0, len(case["node_id"]), block_size):
+        stop = start + block_size
+        names = [f"NODE_{node}" for node in case["node_id"][start:stop]]
+        yield time, names, np.stack([case[component][start:stop] for component in COMPONENTS], axis=1)
+
+
+def node_metrics(blocks) -> dict:
+    """
+    Computes the metrics of all the nodes, one block at a time.
+
+    Parameters:
+        blocks: Blocks of velocities, from `result_blocks` or `dataset_blocks`.
+
+    Returns:
+        dict: The merged metrics (see `merge_metrics`).
+    """
+    return merge_metrics((names, block_metrics(time, block)) for time, names, block in blocks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the metrics of all the nodes of a result file, "
+                                                 "one block of nodes at a time.")
+    parser.add_argument("result_file", help="result file: JSON (plain or compressed) or compact")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE,
+                        help=f"number of nodes per block (default: {BLOCK_SIZE})")
+    args = parser.parse_args()
+
+    metrics = node_metrics(result_blocks(args.result_file, args.block_size))
+    print(f"{len(metrics['nodes'])} nodes")
+    for metric, (value, node) in metrics["max"].items():
+        print(f"{metric:<16} {value:>14.6g} {node}")
@@ -0,0 +1,59 @@
+import queue
+import threading
+
+
+def prefetch(items: list, function, depth: int = 2):
+    """
+    Applies a function to the items in a background thread, ahead of the consumer, and yields the results in order.
+
+    At most `depth` results wait in the queue, and one more is being computed, so the memory is capped by the
+    depth. An exception raised by the function is raised when its result is consumed.
+    With a depth of 0 the function is applied lazily in the calling thread.
+
+    Parameters:
+        items (list): Items to process.
+        function (callable): Function applied to every item (e.g. reading and decoding its files).
+        depth (int): Maximum number of results waiting to be consumed.
+
+    Yields:
+        tuple: The item and the result of the function.
+    """
+    if depth <= 0:
+        for item in items:
+            yield item, function(item)
+        return
+
+    # both threads go through the items: a one-shot iterator is read once, here
+    items = list(items)
+    results = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        for item in items:
+            try:
+                result = (item, function(item), None)
+            except Exception as e:
+                result = (item, None, e)
+            # wait for a free place in the queue, unless the consumer stopped
+            while not stop.is_set():
+                try:
+                    results.put(result, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set() or result[2] is not None:
+                return
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        for _ in range(len(items)):
+            item, result, error = results.get()
+            if error is not None:
+                raise error
+            yield item, result
+            # release the result before waiting for the next one
+            item = result = None
+    finally:
+        stop.set()
+        thread.join()
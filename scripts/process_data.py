@@ -1,18 +1,30 @@
 import os
-import json
-import yaml
+import argparse
+import contextlib
 import numpy as np
-import matplotlib.pyplot as plt
-import SignalProcessingTools.time_signal as time_signal
 
-from validators import json_validator, yaml_validator, mdpa_validator
+from validators import json_validator, nodes_validator, signals_validator
+from discovery import scan_cases, print_errors
+from mdpa import submodel_part_nodes, node_coordinates
+from result_io import load_arrays
+from pipeline import prefetch
+from compare_cases import compare_records, plot_heatmap, write_comparison, HEATMAP_PLOT, PYRAMID_FOLDER
+from pyramid import write_pyramid
+from hugo_content import edit_content_results, edit_content_summary, case_record, case_key
+from search_index import write_search_index
+from assets import RAW_PLOT_FOLDER, optimise_plots
+from instrumentation import stage, profile_case
+import instrumentation
+from changed_cases import changed_paths, affected_cases
+import results_store
 
 
 COORD_REF = [25, 0.7, 45]
 TOL = 1e-6
 
 
-def main(folder_path: str):
+def main(folder_path: str, cases: list = None, store_file: str = results_store.STORE_FILE,
+         incremental: bool = False, prefetch_depth: int = 0):
     """
     Main function to process YAML and JSON files in the specified folder.
     It validates the YAML files, checks the corresponding JSON files,
@@ -20,123 +32,278 @@ def main(folder_path: str):
 
     Parameters:
         folder_path (str): Path to the folder containing YAML files.
+        cases (list): Only process these YAML files and keep the content of the other test cases
+            (optional: default None, all the test cases are processed).
+        store_file (str): Path of the SQLite results store, updated with every processed test case.
+        incremental (bool): Reuse the stored results of the test cases whose files did not change.
+        prefetch_depth (int): Number of test cases read and decoded in a background thread while the current
+            one is processed (optional: default 0, the test cases are processed one after the other).
     """
 
     if not os.path.exists(folder_path):
         return
 
-    yaml_files = os.listdir(folder_path)
-    yaml_files = [os.path.join(folder_path, file) for file in yaml_files if file.endswith('.yaml')]
+    with stage("all", "discovery"):
+        descriptors = scan_cases([folder_path] if cases is None else cases)
+
+    # only the compact records are kept: the full results of a test case are released once it is processed
+    records = {}
+    # the store is closed also if the processing of a test case fails
+    with contextlib.closing(results_store.open_store(store_file)) as store:
+        for _, result in process_cases(descriptors, store, incremental, prefetch_depth):
+            record = case_record(result)
+            records[record["key"]] = record
+
+        if cases is None:
+            results_store.remove_other_cases(store, list(records))
+
+    # pairwise comparison of the reference signals of all the test cases (only for a full run)
+    comparison = None
+    if cases is None:
+        with stage("all", "comparison"):
+            comparison = compare_records(records)
+            if comparison is not None:
+                labels = [f"{records[key]['title']} ({records[key]['organisation']})" for key in comparison["cases"]]
+                plot_heatmap(comparison, os.path.join(RAW_PLOT_FOLDER, HEATMAP_PLOT), labels)
+
+    # optimised and thumbnail variants of the plots for the website
+    with stage("all", "optimise_plots"):
+        variants = optimise_plots([value["plot_location"] for value in records.values()] +
+                                  ([HEATMAP_PLOT] if comparison is not None else []), prune=cases is None)
+    for value in records.values():
+        plot = variants[value["plot_location"]]
+        value["plot_location"] = f"plots/{plot.get('webp', plot['png'])}"
+        value["thumbnail_location"] = f"plots/{plot['thumbnail']}"
+    if comparison is not None:
+        plot = variants[HEATMAP_PLOT]
+        write_comparison(comparison, labels, f"plots/{plot.get('webp', plot['png'])}")
 
-    summary = {}
+    # edit the hugo content files
+    # a partial run keeps the content of the test cases that were not processed
+    with stage("all", "hugo_content"):
+        edit_content_results(records, prune=cases is None)
+        edit_content_summary(records, prune=cases is None)
+        write_search_index()
 
-    for yaml_file in yaml_files:
-        # validate YAML file
-        if not yaml_validator(yaml_file):
-            print(f"Validation failed for YAML file: {yaml_file}")
-            raise ValueError(f"Invalid YAML file: {yaml_file}")
 
-        with open(yaml_file, 'r') as f:
-            meta = yaml.safe_load(f)
+def process_cases(descriptors: list, store=None, incremental: bool = False, prefetch_depth: int = 0):
+    """
+    Processes the test cases one by one, and yields their results as soon as they are available.
 
-        # validate JSON files
-        if not json_validator(os.path.join("data", meta["json-file"]), meta["STEM-version"]):
-            print(f"Validation failed for JSON file: {meta['json-file']}")
-            raise ValueError(f"Invalid JSON file: {meta['json-file']}")
+    Every test case is read, analysed and released before the next one is processed (or, with prefetching,
+    at most prefetch_depth + 1 test cases are read ahead), so the memory is bounded by the largest test case
+    and not by the number of test cases.
 
-        with open(os.path.join("data", meta["json-file"]), "r") as f:
-            data = json.load(f)
+    Parameters:
+        descriptors (list): Descriptors of the test cases, from `discovery.scan_cases`.
+        store (sqlite3.Connection): Results store, updated with every test case (optional: default None).
+        incremental (bool): Reuse the stored results of the test cases whose files did not change.
+        prefetch_depth (int): Number of test cases read and decoded in a background thread while the current
+            one is processed (optional: default 0, the test cases are processed one after the other).
+
+    Yields:
+        tuple: Key of the test case in the summary and its summary dictionary.
+    """
+    if prefetch_depth <= 0:
+        for case in descriptors:
+            with profile_case(case["name"]):
+                key, result = process_case(case, store, incremental)
+            yield key, result
+        return
 
-        # validate mdpa file
-        if not mdpa_validator(os.path.join("data", meta["mdpa-file"])):
-            print(f"Validation failed for MDPA file: {meta['mdpa-file']}")
-            raise ValueError(f"Invalid MDPA file: {meta['mdpa-file']}")
+    # the store is only used in this thread: the reused test cases are resolved before the pipeline starts
+    pending = []
+    for case in descriptors:
+        result = stored_result(case, store) if store is not None and incremental else None
+        if result is None:
+            pending.append(case)
+        else:
+            yield ";".join([case["meta"]["title"], case["meta"]["organisation"]]), result
 
-        with open(os.path.join("data", meta["mdpa-file"]), "r") as f:
-            mdpa_content = f.read().splitlines()
+    for case, loaded in prefetch(pending, load_case, prefetch_depth):
+        with profile_case(case["name"]):
+            key, result = process_case(case, store, loaded=loaded)
+        # release the data of the test case before the next one is loaded
+        del loaded
+        yield key, result
 
-        # Plotting the data
-        summary[";".join([meta["title"], meta["organisation"]])] = process_plot_data(data, meta, mdpa_content)
 
-    # edit the hugo content files
-    edit_content_results(summary)
-    edit_content_summary(summary)
+def stored_result(case: dict, store) -> dict:
+    """
+    Stored results of a test case, if its files did not change and its plot and pyramid file are still there.
 
+    Parameters:
+        case (dict): Descriptor of the test case, from `discovery.scan_cases`.
+        store (sqlite3.Connection): Results store.
 
-def edit_content_results(summary: dict):
+    Returns:
+        dict: The stored summary of the test case, or None if it has to be processed.
+    """
+    if case["errors"]:
+        return None
+
+    meta = case["meta"]
+    files = [case["files"][kind] for kind in ["yaml", "json", "input", "mdpa"]]
+    with stage(case["name"], "store_lookup"):
+        if results_store.files_unchanged(store, case_key(meta), files, case["stats"]):
+            result = results_store.load_case(store, case_key(meta))
+            if (os.path.isfile(os.path.join(RAW_PLOT_FOLDER, result["plot_location"])) and
+                    result.get("pyramid_location") and
+                    os.path.isfile(os.path.join(PYRAMID_FOLDER, result["pyramid_location"]))):
+                return result
+    return None
+
+
+def load_case(case: dict) -> tuple:
     """
-    Edits the Hugo content results file to include the summary of processed data.
+    Reads, decodes and validates the files of a test case.
+
+    This is the I/O bound part of the processing, which the pipelined mode runs ahead of the analysis.
 
     Parameters:
-        summary (dict): A dictionary containing the summary of processed data.
+        case (dict): Descriptor of the test case, from `discovery.scan_cases`.
+
+    Returns:
+        tuple: The JSON results (with arrays) and the MDPA content as a list of strings.
+    """
+    name = case["name"]
+
+    # the YAML file and the existence of the files it references are checked by the discovery
+    if not print_errors(case):
+        raise ValueError(f"Invalid test case {case['yaml_file']}: {case['errors'][0]['message']}")
+
+    meta = case["meta"]
+
+    # decode the JSON file once: the validators check the decoded arrays
+    with stage(name, "json_decode"):
+        try:
+            data = load_arrays(case["files"]["json"])
+        except Exception:
+            # the JSON validator reports why the file cannot be read
+            data = None
+
+    # validate JSON files
+    with stage(name, "json_validation"):
+        valid = json_validator(case["files"]["json"], meta["STEM-version"], data)
+    if not valid:
+        print(f"Validation failed for JSON file: {meta['json-file']}")
+        raise ValueError(f"Invalid JSON file: {meta['json-file']}")
+
+    # reject diverged runs before the processing and plotting
+    with stage(name, "signal_check"):
+        valid = signals_validator(case["files"]["json"], data)
+    if not valid:
+        print(f"Unhealthy signals in JSON file: {meta['json-file']}")
+        raise ValueError(f"Unhealthy signals in JSON file: {meta['json-file']}")
+
+    with stage(name, "mdpa_read"), open(case["files"]["mdpa"], "r") as f:
+        mdpa_content = f.read().splitlines()
+
+    with stage(name, "node_check"):
+        valid = nodes_validator(data, mdpa_content)
+    if not valid:
+        print(f"Validation failed for MDPA file: {meta['mdpa-file']}")
+        raise ValueError(f"The nodes of {meta['json-file']} do not match the MDPA file {meta['mdpa-file']}")
+
+    return data, mdpa_content
+
+
+def process_case(case: dict, store=None, incremental: bool = False, loaded: tuple = None) -> tuple:
     """
+    Validates the files of a test case and processes its results.
 
-    # results.md
-    with open("STEM-cases/content/results.md", "r") as f:
-        content = f.read()
+    Parameters:
+        case (dict): Descriptor of the test case, from `discovery.scan_cases`.
+        store (sqlite3.Connection): Results store, updated with the test case (optional: default None).
+        incremental (bool): Reuse the stored results if the files of the test case did not change.
+        loaded (tuple): Files of the test case already read by `load_case` (optional: default None, they are
+            read here).
 
-    # Find the markers
-    start_marker = "<!-- START AUTOGENERATED -->"
-    start_index = content.find(start_marker)
+    Returns:
+        tuple: Key of the test case in the summary and its summary dictionary.
+    """
+    name = case["name"]
 
-    # Generate the new content
-    new_content = []
-    for key in sorted(summary.keys()):
-        new_content.append(f"## {summary[key]['meta']['title']}\n\n")
-        new_content.append(f"**Description:** {summary[key]['meta']['test-description']}\n")
-        new_content.append(f"**Organization:** {summary[key]['meta']['organisation']}\n\n")
-        new_content.append(f"**Date:** {summary[key]['meta']['date']}\n\n")
-        new_content.append(f"**STEM Version:** {summary[key]['meta']['STEM-version']}\n\n")
-        new_content.append(f"![{summary[key]['meta']['title']}](/TestCases/{summary[key]['plot_location']})\n\n")
+    # reuse the stored results when nothing changed and the plot is still there
+    if store is not None and incremental and loaded is None:
+        result = stored_result(case, store)
+        if result is not None:
+            return ";".join([case["meta"]["title"], case["meta"]["organisation"]]), result
 
-    # Replace the content between markers
-    before_marker = content[:start_index]
+    data, mdpa_content = loaded if loaded is not None else load_case(case)
+    meta = case["meta"]
+    key = ";".join([meta["title"], meta["organisation"]])
 
-    updated_content = before_marker + "\n" + "".join(new_content)
+    # Plotting the data
+    with stage(name, "process_plot_data"):
+        result = process_plot_data(data, meta, mdpa_content, case=name)
 
-    # Write back to file
-    with open("STEM-cases/content/results.md", "w") as f:
-        f.write(updated_content)
+    if store is not None:
+        with stage(name, "store_update"):
+            files = [case["files"][kind] for kind in ["yaml", "json", "input", "mdpa"]]
+            results_store.upsert_case(store, case_key(meta), case["yaml_file"], result, files, case["stats"])
 
+    return key, result
 
-def edit_content_summary(summary: dict):
+
+def find_reference_node(mdpa: list) -> str:
     """
-    Edits the Hugo content summary file to include the results of processed data.
+    Finds the node of the json output submodel part located at the reference coordinates.
 
     Parameters:
-        summary (dict): A dictionary containing the summary of processed data.
+        mdpa (list): The MDPA content as a list of strings.
+
+    Returns:
+        str: Name of the reference node in the JSON results (e.g. NODE_76).
     """
 
-    # summary.md
-    with open("STEM-cases/content/summary.md", "r") as f:
-        content = f.read()
-    # Find the markers
+    ids = submodel_part_nodes(mdpa)
+    distance = np.linalg.norm(node_coordinates(mdpa, ids) - np.array(COORD_REF), axis=1)
+    matches = ids[distance < TOL]
+    node = f"NODE_{matches[-1]}" if len(matches) else None
 
-    start_marker = "<!-- START AUTOGENERATED -->"
-    start_index = content.find(start_marker)
+    if node is None:
+        raise ValueError("The reference node was not found. Please use the reference mesh.")
 
-    # Generate the new content
-    new_content = ["| Test case | V_y,max | V_eff,max | FFT,max | Freq_FFT,max  |\n"]
-    new_content.append("|-----|-----|-----|-----|-----|\n")
-    for key in sorted(summary.keys()):
-        new_content.append(f"| {summary[key]['meta']['title']} | "
-                           f"{round(summary[key]['peak_velocity_y'], 3)} | "
-                           f"{round(summary[key]["peak_v_eff"], 3)} | "
-                           f"{round(summary[key]["peak_fft"], 3)} | "
-                           f"{round(summary[key]["freq_peak_fft"], 3)} |\n")
+    return node
 
-    # Replace the content between markers
-    before_marker = content[:start_index]
 
-    updated_content = before_marker + "\n" + "".join(new_content)
+def signal_metrics(time: list, velocity_y: list, case: str = "signal") -> tuple:
+    """
+    Computes the spectrum, the effective velocity and the summary metrics of the vertical velocity.
+
+    Parameters:
+        time (list): Time vector.
+        velocity_y (list): Vertical velocity.
+        case (str): Name of the test case in the instrumentation report.
 
-    # Write back to file
-    with open("STEM-cases/content/summary.md", "w") as f:
-        f.write(updated_content)
+    Returns:
+        tuple: The processed signal, the time vector of the effective velocity and the summary metrics
+               (peak_velocity_y, peak_v_eff, peak_fft, freq_peak_fft).
+    """
+    # imported here, so that validation-only entry points do not pay for it
+    import SignalProcessingTools.time_signal as time_signal
 
+    velocity_y = np.asarray(velocity_y)
+    with stage(case, "fft"):
+        signal = time_signal.TimeSignalProcessing(time, velocity_y)
+        signal.fft(half_representation=True)
+    if signal.signal.shape[0]  % 2 != 0:
+        signal.signal = signal.signal[:-1]  # ensure even length for FFT
+        time_veff = signal.time[:-1]
+    else:
+        time_veff = signal.time
+    with stage(case, "v_eff"):
+        signal.v_eff_SBR()
+
+    metrics = {"peak_velocity_y": np.max(np.abs(velocity_y*1000)),
+               "peak_v_eff": np.max(signal.v_eff),
+               "peak_fft": np.max(signal.amplitude)*1000,
+               "freq_peak_fft": signal.frequency[np.argmax(signal.amplitude)]}
+    return signal, time_veff, metrics
 
 
-def process_plot_data(data: dict, meta: dict, mdpa: dict) -> dict:
+def process_plot_data(data: dict, meta: dict, mdpa: dict, case: str = None) -> dict:
     """
     Processes and creates a plot from the data and metadata.
 
@@ -144,84 +311,113 @@ def process_plot_data(data: dict, meta: dict, mdpa: dict) -> dict:
         data (dict): The data dictionary containing the JSON results.
         meta (dict): The metadata dictionary.
         mdpa (dict): The MDPA content as a list of strings.
+        case (str): Name of the test case in the instrumentation report (optional: default based on the title).
 
     Returns:
         dict: A summary dictionary containing peak values, frequencies, and plot location.
     """
+    # imported here, so that validation-only entry points do not pay for them
+    import matplotlib.pyplot as plt
 
-    output_folder = "STEM-cases/static"
+    output_folder = PYRAMID_FOLDER
     name = "_".join(meta['title'].split())
     os.makedirs(output_folder, exist_ok=True)
+    os.makedirs(RAW_PLOT_FOLDER, exist_ok=True)
+    case = case or name
 
-    # define the node
-    node = None
-
-    # read the mdpa file and its nodes
-    idx_ini = mdpa.index("Begin SubModelPart json_output")
-    idx_end = mdpa[idx_ini:].index("  End SubModelPartNodes")
-
-    mdpa_nodes = mdpa[idx_ini+4:idx_ini + idx_end]
-
-    index_nodes = mdpa.index("Begin Nodes")
-    index_end_nodes = mdpa[index_nodes:].index("End Nodes")
-    aux = [j for i in mdpa_nodes for j, k in enumerate(mdpa[index_nodes:index_nodes + index_end_nodes]) if k.split()[0] == i.lstrip()]
-
-    mdpa_nodes = [mdpa[index_nodes + i].split() for i in aux]
-
-    for nod in mdpa_nodes:
-        if np.linalg.norm(np.array(nod[1:]).astype(float) - np.array(COORD_REF)) < TOL:
-            node = f"NODE_{nod[0]}"
-
-    if node is None:
-        raise ValueError("The reference node was not found. Please use the reference mesh.")
+    with stage(case, "mdpa_search"):
+        node = find_reference_node(mdpa)
 
     if node not in data.keys():
         raise ValueError(f"The node {node} was not found in the data. Please check the JSON file.")
 
     # process the time signal
-    signal = time_signal.TimeSignalProcessing(data["TIME"],
-                                              np.array(data[node]["VELOCITY_Y"]))
-    signal.fft(half_representation=True)
-    if signal.signal.shape[0]  % 2 != 0:
-        signal.signal = signal.signal[:-1]  # ensure even length for FFT
-        time_veff = signal.time[:-1]
-    else:
-        time_veff = signal.time
-    signal.v_eff_SBR()
-
-    fig, ax = plt.subplots(ncols=3, nrows=1, figsize=(15, 4))
-    ax[0].plot(data["TIME"], np.array(data[node]["VELOCITY_Y"])*1000, label=r"v$_{y}$", color="blue")
-    ax[1].plot(time_veff, signal.v_eff, label=r"v$_{eff}$", color="orange")
-    ax[2].plot(signal.frequency, signal.amplitude*1000, label=r"v$_{y}$", color="blue")
-    ax[0].set_xlabel("Time (s)")
-    ax[0].set_ylabel("Velocity Y (mm/s)")
-    ax[1].set_xlabel("Time (s)")
-    ax[1].set_ylabel("V_eff (mm/s)")
-    ax[2].set_xlabel("Frequency (Hz)")
-    ax[2].set_ylabel("FFT Magnitude (mm/s/s)")
-    ax[0].set_xlim(left=0)
-    ax[1].set_xlim(left=0)
-    ax[2].set_xlim(0, 100)
-    ax[1].set_ylim(bottom=0)
-    ax[2].set_ylim(bottom=0)
-    ax[0].grid()
-    ax[1].grid()
-    ax[2].grid()
-    ax[0].legend()
-    ax[1].legend()
-    ax[2].legend()
-    plt.savefig(os.path.join(output_folder, f"{name}.png"))
-    plt.close()
+    signal, time_veff, metrics = signal_metrics(data["TIME"], data[node]["VELOCITY_Y"], case)
+
+    with stage(case, "plot"):
+        fig, ax = plt.subplots(ncols=3, nrows=1, figsize=(15, 4))
+        ax[0].plot(data["TIME"], np.asarray(data[node]["VELOCITY_Y"])*1000, label=r"v$_{y}$", color="blue")
+        ax[1].plot(time_veff, signal.v_eff, label=r"v$_{eff}$", color="orange")
+        ax[2].plot(signal.frequency, signal.amplitude*1000, label=r"v$_{y}$", color="blue")
+        ax[0].set_xlabel("Time (s)")
+        ax[0].set_ylabel("Velocity Y (mm/s)")
+        ax[1].set_xlabel("Time (s)")
+        ax[1].set_ylabel("V_eff (mm/s)")
+        ax[2].set_xlabel("Frequency (Hz)")
+        ax[2].set_ylabel("FFT Magnitude (mm/s/s)")
+        ax[0].set_xlim(left=0)
+        ax[1].set_xlim(left=0)
+        ax[2].set_xlim(0, 100)
+        ax[1].set_ylim(bottom=0)
+        ax[2].set_ylim(bottom=0)
+        ax[0].grid()
+        ax[1].grid()
+        ax[2].grid()
+        ax[0].legend()
+        ax[1].legend()
+        ax[2].legend()
+    with stage(case, "savefig"):
+        plt.savefig(os.path.join(RAW_PLOT_FOLDER, f"{name}.png"))
+        plt.close()
+
+    # multi-resolution envelopes of the reference node for zoomable viewing
+    with stage(case, "pyramid"):
+        write_pyramid(os.path.join(output_folder, f"{name}.pyr"), np.asarray(data["TIME"]),
+                      {component: np.asarray(data[node][component])
+                       for component in ["VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]})
 
     # create the summary
-    summary = {"peak_velocity_y": np.max(np.abs(np.array(data[node]["VELOCITY_Y"])*1000)),
-               "peak_v_eff": np.max(signal.v_eff),
-               "peak_fft": np.max(signal.amplitude)*1000,
-               "freq_peak_fft": signal.frequency[np.argmax(signal.amplitude)],
+    summary = {**metrics,
                "plot_location": f"{name}.png",
+               "pyramid_location": f"{name}.pyr",
+               "node": node,
                "meta": meta}
     return summary
 
 
 if __name__ == "__main__":
-    main("./data")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Validate and process the STEM test cases.")
+    parser.add_argument("--instrument", nargs="?", const=instrumentation.DEFAULT_REPORT, default=None,
+                        metavar="REPORT",
+                        help="record the time and memory of every stage and write a JSON report "
+                             f"(default: {instrumentation.DEFAULT_REPORT}); also enabled by the "
+                             f"{instrumentation.ENV_VARIABLE} environment variable")
+    parser.add_argument("--profile", default=None, metavar="FOLDER",
+                        help="write a cProfile profile per test case to FOLDER; also enabled by the "
+                             f"{instrumentation.PROFILE_ENV_VARIABLE} environment variable")
+    parser.add_argument("--profile-threshold", type=float, default=None, metavar="SECONDS",
+                        help="only keep the profiles of the cases that take longer than SECONDS (default: the "
+                             f"{instrumentation.PROFILE_THRESHOLD_ENV_VARIABLE} environment variable, or 0)")
+    parser.add_argument("--changed", nargs="+", default=None, metavar="PATH",
+                        help="only process the test cases affected by these changed files")
+    parser.add_argument("--base-ref", default=None,
+                        help="only process the test cases affected by the files changed since this git reference")
+    parser.add_argument("--store", default=results_store.STORE_FILE,
+                        help=f"SQLite results store (default: {results_store.STORE_FILE})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse the stored results of the test cases whose files did not change")
+    parser.add_argument("--prefetch", type=int, default=0, metavar="N",
+                        help="read and decode the next N test cases while the current one is processed "
+                             "(default: 0, no prefetching)")
+    args = parser.parse_args()
+
+    cases = None
+    if args.changed is not None or args.base_ref is not None:
+        changed = args.changed if args.changed is not None else changed_paths(args.base_ref)
+        cases = affected_cases(changed, "data")
+        print(f"Processing {len(cases)} test cases affected by the changes.")
+
+    # the peak memory of tracemalloc is global to the process, so it is not traced when the prefetch thread runs
+    trace_memory = args.prefetch <= 0
+    report = instrumentation.enable_from_environment(trace_memory)
+    if args.instrument:
+        instrumentation.enable(trace_memory)
+        report = args.instrument
+
+    # the command line options take precedence over the environment variables
+    instrumentation.enable_profiling_from_environment(args.profile, args.profile_threshold)
+
+    main("./data", cases, args.store, args.incremental, args.prefetch)
+
+    if report:
+        instrumentation.write_report(report)
\ No newline at end of file
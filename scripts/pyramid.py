@@ -0,0 +1,245 @@
+import json
+import struct
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+MAGIC = b"STEMPYR1"
+DTYPE = np.dtype("<f4")
+ALIGNMENT = 8
+
+
+class PyramidBuilder:
+    """
+    Builds min/max envelopes at power-of-two decimation levels in a single streaming pass.
+
+    Level 0 holds the samples themselves and level k holds the envelope of bins of 2**k samples.
+    Chunks of any size can be pushed; each sample is visited once per level it contributes to.
+    """
+
+    def __init__(self):
+        self.levels_min = []
+        self.levels_max = []
+        self.counts = []
+        self.carry = []
+
+    def push(self, chunk: np.ndarray):
+        """
+        Adds a chunk of consecutive samples to the pyramid.
+
+        Parameters:
+            chunk (np.ndarray): One dimensional array with the next samples of the signal.
+        """
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        if chunk.size == 0:
+            return
+        self.__append(0, chunk, chunk)
+
+    def __append(self, level: int, mins: np.ndarray, maxs: np.ndarray):
+        """
+        Appends bins to a level and propagates complete pairs to the next level.
+
+        Parameters:
+            level (int): Level index.
+            mins (np.ndarray): Minimum of each new bin.
+            maxs (np.ndarray): Maximum of each new bin.
+        """
+        while True:
+            if level == len(self.counts):
+                self.levels_min.append([])
+                self.levels_max.append([])
+                self.counts.append(0)
+                self.carry.append(None)
+
+            self.levels_min[level].append(mins)
+            self.levels_max[level].append(maxs)
+            self.counts[level] += mins.size
+
+            # combine the pending bin of the previous call with the new bins
+            if self.carry[level] is not None:
+                mins = np.concatenate(([self.carry[level][0]], mins))
+                maxs = np.concatenate(([self.carry[level][1]], maxs))
+                self.carry[level] = None
+
+            if mins.size % 2 != 0:
+                self.carry[level] = (mins[-1], maxs[-1])
+                mins = mins[:-1]
+                maxs = maxs[:-1]
+
+            if mins.size == 0:
+                return
+
+            mins = np.minimum(mins[0::2], mins[1::2])
+            maxs = np.maximum(maxs[0::2], maxs[1::2])
+            level += 1
+
+    def finish(self) -> list:
+        """
+        Flushes the incomplete bins and returns the levels.
+
+        Returns:
+            list: List of (mins, maxs) tuples, one per level, from the finest to the coarsest.
+        """
+        level = 0
+        while level < len(self.counts):
+            # a partial bin at the end of the signal becomes a bin of its own on the next level,
+            # unless this level is already the single-bin top of the pyramid
+            if self.carry[level] is not None and self.counts[level] > 1:
+                pending = self.carry[level]
+                self.carry[level] = None
+                self.__append(level + 1, np.array([pending[0]]), np.array([pending[1]]))
+            level += 1
+
+        return [(np.concatenate(mins), np.concatenate(maxs)) for mins, maxs in zip(self.levels_min, self.levels_max)]
+
+
+def build_pyramid(chunks: Iterable[np.ndarray]) -> list:
+    """
+    Builds the min/max pyramid of a signal provided as a sequence of chunks.
+
+    Parameters:
+        chunks (Iterable[np.ndarray]): Consecutive chunks of the signal.
+
+    Returns:
+        list: List of (mins, maxs) tuples, one per level, from the finest to the coarsest.
+    """
+    builder = PyramidBuilder()
+    for chunk in chunks:
+        builder.push(chunk)
+    return builder.finish()
+
+
+def iter_chunks(signal: np.ndarray, chunk_size: int = 65536) -> Iterable[np.ndarray]:
+    """
+    Splits a signal into consecutive chunks without copying.
+
+    Parameters:
+        signal (np.ndarray): The signal.
+        chunk_size (int): Number of samples per chunk.
+
+    Returns:
+        Iterable[np.ndarray]: Views on consecutive parts of the signal.
+    """
+    for i in range(0, len(signal), chunk_size):
+        yield signal[i:i + chunk_size]
+
+
+def write_pyramid(path: str, time: np.ndarray, channels: dict, chunk_size: int = 65536):
+    """
+    Writes the pyramids of one or more signals sharing the same time axis into one binary file.
+
+    The file starts with the magic bytes, a little-endian uint32 with the header length and a JSON header
+    with the time axis and, per channel and level, the number of bins and the byte offset of the data.
+    The data of every level is stored as interleaved float32 (min, max) pairs, so that any range of bins
+    can be read with a single contiguous read (locally or with an HTTP range request).
+
+    Parameters:
+        path (str): Path of the output file.
+        time (np.ndarray): Time vector of the signals (assumed to have a constant time step).
+        channels (dict): Dictionary with the channel name as key and the signal as value.
+        chunk_size (int): Number of samples per chunk in the streaming pass.
+    """
+    time = np.asarray(time, dtype=float)
+    dt = float((time[-1] - time[0]) / (len(time) - 1)) if len(time) > 1 else 0.
+
+    header = {"version": 1,
+              "t0": float(time[0]),
+              "dt": dt,
+              "n_samples": int(len(time)),
+              "dtype": DTYPE.str,
+              "channels": {}}
+
+    blocks = []
+    offset = 0
+    for name, signal in channels.items():
+        levels = build_pyramid(iter_chunks(np.asarray(signal), chunk_size))
+        header["channels"][name] = []
+        for factor, (mins, maxs) in enumerate(levels):
+            data = np.empty(2 * mins.size, dtype=DTYPE)
+            data[0::2] = mins
+            data[1::2] = maxs
+            header["channels"][name].append({"factor": 2 ** factor, "count": int(mins.size), "offset": offset})
+            blocks.append(data)
+            offset += data.nbytes
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    # pad the header so that the data starts aligned
+    padding = -(len(MAGIC) + 4 + len(header_bytes)) % ALIGNMENT
+    header_bytes += b" " * padding
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for data in blocks:
+            f.write(data.tobytes())
+
+
+def read_header(path: str) -> dict:
+    """
+    Reads the header of a pyramid file.
+
+    Parameters:
+        path (str): Path of the pyramid file.
+
+    Returns:
+        dict: The header, with the start of the data section added as `data_start`.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a pyramid file.")
+        header_length = struct.unpack("<I", f.read(4))[0]
+        header = json.loads(f.read(header_length).decode("utf-8"))
+
+    header["data_start"] = len(MAGIC) + 4 + header_length
+    return header
+
+
+def read_window(path: str, channel: str, t_start: float, t_end: float, max_points: int = 2000,
+                header: Optional[dict] = None) -> tuple:
+    """
+    Reads a time window of a channel at the finest resolution with at most `max_points` bins.
+
+    Only the bins in the window are read, so the cost is proportional to the window and not to the signal.
+
+    Parameters:
+        path (str): Path of the pyramid file.
+        channel (str): Name of the channel.
+        t_start (float): Start time of the window.
+        t_end (float): End time of the window.
+        max_points (int): Maximum number of bins to return.
+        header (Optional[dict]): Header of the file, if already read.
+
+    Returns:
+        tuple: Start time of each bin, minimum of each bin and maximum of each bin.
+    """
+    if header is None:
+        header = read_header(path)
+    if channel not in header["channels"]:
+        raise ValueError(f"Channel {channel} not found in {path}.")
+
+    n_samples = header["n_samples"]
+    dt = header["dt"] if header["dt"] > 0 else 1.
+    # tolerance on the sample index to avoid round-off on window limits that fall on a sample
+    i_start = int(np.clip(np.floor((t_start - header["t0"]) / dt + 1e-9), 0, n_samples - 1))
+    i_end = int(np.clip(np.ceil((t_end - header["t0"]) / dt - 1e-9), i_start, n_samples - 1)) + 1
+
+    # finest level that fits in the requested number of points
+    levels = header["channels"][channel]
+    level = levels[-1]
+    for candidate in levels:
+        if (i_end - i_start) / candidate["factor"] <= max_points:
+            level = candidate
+            break
+
+    factor = level["factor"]
+    bin_start = i_start // factor
+    bin_end = min(-(-i_end // factor), level["count"])
+
+    itemsize = np.dtype(header["dtype"]).itemsize
+    data = np.fromfile(path, dtype=header["dtype"], count=2 * (bin_end - bin_start),
+                       offset=header["data_start"] + level["offset"] + 2 * bin_start * itemsize)
+
+    time = header["t0"] + np.arange(bin_start, bin_end) * factor * header["dt"]
+    return time, data[0::2], data[1::2]
@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import argparse
+
+import yaml
+import numpy as np
+
+
+MAGIC = b"STEMCDC1"
+EXTENSION = ".stemz"
+COMPONENTS = ["VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]
+METRICS = ["peak_velocity_y", "peak_v_eff", "peak_fft", "freq_peak_fft"]
+COMPRESSION_LEVEL = 9
+
+
+def _shuffle(values: np.ndarray) -> bytes:
+    """
+    Groups the bytes of the values by significance, which compresses much better than interleaved bytes.
+    """
+    return np.ascontiguousarray(values.view(np.uint8).reshape(-1, values.itemsize).T).tobytes()
+
+
+def _unshuffle(blob: bytes, dtype: str, length: int) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.uint8).reshape(np.dtype(dtype).itemsize, length).T.copy().view(dtype)[:, 0]
+
+
+def _smallest_int(values: np.ndarray) -> str:
+    """
+    Smallest little-endian integer type that holds the values.
+    """
+    for dtype in ["<i1", "<i2", "<i4"]:
+        info = np.iinfo(dtype)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return dtype
+    return "<i8"
+
+
+def encode_array(values: np.ndarray, error_bound: float = None) -> tuple:
+    """
+    Encodes an array of floats.
+
+    * error_bound None: the values are rounded to float32.
+    * error_bound > 0: the values are quantised to integer multiples of 2 * error_bound, so that the absolute
+      error is at most error_bound.
+    * error_bound 0: the values are kept exactly (float64).
+
+    The (bit patterns of the) values are then delta coded, byte shuffled and entropy coded with zlib.
+
+    Parameters:
+        values (np.ndarray): Values to encode.
+        error_bound (float): Maximum absolute error (optional: float32 rounding).
+
+    Returns:
+        tuple: The encoded bytes and the specification needed to decode them.
+    """
+    values = np.asarray(values, dtype=float)
+    if error_bound is None:
+        integers = values.astype("<f4").view("<u4")
+        spec = {"mode": "float32", "dtype": "<u4"}
+    elif error_bound == 0:
+        integers = values.astype("<f8").view("<u8")
+        spec = {"mode": "float64", "dtype": "<u8"}
+    else:
+        step = 2 * error_bound
+        integers = np.rint(values / step).astype(np.int64)
+        spec = {"mode": "quantised", "step": step}
+
+    # unsigned differences wrap around, so the bit patterns of floats are restored exactly
+    deltas = np.diff(integers, prepend=integers.dtype.type(0))
+    if spec["mode"] == "quantised":
+        spec["dtype"] = _smallest_int(deltas)
+        deltas = deltas.astype(spec["dtype"])
+
+    spec["length"] = len(values)
+    return zlib.compress(_shuffle(deltas), COMPRESSION_LEVEL), spec
+
+
+def decode_array(blob: bytes, spec: dict) -> np.ndarray:
+    """
+    Decodes an array encoded with `encode_array`.
+
+    Parameters:
+        blob (bytes): Encoded bytes.
+        spec (dict): Specification returned by `encode_array`.
+
+    Returns:
+        np.ndarray: The decoded values (float64).
+    """
+    deltas = _unshuffle(zlib.decompress(blob), spec["dtype"], spec["length"])
+    if spec["mode"] == "quantised":
+        return np.cumsum(deltas, dtype=np.int64) * spec["step"]
+
+    integers = np.cumsum(deltas, dtype=deltas.dtype)
+    return integers.view("<f4" if spec["mode"] == "float32" else "<f8").astype(float)
+
+
+def write_compact(path: str, data: dict, error_bound: float = None):
+    """
+    Writes STEM results in the compact format.
+
+    The time vector and the coordinates are kept exactly; the velocities are encoded with `encode_array`.
+
+    The file starts with `STEMCDC1`, the length of the JSON header (uint32) and the header, which holds the
+    coordinates and the specification and position of every encoded array, followed by the encoded arrays.
+
+    Parameters:
+        path (str): Path of the compact file.
+        data (dict): STEM results, as read from the JSON file.
+        error_bound (float): Maximum absolute error of the velocities (optional: float32 rounding).
+    """
+    blobs = []
+    offset = 0
+
+    def add(values, bound):
+        nonlocal offset
+        blob, spec = encode_array(values, bound)
+        spec.update({"offset": offset, "size": len(blob)})
+        blobs.append(blob)
+        offset += len(blob)
+        return spec
+
+    header = {"error_bound": error_bound, "TIME": add(data["TIME"], 0)}
+    for key, node in data.items():
+        if not key.startswith("NODE_"):
+            continue
+        header[key] = {component: add(node[component], error_bound) for component in COMPONENTS}
+        if "COORDINATES" in node:
+            header[key]["COORDINATES"] = np.asarray(node["COORDINATES"], dtype=float).tolist()
+
+    header = json.dumps(header).encode()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+
+
+def _read_header(f) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a compact STEM result file.")
+    return json.loads(f.read(struct.unpack("<I", f.read(4))[0]))
+
+
+def read_header(path: str) -> dict:
+    """
+    Reads the header of a compact file: the coordinates and the specification of the encoded arrays.
+
+    Parameters:
+        path (str): Path of the compact file.
+
+    Returns:
+        dict: The header.
+    """
+    with open(path, "rb") as f:
+        return _read_header(f)
+
+
+def read_compact(path: str, arrays: bool = False) -> dict:
+    """
+    Reads STEM results written with `write_compact`.
+
+    Parameters:
+        path (str): Path of the compact file.
+        arrays (bool): Return the values as arrays instead of lists.
+
+    Returns:
+        dict: STEM results, in the same structure as the JSON file.
+    """
+    with open(path, "rb") as f:
+        header = _read_header(f)
+        start = f.tell()
+
+        def read(spec):
+            f.seek(start + spec["offset"])
+            values = decode_array(f.read(spec["size"]), spec)
+            return values if arrays else values.tolist()
+
+        data = {"TIME": read(header["TIME"])}
+        for key, node in header.items():
+            if not key.startswith("NODE_"):
+                continue
+            data[key] = {}
+            if "COORDINATES" in node:
+                data[key]["COORDINATES"] = np.array(node["COORDINATES"]) if arrays else node["COORDINATES"]
+            for component in COMPONENTS:
+                data[key][component] = read(node[component])
+    return data
+
+
+def iter_compact(path: str):
+    """
+    Reads STEM results written with `write_compact` one entry at a time: the time vector, then the nodes.
+
+    Only the arrays of the current node are decoded, so the memory does not grow with the number of nodes.
+
+    Parameters:
+        path (str): Path of the compact file.
+
+    Yields:
+        tuple: Name of the entry (TIME or NODE_<id>) and its value, with arrays.
+    """
+    with open(path, "rb") as f:
+        header = _read_header(f)
+        start = f.tell()
+
+        def read(spec):
+            f.seek(start + spec["offset"])
+            return decode_array(f.read(spec["size"]), spec)
+
+        yield "TIME", read(header["TIME"])
+        for key, node in header.items():
+            if not key.startswith("NODE_"):
+                continue
+            value = {}
+            if "COORDINATES" in node:
+                value["COORDINATES"] = np.array(node["COORDINATES"])
+            for component in COMPONENTS:
+                value[component] = read(node[component])
+            yield key, value
+
+
+def compare_metrics(original: dict, decoded: dict, node: str) -> dict:
+    """
+    Compares the summary metrics of the reference node before and after the encoding.
+
+    Parameters:
+        original (dict): Original STEM results.
+        decoded (dict): STEM results after the round trip.
+        node (str): Name of the reference node.
+
+    Returns:
+        dict: Per metric the original value, the decoded value and the relative change.
+    """
+    from process_data import signal_metrics
+
+    before = signal_metrics(original["TIME"], original[node]["VELOCITY_Y"])[2]
+    after = signal_metrics(decoded["TIME"], decoded[node]["VELOCITY_Y"])[2]
+    return {metric: {"original": float(before[metric]),
+                     "decoded": float(after[metric]),
+                     "relative_change": float(abs(after[metric] - before[metric]) / max(abs(before[metric]), 1e-300))}
+            for metric in METRICS}
+
+
+if __name__ == "__main__":
+    from result_io import load_arrays
+    from mdpa import read_mdpa
+    from process_data import find_reference_node
+
+    parser = argparse.ArgumentParser(description="Write the results of a test case in the compact format and "
+                                                 "check that the summary metrics do not change.")
+    parser.add_argument("yaml_file", help="YAML file of the test case")
+    parser.add_argument("--error-bound", type=float, default=None,
+                        help="maximum absolute error of the velocities [m/s] (default: float32 rounding)")
+    parser.add_argument("--tolerance", type=float, default=1e-3,
+                        help="maximum relative change of the summary metrics (default: 1e-3)")
+    parser.add_argument("--output", default=None, help=f"compact file (default: JSON file with {EXTENSION})")
+    args = parser.parse_args()
+
+    folder = os.path.dirname(args.yaml_file)
+    with open(args.yaml_file, "r") as f:
+        meta = yaml.safe_load(f)
+    json_file = os.path.join(folder, meta["json-file"])
+    output = args.output or os.path.splitext(json_file)[0] + EXTENSION
+
+    data = load_arrays(json_file)
+    write_compact(output, data, args.error_bound)
+    changes = compare_metrics(data, read_compact(output),
+                              find_reference_node(read_mdpa(os.path.join(folder, meta["mdpa-file"]))))
+
+    print(f"{output}: {os.path.getsize(output) / os.path.getsize(json_file):.1%} of the size of {json_file}")
+    for metric, change in changes.items():
+        print(f"{metric:<16} {change['original']:>14.6g} {change['decoded']:>14.6g} "
+              f"{change['relative_change']:>10.2e}")
+    if any(change["relative_change"] > args.tolerance for change in changes.values()):
+        print(f"The summary metrics change by more than {args.tolerance}.")
+        sys.exit(1)
@@ -0,0 +1,483 @@
+import io
+import re
+import gzip
+import json
+import lzma
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd compressed results
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # optional, faster parsing of the arrays of numbers
+    orjson = None
+
+from result_codec import MAGIC as COMPACT_MAGIC, read_compact, iter_compact
+
+
+CHUNK_SIZE = 1 << 20
+# magic bytes of the supported compression formats
+MAGIC = {b"\x1f\x8b": "gzip",
+         b"\xfd7zXZ\x00": "xz",
+         b"\x28\xb5\x2f\xfd": "zstd"}
+
+_WHITESPACE = re.compile(r"\s*")
+_SCALAR = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?|true|false|null|NaN|-?Infinity")
+_DELIMITER = re.compile(r"[\s,\]}]")
+_SCALARS = {"true": True, "false": False, "null": None}
+# first characters of an array of numbers
+_NUMBER_START = set("-0123456789NI]")
+# start of a value that is not a number: an array of numbers with one of them is parsed value by value
+_NOT_NUMBER = re.compile(r'[\[{"]')
+# empty element between two commas
+_EMPTY_ELEMENT = re.compile(r",\s*,")
+
+
+def compression(path: str) -> str:
+    """
+    Detects the compression of a result file from its first bytes.
+
+    Parameters:
+        path (str): Path to the result file.
+
+    Returns:
+        str: "gzip", "xz", "zstd" or "compact" (see `result_codec`), or None if the file is not compressed.
+    """
+    with open(path, "rb") as f:
+        head = f.read(len(COMPACT_MAGIC))
+    if head == COMPACT_MAGIC:
+        return "compact"
+    for magic, name in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_result(path: str) -> io.TextIOBase:
+    """
+    Opens a result file as text, decompressing it on the fly if it is compressed with gzip, xz or zstd.
+
+    Parameters:
+        path (str): Path to the result file.
+
+    Returns:
+        io.TextIOBase: Text stream with the JSON content.
+    """
+    kind = compression(path)
+    if kind == "gzip":
+        return gzip.open(path, "rt")
+    if kind == "xz":
+        return lzma.open(path, "rt")
+    if kind == "zstd":
+        if zstandard is None:
+            raise ImportError(f"{path} is compressed with zstd: install the zstandard package to read it.")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    if kind == "compact":
+        raise ValueError(f"{path} is a compact result file, which is not JSON: read it with load_result.")
+    return open(path, "r")
+
+
+class _StreamParser:
+    """
+    Incremental JSON parser that reads the text stream in chunks, so that the full (decompressed) text
+    is never in memory. Arrays of numbers, which are the bulk of the STEM results, are parsed in chunks.
+    """
+
+    def __init__(self, stream: io.TextIOBase, chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        # keys of the objects that contain the current value
+        self.path = []
+
+    def fill(self) -> bool:
+        """
+        Drops the parsed text from the buffer and reads the next chunk.
+
+        Returns:
+            bool: False at the end of the stream.
+        """
+        chunk = self.stream.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def error(self, message: str):
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """
+        Skips the whitespace and returns the next character (empty at the end of the stream).
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, character: str):
+        if self.peek() != character:
+            self.error(f"Expecting '{character}'")
+        self.pos += 1
+
+    def value(self):
+        character = self.peek()
+        if character == "{":
+            return self.object()
+        if character == "[":
+            return self.array()
+        if character == '"':
+            return self.string()
+        return self.scalar()
+
+    def object(self) -> dict:
+        self.expect("{")
+        result = {}
+        if self.peek() == "}":
+            self.pos += 1
+            return result
+        while True:
+            if self.peek() != '"':
+                self.error("Expecting property name enclosed in double quotes")
+            key = self.string()
+            self.expect(":")
+            self.path.append(key)
+            result[key] = self.value()
+            self.path.pop()
+            if self.peek() == "}":
+                self.pos += 1
+                return result
+            self.expect(",")
+
+    def array(self) -> list:
+        self.expect("[")
+        if self.peek() in _NUMBER_START:
+            return self.numbers()
+        return self.values([])
+
+    def values(self, result: list) -> list:
+        """
+        Parses the rest of an array value by value, up to the closing bracket.
+        """
+        while True:
+            result.append(self.value())
+            if self.peek() == "]":
+                self.pos += 1
+                return result
+            self.expect(",")
+
+    def numbers(self):
+        """
+        Parses an array of numbers, chunk by chunk, up to the closing bracket.
+
+        If the array turns out to hold other values than numbers (arrays, objects or strings), the numbers
+        before the first of them are kept and the rest of the array is parsed value by value.
+        """
+        result = self.start_numbers()
+        # True once numbers followed by a comma are parsed: the array cannot end without another number
+        continued = False
+        while True:
+            end = self.buffer.find("]", self.pos)
+            other = _NOT_NUMBER.search(self.buffer, self.pos, end if end >= 0 else len(self.buffer))
+            if other:
+                last = self.buffer.rfind(",", self.pos, other.start())
+                if last >= 0:
+                    self.add_numbers(result, self.buffer[self.pos:last])
+                    self.pos = last + 1
+                return self.values(self.mixed_numbers(result))
+            if end >= 0:
+                if self.buffer[self.pos:end].strip():
+                    self.add_numbers(result, self.buffer[self.pos:end])
+                elif continued:
+                    self.error("Invalid array of numbers")
+                self.pos = end + 1
+                return self.finish_numbers(result)
+            # parse the complete numbers, and keep the last one, that may continue in the next chunk
+            last = self.buffer.rfind(",", self.pos)
+            if last >= 0:
+                self.add_numbers(result, self.buffer[self.pos:last])
+                self.pos = last + 1
+                continued = True
+            if not self.fill():
+                self.error("Unterminated array")
+
+    def start_numbers(self) -> list:
+        return []
+
+    def add_numbers(self, result: list, text: str):
+        try:
+            result.extend(json.loads(f"[{text}]"))
+        except json.JSONDecodeError:
+            self.error("Invalid array of numbers")
+
+    def finish_numbers(self, result: list) -> list:
+        return result
+
+    def mixed_numbers(self, result: list) -> list:
+        return result
+
+    def string(self) -> str:
+        while True:
+            try:
+                text, end = json.decoder.scanstring(self.buffer, self.pos + 1)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            self.pos = end
+            return text
+
+    def scalar(self):
+        # the scalar may continue in the next chunk, up to a delimiter
+        while _DELIMITER.search(self.buffer, self.pos) is None and self.fill():
+            pass
+        match = _SCALAR.match(self.buffer, self.pos)
+        if match is None:
+            self.error("Expecting value")
+        self.pos = match.end()
+        text = match.group()
+        if text in _SCALARS:
+            return _SCALARS[text]
+        return json.loads(text)
+
+
+def _numbers_numpy(text: str) -> np.ndarray:
+    """
+    Parses comma-separated numbers directly into an array, without Python float objects.
+    """
+    # numpy skips or misreads empty elements (e.g. a trailing comma)
+    stripped = text.strip()
+    if not stripped or stripped[0] == "," or stripped[-1] == "," or _EMPTY_ELEMENT.search(stripped):
+        raise ValueError("Empty element in an array of numbers")
+    return np.fromstring(text, sep=",")
+
+
+def _numbers_orjson(text: str) -> np.ndarray:
+    """
+    Parses comma-separated numbers with orjson. Only a chunk of numbers is a list at a time.
+    """
+    if not text.strip():
+        raise ValueError("Empty element in an array of numbers")
+    try:
+        values = orjson.loads(f"[{text}]")
+    except orjson.JSONDecodeError:
+        # orjson does not accept NaN and Infinity
+        return _numbers_numpy(text)
+    # null and booleans are not numbers (NumPy would turn them into NaN, 0 and 1), as with the numpy backend
+    if not set(map(type, values)) <= {int, float}:
+        raise ValueError("Value that is not a number in an array of numbers")
+    return np.array(values, dtype=float)
+
+
+# parsers of the arrays of numbers: the first available one is the default
+BACKENDS = {"numpy": _numbers_numpy}
+if orjson is not None:
+    BACKENDS = {"orjson": _numbers_orjson, **BACKENDS}
+DEFAULT_BACKEND = next(iter(BACKENDS))
+
+
+class _NumberBuffer:
+    """
+    Preallocated array that is filled chunk by chunk, and grows if needed.
+    """
+
+    def __init__(self, capacity: int):
+        self.values = np.empty(capacity)
+        self.length = 0
+
+    def extend(self, values: np.ndarray):
+        end = self.length + len(values)
+        if end > len(self.values):
+            grown = np.empty(max(end, 2 * len(self.values)))
+            grown[:self.length] = self.values[:self.length]
+            self.values = grown
+        self.values[self.length:end] = values
+        self.length = end
+
+    def array(self) -> np.ndarray:
+        if self.length == len(self.values):
+            return self.values
+        return self.values[:self.length].copy()
+
+
+class _ArrayParser(_StreamParser):
+    """
+    Streaming parser that parses the arrays of numbers directly into float64 arrays.
+
+    The arrays are preallocated with the length of the first array (the time vector), which is the length
+    of all the velocity arrays.
+    """
+
+    def __init__(self, stream: io.TextIOBase, chunk_size: int = CHUNK_SIZE, backend: str = DEFAULT_BACKEND):
+        super().__init__(stream, chunk_size)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}: available backends are {list(BACKENDS)}")
+        self.parse = BACKENDS[backend]
+        self.expected = None
+
+    def start_numbers(self) -> _NumberBuffer:
+        return _NumberBuffer(self.expected or 1024)
+
+    def add_numbers(self, result: _NumberBuffer, text: str):
+        try:
+            result.extend(self.parse(text))
+        except ValueError:
+            self.error("Invalid array of numbers")
+
+    def finish_numbers(self, result: _NumberBuffer) -> np.ndarray:
+        if self.expected is None:
+            self.expected = result.length
+        return result.array()
+
+    def mixed_numbers(self, result: _NumberBuffer) -> list:
+        return result.values[:result.length].tolist()
+
+
+class _SinkParser(_ArrayParser):
+    """
+    Streaming parser that passes the arrays of numbers of selected entries, chunk by chunk, to their sinks
+    instead of keeping them. The other arrays of numbers are skipped.
+    """
+
+    def __init__(self, stream: io.TextIOBase, sinks: dict, chunk_size: int = CHUNK_SIZE,
+                 backend: str = DEFAULT_BACKEND):
+        super().__init__(stream, chunk_size, backend)
+        self.sinks = sinks
+
+    def start_numbers(self):
+        return self.sinks.get(tuple(self.path))
+
+    def add_numbers(self, sink, text: str):
+        if sink is None:
+            return
+        try:
+            values = self.parse(text)
+        except ValueError:
+            self.error("Invalid array of numbers")
+        sink.update(values)
+
+    def finish_numbers(self, sink):
+        return None
+
+    def mixed_numbers(self, sink) -> list:
+        return []
+
+
+def load_result(path: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Reads a (compressed) JSON result file, streaming the decompressed text into the parser.
+    Compact result files (see `result_codec`) are decoded directly.
+
+    Parameters:
+        path (str): Path to the result file: plain, compressed with gzip, xz or zstd, or compact.
+        chunk_size (int): Number of characters read at a time.
+
+    Returns:
+        The parsed JSON content, as with `json.load`.
+    """
+    if compression(path) == "compact":
+        return read_compact(path)
+
+    with open_result(path) as f:
+        parser = _StreamParser(f, chunk_size)
+        result = parser.value()
+        if parser.peek():
+            parser.error("Extra data")
+    return result
+
+
+def load_arrays(path: str, backend: str = DEFAULT_BACKEND, chunk_size: int = CHUNK_SIZE):
+    """
+    Reads a result file as `load_result`, with the arrays of numbers as float64 arrays.
+
+    The numbers are parsed chunk by chunk into preallocated arrays, so the file is never held as lists of
+    Python floats.
+
+    Parameters:
+        path (str): Path to the result file: plain, compressed with gzip, xz or zstd, or compact.
+        backend (str): Parser of the numbers: "orjson" (fastest, if installed) or "numpy".
+        chunk_size (int): Number of characters read at a time.
+
+    Returns:
+        The parsed JSON content, with arrays instead of lists of numbers.
+    """
+    if compression(path) == "compact":
+        return read_compact(path, arrays=True)
+
+    with open_result(path) as f:
+        parser = _ArrayParser(f, chunk_size, backend)
+        result = parser.value()
+        if parser.peek():
+            parser.error("Extra data")
+    return result
+
+
+def stream_arrays(path: str, sinks: dict, backend: str = DEFAULT_BACKEND, chunk_size: int = CHUNK_SIZE):
+    """
+    Reads a result file in one pass, and passes the arrays of numbers of the selected entries to their sinks
+    in chunks, in the order of the file. Neither the text nor the arrays are kept in memory.
+
+    Parameters:
+        path (str): Path to the result file: plain, compressed with gzip, xz or zstd, or compact (whose arrays
+            are decoded one at a time and passed in chunks).
+        sinks (dict): Per path of keys (e.g. ("TIME",) or ("NODE_76", "VELOCITY_Y")) an object with an
+            `update(values)` method, called with every chunk of values.
+        backend (str): Parser of the numbers: "orjson" (fastest, if installed) or "numpy".
+        chunk_size (int): Number of characters (or numbers, for compact files) read at a time.
+    """
+    if compression(path) == "compact":
+        for key, value in iter_compact(path):
+            entries = [((key,), value)] if key == "TIME" else [((key, name), values) for name, values in value.items()]
+            for entry, values in entries:
+                if entry in sinks:
+                    for start in range(0, len(values), chunk_size):
+                        sinks[entry].update(values[start:start + chunk_size])
+        return
+
+    with open_result(path) as f:
+        parser = _SinkParser(f, sinks, chunk_size, backend)
+        parser.value()
+        if parser.peek():
+            parser.error("Extra data")
+
+
+def iter_result(path: str, backend: str = DEFAULT_BACKEND, chunk_size: int = CHUNK_SIZE):
+    """
+    Reads a result file one top-level entry at a time (the time vector, then the nodes), with the arrays of
+    numbers as float64 arrays.
+
+    Only one entry is in memory at a time, so results with many nodes can be processed block by block.
+
+    Parameters:
+        path (str): Path to the result file: plain, compressed with gzip, xz or zstd, or compact.
+        backend (str): Parser of the numbers: "orjson" (fastest, if installed) or "numpy".
+        chunk_size (int): Number of characters read at a time.
+
+    Yields:
+        tuple: Name of the entry (e.g. TIME or NODE_<id>) and its value.
+    """
+    if compression(path) == "compact":
+        yield from iter_compact(path)
+        return
+
+    with open_result(path) as f:
+        parser = _ArrayParser(f, chunk_size, backend)
+        parser.expect("{")
+        if parser.peek() == "}":
+            return
+        while True:
+            if parser.peek() != '"':
+                parser.error("Expecting property name enclosed in double quotes")
+            key = parser.string()
+            parser.expect(":")
+            yield key, parser.value()
+            if parser.peek() == "}":
+                parser.pos += 1
+                break
+            parser.expect(",")
+        if parser.peek():
+            parser.error("Extra data")
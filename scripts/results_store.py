@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+
+from hashing import file_hash
+
+
+STORE_FILE = "build/results.sqlite"
+METRICS = ["peak_velocity_y", "peak_v_eff", "peak_fft", "freq_peak_fft"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_key TEXT PRIMARY KEY,
+    organisation TEXT NOT NULL,
+    title TEXT NOT NULL,
+    stem_version TEXT NOT NULL,
+    date TEXT NOT NULL,
+    yaml_file TEXT NOT NULL,
+    plot_location TEXT,
+    pyramid_location TEXT,
+    meta TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cases_organisation ON cases (organisation);
+CREATE INDEX IF NOT EXISTS cases_stem_version ON cases (stem_version);
+CREATE INDEX IF NOT EXISTS cases_date ON cases (date);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    case_key TEXT NOT NULL REFERENCES cases (case_key) ON DELETE CASCADE,
+    probe TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (case_key, probe, metric)
+);
+CREATE INDEX IF NOT EXISTS metrics_metric_value ON metrics (metric, value);
+
+CREATE TABLE IF NOT EXISTS file_hashes (
+    case_key TEXT NOT NULL REFERENCES cases (case_key) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (case_key, path)
+);
+CREATE INDEX IF NOT EXISTS file_hashes_path ON file_hashes (path);
+"""
+
+
+def open_store(path: str = STORE_FILE) -> sqlite3.Connection:
+    """
+    Opens the results store, creating the tables if needed.
+
+    Parameters:
+        path (str): Path of the SQLite database.
+
+    Returns:
+        sqlite3.Connection: Connection to the database.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _stat(path: str, stats: dict = None) -> tuple:
+    """
+    Size and modification time of a file, from the stats of the case discovery if available.
+    """
+    if stats and path in stats:
+        return stats[path]
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def files_unchanged(connection: sqlite3.Connection, case_key: str, files: list, stats: dict = None) -> bool:
+    """
+    Checks if the files of a test case are the same as when it was stored.
+
+    Files with the same size and modification time are assumed unchanged; otherwise their hash is compared.
+
+    Parameters:
+        connection (sqlite3.Connection): Connection to the results store.
+        case_key (str): Key of the test case.
+        files (list): Paths of the files of the test case.
+        stats (dict): (size, mtime_ns) of the files, as in the case descriptors of `discovery` (optional).
+
+    Returns:
+        bool: True if the test case is stored and none of its files changed.
+    """
+    stored = {path: (sha256, size, mtime_ns) for path, sha256, size, mtime_ns in connection.execute(
+        "SELECT path, sha256, size, mtime_ns FROM file_hashes WHERE case_key = ?", (case_key,))}
+    if set(stored) != {os.path.normpath(path) for path in files}:
+        return False
+
+    for path in files:
+        sha256, size, mtime_ns = stored[os.path.normpath(path)]
+        current_size, current_mtime_ns = _stat(path, stats)
+        if current_size != size:
+            return False
+        if current_mtime_ns != mtime_ns and file_hash(path) != sha256:
+            return False
+    return True
+
+
+def upsert_case(connection: sqlite3.Connection, case_key: str, yaml_file: str, result: dict, files: list,
+                stats: dict = None):
+    """
+    Inserts or replaces a test case, its metrics and the hashes of its files.
+
+    Parameters:
+        connection (sqlite3.Connection): Connection to the results store.
+        case_key (str): Key of the test case.
+        yaml_file (str): Path of the YAML file of the test case.
+        result (dict): Summary of the test case, as returned by `process_plot_data`.
+        files (list): Paths of the files of the test case.
+        stats (dict): (size, mtime_ns) of the files, as in the case descriptors of `discovery` (optional).
+    """
+    meta = result["meta"]
+    with connection:
+        connection.execute("DELETE FROM cases WHERE case_key = ?", (case_key,))
+        connection.execute("INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (case_key, meta["organisation"], meta["title"], str(meta["STEM-version"]),
+                            str(meta["date"]), os.path.normpath(yaml_file), result.get("plot_location"),
+                            result.get("pyramid_location"), json.dumps(meta, default=str),
+                            time.strftime("%Y-%m-%dT%H:%M:%S")))
+        connection.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?)",
+                               [(case_key, result.get("node", "reference"), metric, float(result[metric]))
+                                for metric in METRICS])
+        rows = []
+        for path in files:
+            rows.append((case_key, os.path.normpath(path), file_hash(path), *_stat(path, stats)))
+        connection.executemany("INSERT INTO file_hashes VALUES (?, ?, ?, ?, ?)", rows)
+
+
+def load_case(connection: sqlite3.Connection, case_key: str) -> dict:
+    """
+    Loads the summary of a stored test case.
+
+    Parameters:
+        connection (sqlite3.Connection): Connection to the results store.
+        case_key (str): Key of the test case.
+
+    Returns:
+        dict: Summary of the test case in the format of `process_plot_data`, or None if it is not stored.
+    """
+    row = connection.execute("SELECT plot_location, pyramid_location, meta FROM cases WHERE case_key = ?",
+                             (case_key,)).fetchone()
+    if row is None:
+        return None
+
+    result = {"plot_location": row[0], "pyramid_location": row[1], "meta": json.loads(row[2])}
+    for probe, metric, value in connection.execute("SELECT probe, metric, value FROM metrics WHERE case_key = ?",
+                                                   (case_key,)):
+        result["node"] = probe
+        result[metric] = value
+    return result
+
+
+def remove_other_cases(connection: sqlite3.Connection, case_keys: list):
+    """
+    Removes the test cases that are not in the list, after a full run.
+
+    Parameters:
+        connection (sqlite3.Connection): Connection to the results store.
+        case_keys (list): Keys of the test cases to keep.
+    """
+    with connection:
+        connection.execute("CREATE TEMP TABLE IF NOT EXISTS keep (case_key TEXT PRIMARY KEY)")
+        connection.execute("DELETE FROM keep")
+        connection.executemany("INSERT INTO keep VALUES (?)", [(key,) for key in case_keys])
+        connection.execute("DELETE FROM cases WHERE case_key NOT IN (SELECT case_key FROM keep)")
+
+
+if __name__ == "__main__":
+    # ad-hoc query, e.g.
+    # python scripts/results_store.py "SELECT title, value FROM cases JOIN metrics USING (case_key)
+    #                                  WHERE metric = 'peak_v_eff' ORDER BY value DESC LIMIT 10"
+    store = sys.argv[2] if len(sys.argv) > 2 else STORE_FILE
+    if len(sys.argv) < 2 or not os.path.isfile(store):
+        print(f"Usage: python {sys.argv[0]} QUERY [DATABASE (default: {STORE_FILE})]")
+        sys.exit(1)
+    cursor = open_store(store).execute(sys.argv[1])
+    print("\t".join(column[0] for column in cursor.description or []))
+    for row in cursor:
+        print("\t".join(str(value) for value in row))
@@ -0,0 +1,83 @@
+import re
+import json
+
+from hugo_content import SUMMARY_DATA_FILE, SUMMARY_METRICS, write_if_changed
+
+
+SEARCH_INDEX_FILE = "STEM-cases/static/search_index.json"
+TEXT_FIELDS = ["organisation", "stem_version"]
+TERM_FIELDS = ["title", "organisation", "description"]
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits a text into lower case search terms. Dotted numbers, like versions, are kept as one term.
+
+    Parameters:
+        text (str): The text to split.
+
+    Returns:
+        list: Sorted list of unique terms.
+    """
+    return sorted(set(re.findall(r"[a-z0-9]+(?:\.[a-z0-9]+)*", str(text).lower())))
+
+
+def build_search_index(rows: dict) -> dict:
+    """
+    Builds the search index of the test cases.
+
+    Cases are identified by their position in `cases`. Text fields are stored as inverted indexes
+    (value or term to sorted list of case ids) and numeric metrics as the sorted values with the matching
+    case ids, so that a range query is two binary searches.
+
+    Parameters:
+        rows (dict): Rows of the summary data file, keyed by case key.
+
+    Returns:
+        dict: The search index.
+    """
+    keys = sorted(rows.keys())
+
+    index = {"version": 1,
+             "cases": [{"key": key,
+                        "title": rows[key]["title"],
+                        "organisation": rows[key]["organisation"],
+                        "page": rows[key]["page"]} for key in keys],
+             "fields": {field: {} for field in TEXT_FIELDS},
+             "terms": {},
+             "metrics": {}}
+
+    for case_id, key in enumerate(keys):
+        row = rows[key]
+        for field in TEXT_FIELDS:
+            index["fields"][field].setdefault(str(row[field]), []).append(case_id)
+        terms = set()
+        for field in TERM_FIELDS:
+            terms.update(tokenize(row.get(field, "")))
+        for term in sorted(terms):
+            index["terms"].setdefault(term, []).append(case_id)
+
+    for metric in SUMMARY_METRICS:
+        order = sorted(range(len(keys)), key=lambda i: rows[keys[i]][metric])
+        index["metrics"][metric] = {"values": [rows[keys[i]][metric] for i in order],
+                                    "cases": order}
+
+    return index
+
+
+def write_search_index(data_file: str = SUMMARY_DATA_FILE, index_file: str = SEARCH_INDEX_FILE) -> bool:
+    """
+    Writes the search index of all the test cases in the summary data file.
+
+    Parameters:
+        data_file (str): Path of the Hugo summary data file.
+        index_file (str): Path of the search index file, served by the static site.
+
+    Returns:
+        bool: True if the index was written, False if it was already up to date.
+    """
+    with open(data_file, "r") as f:
+        rows = json.load(f)["cases"]
+
+    index = build_search_index(rows)
+    return write_if_changed(index_file, json.dumps(index, separators=(",", ":"), sort_keys=True))
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+COMPONENTS = ["VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]
+# maximum plausible velocity [m/s]: a diverged run goes far beyond it
+MAX_VELOCITY = 10.
+# maximum deviation of a time step from the median time step, relative to the median time step
+MAX_JITTER = 1e-2
+# maximum ratio between the peak at the end of a signal and the peak before it
+MAX_GROWTH = 10.
+# fraction of the signal at the end where the growth is measured
+TAIL_FRACTION = 0.1
+# peak before the end of a signal, relative to the maximum plausible velocity, below which the growth is not
+# measured: a wave that reaches a far node late is at rest before it
+GROWTH_FLOOR = 1e-6
+
+
+def check_signals(data: dict, max_velocity: float = MAX_VELOCITY, max_jitter: float = MAX_JITTER,
+                  max_growth: float = MAX_GROWTH, tail_fraction: float = TAIL_FRACTION) -> dict:
+    """
+    Checks the health of the signals of a test case: finite values, strictly increasing time, uniform time step,
+    and no blow-up of the velocities (neither implausible amplitudes nor growth at the end of the signal).
+
+    The velocities are reduced one signal at a time, so no copy of all the velocities is made.
+
+    Parameters:
+        data (dict): STEM results, with the arrays of numbers as lists or arrays.
+        max_velocity (float): Maximum plausible velocity [m/s].
+        max_jitter (float): Maximum relative deviation of a time step from the median time step.
+        max_growth (float): Maximum ratio between the peak at the end of a signal and the peak before it (only
+            when the peak before it is above GROWTH_FLOOR * max_velocity).
+        tail_fraction (float): Fraction of the signal at the end where the growth is measured.
+
+    Returns:
+        dict: Statistics of the time step and the velocities, and the list of `problems` found.
+    """
+    time = np.asarray(data["TIME"], dtype=float)
+    names = [(key, component) for key in data if key.startswith("NODE_") for component in COMPONENTS
+             if component in data[key]]
+    problems = []
+    report = {"n_signals": len(names), "n_steps": len(time), "problems": problems}
+
+    if len(time) < 2:
+        problems.append(f"TIME has {len(time)} values.")
+        return report
+
+    # reductions of every signal: non-finite values, peak, and peaks before and at the end of the signal
+    tail = min(max(int(len(time) * tail_fraction), 1), len(time) - 1)
+    non_finite = np.zeros(len(names), dtype=int)
+    peak = np.zeros(len(names))
+    head = np.zeros(len(names))
+    end = np.zeros(len(names))
+    for i, (key, component) in enumerate(names):
+        values = np.asarray(data[key][component], dtype=float)
+        if values.shape != time.shape:
+            problems.append(f"{key} {component} has {values.size} values, TIME has {time.size}.")
+            return report
+        amplitude = np.abs(values)
+        finite = np.isfinite(amplitude)
+        non_finite[i] = len(values) - np.count_nonzero(finite)
+        if non_finite[i]:
+            amplitude[~finite] = 0.
+        head[i] = amplitude[:-tail].max(initial=0.)
+        end[i] = amplitude[-tail:].max(initial=0.)
+        peak[i] = max(head[i], end[i])
+
+    # finite values
+    if not np.all(np.isfinite(time)):
+        problems.append(f"TIME has {np.count_nonzero(~np.isfinite(time))} non-finite values.")
+    for i in np.flatnonzero(non_finite):
+        problems.append(f"{names[i][0]} {names[i][1]} has {non_finite[i]} non-finite values.")
+
+    # strictly increasing, uniform time
+    step = np.diff(time)
+    if not np.all(step > 0):
+        problems.append(f"TIME is not strictly increasing at {np.count_nonzero(~(step > 0))} steps.")
+    median = np.median(step)
+    jitter = np.max(np.abs(step - median)) / abs(median) if median != 0 else np.inf
+    report.update({"dt_mean": float(np.mean(step)), "dt_median": float(median), "dt_std": float(np.std(step)),
+                   "jitter": float(jitter)})
+    if not jitter <= max_jitter:
+        problems.append(f"The time step is not uniform: it deviates up to {jitter:.3g} of the median time step "
+                        f"{median:.6g} s (maximum {max_jitter:.3g}).")
+
+    # blow-up: implausible amplitudes, or growth at the end of the signal
+    significant = head >= GROWTH_FLOOR * max_velocity
+    growth = np.where(significant, end / np.where(significant, head, 1.), 1.)
+    report.update({"peak": float(peak.max(initial=0.)), "growth": float(growth.max(initial=0.))})
+    for i in np.flatnonzero(peak > max_velocity):
+        problems.append(f"{names[i][0]} {names[i][1]} reaches {peak[i]:.3g} m/s (maximum {max_velocity:.3g} m/s).")
+    for i in np.flatnonzero(growth > max_growth):
+        problems.append(f"{names[i][0]} {names[i][1]} grows by {growth[i]:.3g} times at the end of the signal.")
+
+    return report
@@ -0,0 +1,355 @@
+import math
+import argparse
+
+import numpy as np
+
+from result_io import stream_arrays, DEFAULT_BACKEND, CHUNK_SIZE
+from node_blocks import sampling_frequency
+
+
+# relative accuracy of the quantiles of the histogram sketch
+SKETCH_ACCURACY = 0.01
+QUANTILES = [0.5, 0.95, 0.99]
+# parameters of the effective velocity (SBR deel B, 2006), as in SignalProcessingTools
+V0 = 1 / 1000
+F0 = 5.6
+N_TAU = 4
+TAU = 0.125
+# cut-off frequency of the low-pass weighting [Hz]
+CUT_OFF = 50.
+# length of the weighting kernel before and after a step [s]
+LOOKAHEAD = 1.
+
+
+class TimeAccumulator:
+    """
+    Time vector read in chunks.
+
+    The time vector is kept (one array, shared by all the signals of a result file), because the acquisition
+    frequency of the batch path is rounded up from the mean of the time steps: that rounding depends on how the
+    time steps are summed, so it can only be reproduced from the time vector itself.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.count = 0
+        self._time = None
+
+    def update(self, chunk: np.ndarray):
+        self.chunks.append(np.array(chunk, dtype=float))
+        self.count += len(chunk)
+        self._time = None
+
+    @property
+    def time(self) -> np.ndarray:
+        if self._time is None:
+            self._time = np.concatenate(self.chunks) if self.chunks else np.empty(0)
+            self.chunks = [self._time]
+        return self._time
+
+    @property
+    def sampling_frequency(self) -> int:
+        """
+        Acquisition frequency [Hz], with the same definition as the batch path (`node_blocks.sampling_frequency`).
+        """
+        if self.count < 2:
+            raise ValueError("The time vector needs at least 2 steps.")
+        return sampling_frequency(self.time)
+
+
+class PeakAccumulator:
+    """
+    Largest absolute value and its index.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.value = 0.
+        self.index = None
+
+    def update(self, chunk: np.ndarray):
+        if len(chunk):
+            i = int(np.argmax(np.abs(chunk)))
+            if self.index is None or abs(chunk[i]) > self.value:
+                self.value = float(abs(chunk[i]))
+                self.index = self.count + i
+        self.count += len(chunk)
+
+
+class RMSAccumulator:
+    """
+    Root mean square of all the values.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum_squares = 0.
+
+    def update(self, chunk: np.ndarray):
+        self.sum_squares += float(np.dot(chunk, chunk))
+        self.count += len(chunk)
+
+    @property
+    def value(self) -> float:
+        return math.sqrt(self.sum_squares / self.count) if self.count else 0.
+
+
+class HistogramSketch:
+    """
+    Histogram of the absolute values with logarithmic bins, from which quantiles are estimated with a bounded
+    relative error. The bins grow with the range of the values and not with their number, and two sketches
+    with the same accuracy are merged by adding their counts.
+    """
+
+    def __init__(self, accuracy: float = SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zeros = 0
+        self.count = 0
+
+    def update(self, chunk: np.ndarray):
+        values = np.abs(chunk)
+        values = values[np.isfinite(values)]
+        self.count += len(values)
+        positive = values[values > 0]
+        self.zeros += len(values) - len(positive)
+        if len(positive) == 0:
+            return
+        bins = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+        self._add(int(bins.min()), np.bincount(bins - bins.min()))
+
+    def _add(self, offset: int, counts: np.ndarray):
+        if self.offset is None:
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return
+        start = min(self.offset, offset)
+        end = max(self.offset + len(self.counts), offset + len(counts))
+        merged = np.zeros(end - start, dtype=np.int64)
+        merged[self.offset - start:self.offset - start + len(self.counts)] += self.counts
+        merged[offset - start:offset - start + len(counts)] += counts
+        self.offset, self.counts = start, merged
+
+    def merge(self, other: "HistogramSketch"):
+        """
+        Adds the values of another sketch with the same accuracy.
+        """
+        if other.accuracy != self.accuracy:
+            raise ValueError("Only sketches with the same accuracy can be merged.")
+        self.count += other.count
+        self.zeros += other.zeros
+        if other.offset is not None:
+            self._add(other.offset, other.counts)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the absolute values, within the relative accuracy of the sketch.
+
+        Parameters:
+            q (float): Quantile, between 0 and 1.
+
+        Returns:
+            float: The estimated quantile.
+        """
+        if self.count == 0:
+            raise ValueError("The sketch is empty.")
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.
+        i = int(np.searchsorted(np.cumsum(self.counts), rank - self.zeros, side="right"))
+        # middle of the bin (gamma^(k-1), gamma^k] in the relative sense
+        return 2 * self.gamma ** (self.offset + i) / (self.gamma + 1)
+
+
+def _weighting_kernel(fs: int, half: int) -> np.ndarray:
+    """
+    Impulse response of the frequency weighting of SignalProcessingTools (the high-pass weighting of the
+    perception and the low-pass at 50 Hz), truncated to `half` steps on both sides.
+    """
+    size = max(1 << 16, 1 << (16 * half).bit_length())
+    frequency = np.fft.rfftfreq(size, 1 / fs)
+    weight = np.zeros(len(frequency))
+    weight[1:] = (1 / V0) / np.sqrt(1 + (F0 / frequency[1:]) ** 2)
+    if CUT_OFF < fs / 2:
+        weight[frequency > CUT_OFF] = 0
+    response = np.fft.irfft(weight, size)
+    return np.concatenate([response[-half:], response[:half + 1]]) if half else response[:1]
+
+
+def _convolve_valid(values: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """
+    Convolution of the values with the kernel where they fully overlap, through the FFT.
+    """
+    size = len(values) + len(kernel) - 1
+    size = 1 << (size - 1).bit_length()
+    full = np.fft.irfft(np.fft.rfft(values, size) * np.fft.rfft(kernel, size), size)
+    return full[len(kernel) - 1:len(values)]
+
+
+class VeffAccumulator:
+    """
+    Effective velocity of a velocity signal read in chunks (SBR deel B, 2006).
+
+    SignalProcessingTools weights the velocity in the frequency domain, over the whole signal, without phase
+    shift. Here the same weighting is applied as a convolution with its impulse response, truncated to
+    LOOKAHEAD seconds on both sides: the state is the last 2 * LOOKAHEAD seconds of velocities, and the effective
+    velocity lags the velocities by LOOKAHEAD seconds until `finish` is called. The running RMS is the
+    convolution of the squared weighted velocity with the same truncated exponential window as
+    SignalProcessingTools: its state is the last window length of squared values. The memory does not depend on
+    the length of the signal.
+
+    The peak effective velocity agrees with the batch value to about 0.1 %. The batch weighting is circular, so
+    the values differ more within LOOKAHEAD seconds of the ends of the signal.
+    """
+
+    def __init__(self, fs: int, n: int = N_TAU, tau: float = TAU, lookahead: float = LOOKAHEAD):
+        self.fs = fs
+        self.tau = tau
+        qsi = np.linspace(0, n * tau, int(n * tau * fs + 1))
+        self.window = np.exp(-qsi / tau) / (1 - np.exp(-n))
+
+        self.half = int(round(lookahead * fs))
+        self.kernel = _weighting_kernel(fs, self.half)
+        # the velocities before the start of the signal are zero
+        self.pending = np.zeros(self.half)
+        self.tail = np.zeros(len(self.window) - 1)
+        self.peak = PeakAccumulator()
+        self.count = 0
+        # the last velocity is held back: as in `process_data.signal_metrics`, it is dropped if the signal has an
+        # odd number of steps
+        self.last = None
+        self.finished = False
+
+    def update(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Adds a chunk of velocities.
+
+        Parameters:
+            chunk (np.ndarray): Velocities [m/s].
+
+        Returns:
+            np.ndarray: The effective velocity [mm/s] at the steps that are complete: the steps of the chunk,
+            delayed by the lookahead (and one step).
+        """
+        if self.finished:
+            raise ValueError("The effective velocity is already finished.")
+        if len(chunk) == 0:
+            return np.empty(0)
+        self.count += len(chunk)
+        held = [] if self.last is None else [self.last]
+        self.last = chunk[-1]
+        return self._weight(np.concatenate([self.pending, held, chunk[:-1]]))
+
+    def _weight(self, buffer: np.ndarray) -> np.ndarray:
+        """
+        Weights the velocities that have their full kernel in the buffer, and keeps the rest for the next chunk.
+        """
+        if len(buffer) <= 2 * self.half:
+            self.pending = buffer
+            return np.empty(0)
+        weighted = _convolve_valid(buffer, self.kernel)
+        self.pending = buffer[len(buffer) - 2 * self.half:]
+
+        squares = np.concatenate([self.tail, weighted ** 2])
+        running = np.convolve(squares, self.window, mode="valid")
+        self.tail = squares[len(squares) - len(self.tail):]
+        v_eff = np.sqrt(np.maximum(running, 0) / self.fs / self.tau)
+        self.peak.update(v_eff)
+        return v_eff
+
+    def finish(self) -> np.ndarray:
+        """
+        Completes the last steps of the signal, after the last chunk.
+
+        Returns:
+            np.ndarray: The effective velocity at the last steps of the signal [mm/s].
+        """
+        if self.finished:
+            return np.empty(0)
+        held = [self.last] if self.count % 2 == 0 and self.last is not None else []
+        # the velocities after the end of the signal are zero
+        v_eff = self._weight(np.concatenate([self.pending, held, np.zeros(self.half)]))
+        self.finished = True
+        return v_eff
+
+
+class SignalSummary:
+    """
+    Summary metrics of a velocity signal read in chunks: peak, RMS, peak effective velocity and quantiles of
+    the absolute velocity, in mm/s as `process_data.signal_metrics`.
+    """
+
+    def __init__(self, time: TimeAccumulator, accuracy: float = SKETCH_ACCURACY):
+        self.time = time
+        self.peak = PeakAccumulator()
+        self.rms = RMSAccumulator()
+        self.sketch = HistogramSketch(accuracy)
+        self.v_eff = None
+
+    def update(self, chunk: np.ndarray):
+        if self.v_eff is None:
+            # the time vector is complete before the first velocities
+            self.v_eff = VeffAccumulator(self.time.sampling_frequency)
+        self.peak.update(chunk)
+        self.rms.update(chunk)
+        self.sketch.update(chunk)
+        self.v_eff.update(chunk)
+
+    def metrics(self, quantiles: list = QUANTILES) -> dict:
+        """
+        Parameters:
+            quantiles (list): Quantiles of the absolute velocity to estimate.
+
+        Returns:
+            dict: peak_velocity, rms_velocity, peak_v_eff and the quantiles (e.g. p95_velocity) [mm/s].
+        """
+        if self.v_eff is None:
+            raise ValueError("The signal is empty.")
+        self.v_eff.finish()
+        result = {"peak_velocity": self.peak.value * 1000,
+                  "rms_velocity": self.rms.value * 1000,
+                  "peak_v_eff": self.v_eff.peak.value}
+        for q in quantiles:
+            result[f"p{round(q * 100):d}_velocity"] = self.sketch.quantile(q) * 1000
+        return result
+
+
+def stream_metrics(path: str, signals: list, chunk_size: int = CHUNK_SIZE, backend: str = DEFAULT_BACKEND,
+                   accuracy: float = SKETCH_ACCURACY) -> dict:
+    """
+    Computes the summary metrics of signals of a result file in one pass over the file, with the velocities
+    parsed and consumed one chunk at a time, so that no signal is in memory as a whole.
+
+    Parameters:
+        path (str): Path to the result file: plain, compressed with gzip, xz or zstd, or compact.
+        signals (list): (node, component) of the signals, e.g. ("NODE_76", "VELOCITY_Y").
+        chunk_size (int): Number of characters read at a time.
+        backend (str): Parser of the numbers (see `result_io.BACKENDS`).
+        accuracy (float): Relative accuracy of the quantiles.
+
+    Returns:
+        dict: Per (node, component) the metrics of `SignalSummary.metrics`.
+    """
+    time = TimeAccumulator()
+    summaries = {tuple(signal): SignalSummary(time, accuracy) for signal in signals}
+    stream_arrays(path, {("TIME",): time, **summaries}, backend, chunk_size)
+
+    for (node, component), summary in summaries.items():
+        if summary.v_eff is None:
+            raise ValueError(f"{component} of {node} not found in {path}.")
+    return {signal: summary.metrics() for signal, summary in summaries.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the summary metrics of a signal in one pass over a "
+                                                 "result file, without loading it.")
+    parser.add_argument("result_file", help="result file: JSON (plain or compressed) or compact")
+    parser.add_argument("node", help="node, e.g. NODE_76")
+    parser.add_argument("--component", default="VELOCITY_Y", help="velocity component (default: VELOCITY_Y)")
+    args = parser.parse_args()
+
+    for metric, value in stream_metrics(args.result_file, [(args.node, args.component)])[
+            (args.node, args.component)].items():
+        print(f"{metric:<16} {value:>14.6g}")
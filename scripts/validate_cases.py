@@ -0,0 +1,215 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from validators import json_validator, mdpa_nodes_validator, signals_validator
+from result_io import load_arrays
+from discovery import scan_cases, print_errors
+from changed_cases import changed_paths, affected_cases
+
+
+def _load_arrays(json_file: str) -> dict:
+    """
+    Decodes a JSON file once for all the validators, or returns None if it cannot be decoded (`json_validator`
+    then reports why).
+    """
+    try:
+        return load_arrays(json_file)
+    except Exception:
+        return None
+
+
+def load_valid_case(case: dict) -> dict:
+    """
+    Validates the YAML, JSON and MDPA files of a test case, and returns its decoded JSON file, which is decoded
+    once for the validation and the caller.
+
+    Parameters:
+        case (dict): Descriptor of the test case, from `discovery.scan_cases`.
+
+    Returns:
+        dict: The JSON results (with arrays) if all the files are valid, None otherwise.
+    """
+    if not print_errors(case):
+        print(f"Validation failed for test case: {case['yaml_file']}")
+        return None
+
+    meta = case["meta"]
+    data = _load_arrays(case["files"]["json"])
+    if not json_validator(case["files"]["json"], str(meta["STEM-version"]), data):
+        print(f"Validation failed for JSON file: {meta['json-file']}")
+        return None
+
+    if not signals_validator(case["files"]["json"], data):
+        print(f"Unhealthy signals in JSON file: {meta['json-file']}")
+        return None
+
+    if not mdpa_nodes_validator(case["files"]["mdpa"], case["files"]["json"], data):
+        print(f"Validation failed for MDPA file: {meta['mdpa-file']}")
+        return None
+
+    return data
+
+
+def validate_case(case: dict) -> bool:
+    """
+    Validates the YAML, JSON and MDPA files of a test case.
+
+    Parameters:
+        case (dict): Descriptor of the test case, from `discovery.scan_cases`.
+
+    Returns:
+        bool: True if all the files are valid, False otherwise.
+    """
+    return load_valid_case(case) is not None
+
+
+def _run_validator(report: dict, kind: str, path: str, validator, *args):
+    """
+    Runs a validator, and records its result, its messages and its time in the report of the test case.
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            valid = validator(path, *args)
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}")
+            valid = False
+
+    messages = [line for line in output.getvalue().splitlines() if line.strip()]
+    report["files"].append({"kind": kind, "file": path, "valid": bool(valid), "messages": messages,
+                            "time": time.perf_counter() - start})
+    report["valid"] = report["valid"] and bool(valid)
+
+
+def check_case(case: dict) -> dict:
+    """
+    Runs all the validators of a test case, also after a failure, and collects their results.
+
+    Parameters:
+        case (dict): Descriptor of the test case, from `discovery.scan_cases`.
+
+    Returns:
+        dict: Report of the test case: validity, and per file the validity, the messages and the time [s].
+    """
+    report = {"case": case["yaml_file"], "valid": not case["errors"], "files": []}
+    start = time.perf_counter()
+
+    # the YAML file and the existence of the referenced files are checked by the discovery
+    for kind, path in case["files"].items():
+        messages = [error["message"] for error in case["errors"] if error["kind"] == kind]
+        report["files"].append({"kind": kind, "file": path, "valid": not messages, "messages": messages,
+                                "time": case["scan_time"] if kind == "yaml" else 0.})
+
+    # the JSON file is decoded once, and its arrays are passed to all the validators
+    json_file = case["files"].get("json")
+    if json_file in case["stats"]:
+        report["files"] = [file for file in report["files"] if file["kind"] != "json"]
+        decode_start = time.perf_counter()
+        data = _load_arrays(json_file)
+        decode_time = time.perf_counter() - decode_start
+        _run_validator(report, "json", json_file, json_validator, str(case["meta"].get("STEM-version")), data)
+        report["files"][-1]["time"] += decode_time
+
+    # the signals of a valid JSON file are checked, and its nodes are compared with the MDPA file
+    json_report = next((file for file in report["files"] if file["kind"] == "json"), None)
+    if json_report is not None and json_report["valid"] and json_file in case["stats"]:
+        _run_validator(report, "signals", json_file, signals_validator, data)
+        mdpa_file = case["files"].get("mdpa")
+        if mdpa_file in case["stats"]:
+            report["files"] = [file for file in report["files"] if file["kind"] != "mdpa"]
+            _run_validator(report, "mdpa", mdpa_file, mdpa_nodes_validator, json_file, data)
+
+    report["time"] = case["scan_time"] + time.perf_counter() - start
+    return report
+
+
+def validate_batch(cases: list, workers: int = None) -> dict:
+    """
+    Validates many test cases concurrently, in a pool of processes, and aggregates their reports.
+
+    Parameters:
+        cases (list): Descriptors of the test cases, from `discovery.scan_cases`.
+        workers (int): Number of processes (optional: one per CPU). With 1 the cases are validated in this process.
+
+    Returns:
+        dict: Report with the number of valid and invalid test cases, the wall time [s] and the report of every
+              test case (see `check_case`).
+    """
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, max(len(cases), 1))
+    if workers == 1:
+        cases = [check_case(case) for case in cases]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            cases = list(executor.map(check_case, cases))
+
+    invalid = sum(not case["valid"] for case in cases)
+    return {"valid": len(cases) - invalid,
+            "invalid": invalid,
+            "workers": workers,
+            "wall_time": time.perf_counter() - start,
+            "cases": cases}
+
+
+def main(paths: list, workers: int = 1, report_file: str = None) -> bool:
+    """
+    Validates the test cases, without processing them, and prints all the failures of every test case.
+
+    Only the validators are imported, so that the validation of a pull request starts fast.
+
+    Parameters:
+        paths (list): YAML files or folders with YAML files.
+        workers (int): Number of processes (optional: one per CPU).
+        report_file (str): Path of the JSON report (optional: no report).
+
+    Returns:
+        bool: True if all the test cases are valid, False otherwise.
+    """
+    report = validate_batch(scan_cases(paths), workers)
+    if report_file:
+        if os.path.dirname(report_file):
+            os.makedirs(os.path.dirname(report_file), exist_ok=True)
+        with open(report_file, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{report['valid']} of {report['valid'] + report['invalid']} test cases are valid.")
+    for case in report["cases"]:
+        if case["valid"]:
+            continue
+        print(f"Invalid test case: {case['case']}")
+        for file in case["files"]:
+            for message in file["messages"] if not file["valid"] else []:
+                print(f"  {file['kind']} {file['file']}: {message}")
+    return not report["invalid"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the YAML, JSON and MDPA files of STEM test cases.")
+    parser.add_argument("paths", nargs="*", default=["data"], help="YAML files or folders (default: data)")
+    parser.add_argument("--changed", nargs="+", default=None, metavar="PATH",
+                        help="only validate the test cases in the folders affected by these changed files")
+    parser.add_argument("--base-ref", default=None,
+                        help="only validate the test cases in the folders affected by the files changed "
+                             "since this git reference (e.g. origin/main)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of processes validating the test cases (default: one per CPU)")
+    parser.add_argument("--report", default=None, metavar="FILE",
+                        help="write all the failures and the time per file to a JSON report")
+    args = parser.parse_args()
+
+    paths = args.paths
+    if args.changed is not None or args.base_ref is not None:
+        changed = args.changed if args.changed is not None else changed_paths(args.base_ref)
+        paths = [case for folder in args.paths if os.path.isdir(folder) for case in affected_cases(changed, folder)]
+        if not paths:
+            print("No test cases affected by the changes.")
+            sys.exit(0)
+
+    sys.exit(0 if main(paths, args.workers, args.report) else 1)
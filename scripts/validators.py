@@ -1,26 +1,34 @@
 import os
-import json
-from schema import Schema, And, Use, SchemaError, Regex
+import re
+import functools
+from schema import Schema, And, SchemaError, Regex
 import yaml
+import numpy as np
+
+from result_io import load_arrays, open_result, compression
+from result_codec import read_header
+from mdpa import read_mdpa, compare_nodes
+from signal_checks import check_signals
 
 
 
 def __definitions_alpha() -> Schema:
     """
-    Defines the configuration schema for the validation of the input json file
+    Defines the configuration schema for the validation of the input json file, as read by
+    `result_io.load_arrays` (arrays of numbers as float64 arrays)
 
     return: Schema configuration file
     """
 
     conf_schema_node = Schema({
-        "COORDINATES": And(list, lambda l: len(l) == 3, [Use(float)]),
-        "VELOCITY_X": And(list, lambda l: len(l) > 0, [Use(float)]),
-        "VELOCITY_Y": And(list, lambda l: len(l) > 0, [Use(float)]),
-        "VELOCITY_Z": And(list, lambda l: len(l) > 0, [Use(float)]),
+        "COORDINATES": And(np.ndarray, lambda l: l.shape == (3,)),
+        "VELOCITY_X": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
+        "VELOCITY_Y": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
+        "VELOCITY_Z": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
     })
 
     conf_schema_json = Schema({
-        "TIME": And(list, lambda l: len(l) > 0, [Use(float)]),
+        "TIME": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
         Regex(r'^NODE_\d+$'): conf_schema_node,
     })
 
@@ -28,19 +36,20 @@ def __definitions_alpha() -> Schema:
 
 def __definitions_v123() -> Schema:
     """
-    Defines the configuration schema for the validation of the input json file
+    Defines the configuration schema for the validation of the input json file, as read by
+    `result_io.load_arrays` (arrays of numbers as float64 arrays)
 
     return: Schema configuration file
     """
 
     conf_schema_node = Schema({
-        "VELOCITY_X": And(list, lambda l: len(l) > 0, [Use(float)]),
-        "VELOCITY_Y": And(list, lambda l: len(l) > 0, [Use(float)]),
-        "VELOCITY_Z": And(list, lambda l: len(l) > 0, [Use(float)]),
+        "VELOCITY_X": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
+        "VELOCITY_Y": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
+        "VELOCITY_Z": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
     })
 
     conf_schema_json = Schema({
-        "TIME": And(list, lambda l: len(l) > 0, [Use(float)]),
+        "TIME": And(np.ndarray, lambda l: l.ndim == 1 and len(l) > 0),
         Regex(r'^NODE_\d+$'): conf_schema_node,
     })
 
@@ -73,32 +82,129 @@ def __check_lenghts(data: dict) -> bool:
     return True
 
 
-def json_validator(json_path: str, stem_version: str) -> bool:
+# layouts of the JSON results: schema definition and fields of the nodes, in the order STEM writes them
+RESULT_LAYOUTS = {
+    "velocity": {"definition": __definitions_v123,
+                 "node_fields": ["VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]},
+    "velocity_coordinates": {"definition": __definitions_alpha,
+                             "node_fields": ["COORDINATES", "VELOCITY_X", "VELOCITY_Y", "VELOCITY_Z"]},
+}
+# layout of the results of every supported STEM version: a new STEM release is a new entry
+STEM_VERSIONS = {
+    "1.2.3": "velocity",
+    "1.2.4.a": "velocity_coordinates",
+}
+SNIFF_SIZE = 4096
+# maximum distance between the coordinates of a node in the JSON and MDPA files
+COORDINATE_TOL = 1e-6
+REQUIRED_FIELDS = ["organisation", "title", "test-description", "date", "json-file", "input-file", "STEM-version",
+                   "mdpa-file"]
+# files referenced in the YAML file: kind of file and name in the messages
+REFERENCED_FILES = {"json-file": ("json", "JSON"),
+                    "input-file": ("input", "Input"),
+                    "mdpa-file": ("mdpa", "MDPA")}
+# files of 2 bytes or less (e.g. {}) are empty
+MIN_SIZE = 3
+_FIRST_NODE_FIELD = re.compile(r'"NODE_\d+"\s*:\s*\{\s*"([^"]*)"')
+
+
+def result_layout(stem_version: str) -> str:
+    """
+    Looks up the layout of the results of a STEM version.
+
+    Parameters:
+        stem_version (str): STEM version, as in the YAML file (a number is accepted).
+
+    Returns:
+        str: Name of the layout, or None if the version is not supported.
+    """
+    return STEM_VERSIONS.get(str(stem_version).strip())
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_schema(layout: str) -> Schema:
+    """
+    Builds the schema of a result layout once, and caches it.
+
+    Parameters:
+        layout (str): Name of the layout.
+
+    Returns:
+        Schema: The schema of the layout.
+    """
+    return RESULT_LAYOUTS[layout]["definition"]()
+
+
+def sniff_layout(json_path: str, size: int = SNIFF_SIZE) -> str:
+    """
+    Detects the layout of a result file from the first field of its first node, without parsing the file.
+
+    The file is read in blocks of `size` characters only up to the first node, which follows the time vector.
+    For compact files only the header is read.
+
+    Parameters:
+        json_path (str): Path to the result file.
+        size (int): Number of characters read at a time.
+
+    Returns:
+        str: Name of the layout, or None if it cannot be detected.
+    """
+    if compression(json_path) == "compact":
+        node = next((value for key, value in read_header(json_path).items() if key.startswith("NODE_")), None)
+        if node is None:
+            return None
+        fields = set(node)
+        return next((name for name, layout in RESULT_LAYOUTS.items() if set(layout["node_fields"]) == fields), None)
+
+    text = ""
+    with open_result(json_path) as f:
+        while True:
+            chunk = f.read(size)
+            # keep the end of the previous blocks, as the match may span several blocks
+            text = text[-256:] + chunk
+            match = _FIRST_NODE_FIELD.search(text)
+            if match is not None:
+                return next((name for name, layout in RESULT_LAYOUTS.items()
+                             if layout["node_fields"][0] == match.group(1)), None)
+            if not chunk:
+                return None
+
+
+def json_validator(json_path: str, stem_version: str, data: dict = None) -> bool:
     """
     Validates a JSON file against expected structure and velocity length consistency.
 
+    The layout of the file is sniffed first, so that a file that does not match the STEM version
+    is rejected without parsing it. The file is decoded with `result_io.load_arrays`, so a caller that already
+    decoded it passes the arrays, and the file is not decoded twice.
+
     Parameters:
         json_path (str): Path to the JSON file.
+        stem_version (str): STEM version of the test case.
+        data (dict): Parsed JSON data, from `result_io.load_arrays` (optional: read from the JSON file).
 
     Returns:
         bool: True if valid, False if errors found.
     """
+    # Load the schema based on the STEM version
+    layout = result_layout(stem_version)
+    if layout is None:
+        print(f"Unsupported STEM version: {stem_version}")
+        return False
+    conf_schema = compiled_schema(layout)
+
     try:
-        with open(json_path, "r") as f:
-            data = json.load(f)
+        sniffed = sniff_layout(json_path)
+        if sniffed is not None and sniffed != layout:
+            print(f"The JSON file has the {sniffed} layout, but STEM version {stem_version} writes the "
+                  f"{layout} layout.")
+            return False
+        if data is None:
+            data = load_arrays(json_path)
     except Exception as e:
         print(f"Failed to load JSON: {e}")
         return False
 
-    # Load the schema based on the STEM version
-    if stem_version == "1.2.3":
-        conf_schema = __definitions_v123()
-    elif stem_version == "1.2.4.a":
-        conf_schema = __definitions_alpha()
-    else:
-        print(f"Unsupported STEM version: {stem_version}")
-        return False
-
     # Validate the JSON structure
     try:
         conf_schema.validate(data)
@@ -113,59 +219,155 @@ def json_validator(json_path: str, stem_version: str) -> bool:
     return True
 
 
-def yaml_validator(yaml_path: str) -> bool:
+def nodes_validator(data: dict, mdpa: list) -> bool:
     """
-    Validates a YAML file for required metadata fields.
+    Checks that the nodes of the JSON results are the nodes of the `json_output` submodel part of the MDPA file,
+    and that their coordinates (if present in the JSON results) match the MDPA file.
 
     Parameters:
-        yaml_path (str): Path to the YAML file.
+        data (dict): Parsed JSON data.
+        mdpa (list): The MDPA content as a list of strings.
+
     Returns:
-        bool: True if valid, False if required fields are missing.
+        bool: True if the nodes match, False if errors found.
     """
+    nodes = [key for key in data if key.startswith("NODE_")]
+    ids = np.array([int(key[5:]) for key in nodes], dtype=np.int64)
+    coordinates = None
+    if nodes and all("COORDINATES" in data[key] for key in nodes):
+        coordinates = np.array([data[key]["COORDINATES"] for key in nodes], dtype=float)
 
-    # check if yaml file exists and size is greater than 2 bytes
-    if not os.path.isfile(yaml_path):
-        print(f"YAML file {yaml_path} does not exist.")
-        return False
-    if os.path.getsize(yaml_path) <= 2:
-        print(f"YAML file {yaml_path} is empty.")
+    try:
+        result = compare_nodes(ids, mdpa, coordinates, COORDINATE_TOL)
+    except ValueError as e:
+        print(f"Failed to compare the nodes with the MDPA file: {e}")
         return False
 
-    # yaml directory
-    yaml_dir = os.path.dirname(yaml_path)
+    messages = {"missing": "Nodes of the json_output submodel part missing in the JSON file",
+                "extra": "Nodes in the JSON file not in the json_output submodel part",
+                "moved": "Nodes with coordinates different from the MDPA file"}
+    valid = True
+    for name, message in messages.items():
+        if len(result[name]):
+            print(f"{message}: {result[name].tolist()}")
+            valid = False
+    return valid
 
-    # load yaml file
-    with open(yaml_path, 'r') as f:
-        meta = yaml.safe_load(f)
 
-    required_keys = ["organisation", "title", "test-description","date", "json-file", "input-file", "STEM-version", "mdpa-file"]
-    # check if all required keys are present
-    for key in required_keys:
-        if key not in meta:
-            print(f"Missing required metadata field: {key}")
-            return False
+def mdpa_nodes_validator(mdpa_path: str, json_path: str, data: dict = None) -> bool:
+    """
+    Checks that the nodes of a JSON file match the MDPA file (see `nodes_validator`).
 
-    # check if all keys are not empty
-    for key, value in meta.items():
-        if not value:
-            print(f"Metadata field '{key}' is empty.")
-            return False
+    Parameters:
+        mdpa_path (str): Path to the MDPA file.
+        json_path (str): Path to the JSON file.
+        data (dict): Parsed JSON data (optional: read from the JSON file).
 
-    # check is json-file and input files exist and size is greater than 2 bytes
-    if not os.path.isfile(os.path.join(yaml_dir, meta["json-file"])):
-        print(f"JSON file {meta['json-file']} does not exist.")
-        return False
-    if os.path.getsize(os.path.join(yaml_dir, meta["json-file"])) <= 2:
-        print(f"JSON file {meta['json-file']} is empty.")
-        return False
-    if not os.path.isfile(os.path.join(yaml_dir, meta["input-file"])):
-        print(f"Input file {meta['input-file']} does not exist.")
+    Returns:
+        bool: True if the nodes match, False if errors found.
+    """
+    try:
+        if data is None:
+            data = load_arrays(json_path)
+        mdpa = read_mdpa(mdpa_path)
+    except Exception as e:
+        print(f"Failed to load the files: {e}")
         return False
-    if os.path.getsize(os.path.join(yaml_dir, meta["input-file"])) <= 2:
-        print(f"Input file {meta['input-file']} is empty.")
+    return nodes_validator(data, mdpa)
+
+
+def signals_validator(json_path: str, data: dict = None) -> bool:
+    """
+    Checks the health of the signals of a JSON file: finite values, strictly increasing and uniform time,
+    and no blow-up of the velocities (see `signal_checks.check_signals`).
+
+    Parameters:
+        json_path (str): Path to the JSON file.
+        data (dict): Parsed JSON data (optional: read from the JSON file).
+
+    Returns:
+        bool: True if the signals are healthy, False if problems found.
+    """
+    try:
+        if data is None:
+            data = load_arrays(json_path)
+    except Exception as e:
+        print(f"Failed to load JSON: {e}")
         return False
 
-    return True
+    problems = check_signals(data)["problems"]
+    for problem in problems:
+        print(problem)
+    return not problems
+
+
+def file_errors(label: str, name: str, size: int) -> list:
+    """
+    Checks that a file exists and is not empty.
+
+    Parameters:
+        label (str): Kind of file in the messages (e.g. JSON).
+        name (str): Name of the file in the messages.
+        size (int): Size of the file [bytes], or None if it does not exist.
+
+    Returns:
+        list: The problems found (empty if the file is valid).
+    """
+    if size is None:
+        return [f"{label} file {name} does not exist."]
+    if size < MIN_SIZE:
+        return [f"{label} file {name} is empty."]
+    return []
+
+
+def metadata_errors(meta: dict) -> list:
+    """
+    Checks that the metadata of a YAML file has all the required fields, and that none of its fields is empty.
+
+    Parameters:
+        meta (dict): Content of the YAML file.
+
+    Returns:
+        list: The problems found (empty if the metadata is valid).
+    """
+    errors = [f"Missing required metadata field: {field}" for field in REQUIRED_FIELDS if field not in meta]
+    errors += [f"Metadata field '{field}' is empty." for field, value in meta.items() if not value]
+    return errors
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.isfile(path) else None
+
+
+def yaml_validator(yaml_path: str) -> bool:
+    """
+    Validates a YAML file for required metadata fields.
+
+    Parameters:
+        yaml_path (str): Path to the YAML file.
+    Returns:
+        bool: True if valid, False if required fields are missing.
+    """
+
+    # check if yaml file exists and size is greater than 2 bytes
+    errors = file_errors("YAML", yaml_path, _file_size(yaml_path))
+
+    if not errors:
+        with open(yaml_path, 'r') as f:
+            meta = yaml.safe_load(f)
+        errors = metadata_errors(meta)
+
+        # check is json-file and input files exist and size is greater than 2 bytes
+        for field in ["json-file", "input-file"]:
+            if not errors and meta.get(field):
+                _, label = REFERENCED_FILES[field]
+                errors = file_errors(label, meta[field], _file_size(os.path.join(os.path.dirname(yaml_path),
+                                                                                 meta[field])))
+
+    for error in errors:
+        print(error)
+    return not errors
+
 
 def mdpa_validator(mdpa_path: str) -> bool:
     """
@@ -178,11 +380,7 @@ def mdpa_validator(mdpa_path: str) -> bool:
     """
 
     # check if mdpa file exists and size is greater than 2 bytes
-    if not os.path.isfile(mdpa_path):
-        print(f"MDPA file {mdpa_path} does not exist.")
-        return False
-    if os.path.getsize(mdpa_path) <= 2:
-        print(f"MDPA file {mdpa_path} is empty.")
-        return False
-
-    return True
\ No newline at end of file
+    errors = file_errors("MDPA", mdpa_path, _file_size(mdpa_path))
+    for error in errors:
+        print(error)
+    return not errors
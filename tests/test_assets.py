@@ -0,0 +1,58 @@
+import os
+import json
+
+from PIL import Image, ImageDraw
+
+from scripts.assets import optimise_plots
+
+
+def _plot(path: str, colour: str):
+    """
+    Writes a small plot-like image
+    """
+    image = Image.new("RGB", (1500, 400), "white")
+    ImageDraw.Draw(image).line([(0, 300), (700, 100), (1500, 350)], fill=colour, width=3)
+    image.save(path)
+
+
+def test_optimise_plots(tmp_path):
+    """
+    Test the optimised variants, their content-hash names and the skipping of unchanged plots
+    """
+    raw = tmp_path / "raw"
+    output = tmp_path / "static"
+    manifest = str(tmp_path / "manifest.json")
+    raw.mkdir()
+    _plot(str(raw / "case_a.png"), "blue")
+    _plot(str(raw / "case_b.png"), "red")
+
+    variants = optimise_plots(["case_a.png", "case_b.png"], str(raw), str(output), manifest)
+
+    case_a = variants["case_a.png"]
+    assert case_a["png"] == f"case_a.{case_a['hash'][:10]}.png"
+    assert os.path.getsize(output / case_a["png"]) < os.path.getsize(raw / "case_a.png")
+    with Image.open(output / case_a["png"]) as image:
+        assert image.mode == "P"
+    with Image.open(output / case_a["thumbnail"]) as image:
+        assert image.width == 480
+
+    # unchanged plots are not processed again
+    mtime = os.path.getmtime(output / case_a["png"])
+    os.utime(output / case_a["png"], (mtime - 100, mtime - 100))
+    assert optimise_plots(["case_a.png"], str(raw), str(output), manifest)["case_a.png"] == case_a
+    assert os.path.getmtime(output / case_a["png"]) == mtime - 100
+
+    # a changed plot gets new names and the old variants are removed
+    _plot(str(raw / "case_a.png"), "green")
+    new = optimise_plots(["case_a.png"], str(raw), str(output), manifest)["case_a.png"]
+    assert new["png"] != case_a["png"]
+    assert not os.path.isfile(output / case_a["png"])
+    assert os.path.isfile(output / new["png"])
+    assert os.path.isfile(output / variants["case_b.png"]["png"])
+
+    # after a full run, the variants and manifest entries of the plots that are gone are removed
+    optimise_plots(["case_a.png"], str(raw), str(output), manifest, prune=True)
+    assert not any(os.path.isfile(output / name) for key, name in variants["case_b.png"].items() if key != "hash")
+    assert os.path.isfile(output / new["png"])
+    with open(manifest) as f:
+        assert list(json.load(f)) == ["case_a.png"]
@@ -0,0 +1,47 @@
+import os
+import subprocess
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.changed_cases import changed_paths, affected_cases
+
+
+def test_affected_cases(tmp_path):
+    """
+    Test that changed files are resolved to the test cases that reference them
+    """
+    folder = str(tmp_path / "data")
+    case_a = generate_case(folder, "case_a", n_nodes=2, n_steps=10, n_mesh_nodes=5)
+    case_b = generate_case(folder, "case_b", n_nodes=2, n_steps=10, n_mesh_nodes=5)
+
+    assert affected_cases([case_a], folder) == [case_a]
+    assert affected_cases([os.path.join(folder, "json_output_case_b.json")], folder) == [case_b]
+    assert affected_cases([os.path.join(folder, "case_b.mdpa"), os.path.join(folder, "case_a.py")],
+                          folder) == [case_a, case_b]
+    assert affected_cases(["README.md", "scripts/process_data.py"], folder) == []
+    assert affected_cases([os.path.join(folder, "unrelated.txt")], folder) == []
+
+
+def test_changed_paths(tmp_path, monkeypatch):
+    """
+    Test the list of changed files computed with git
+    """
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "test")
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    git("add", ".")
+    git("commit", "-q", "-m", "base")
+    git("checkout", "-q", "-b", "branch")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "case.yaml").write_text("case")
+    (tmp_path / "a.txt").write_text("changed")
+    os.remove(tmp_path / "b.txt")
+    git("add", "-A")
+    git("commit", "-q", "-m", "change")
+
+    monkeypatch.chdir(tmp_path)
+    assert sorted(changed_paths("main")) == ["a.txt", "data/case.yaml"]
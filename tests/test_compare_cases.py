@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+import pytest
+
+from scripts.compare_cases import (common_grid, compare_signals, compare_records, read_reference_signal,
+                                   plot_heatmap, write_comparison)
+from scripts.node_blocks import spectra
+from scripts.pyramid import write_pyramid
+
+
+def _signal(time, frequency, amplitude, phase=0.):
+    return amplitude * np.sin(2 * np.pi * frequency * time + phase) * np.exp(-((time - 1) / 0.3) ** 2)
+
+
+def test_common_grid():
+    """
+    Test the common time grid: the window covered by any of the signals at the coarsest time step
+    """
+    grid = common_grid([np.arange(0, 2.0005, 0.001), np.arange(0.1, 3.0001, 0.002)])
+    assert grid[0] == pytest.approx(0.) and grid[-1] == pytest.approx(3.0)
+    np.testing.assert_allclose(np.diff(grid), 0.002)
+
+
+def test_compare_signals_overlap():
+    """
+    Test that every pair of signals is compared on its own overlap, and that the pairs that do not overlap are
+    not compared
+    """
+    time = np.arange(0, 2.0005, 0.001)
+    signals = {"a": (time, _signal(time, 10, 1e-3)),
+               "b": (time[500:], _signal(time[500:], 10, 1e-3)),
+               "c": (time + 5, _signal(time, 10, 1e-3))}
+    comparison = compare_signals(signals)
+
+    # the short signal does not truncate the comparison of the others
+    assert comparison["time"][0] == pytest.approx(0.) and comparison["time"][1] == pytest.approx(7.)
+    assert comparison["rms_difference"][0, 1] == pytest.approx(0, abs=1e-6)
+    assert comparison["similarity"][0, 1] == pytest.approx(1)
+    assert comparison["overlap"][0, 1] == pytest.approx(1.5)
+    assert comparison["overlap"][0, 2] == 0
+    assert np.isnan(comparison["rms_difference"][0, 2]) and np.isnan(comparison["similarity"][1, 2])
+    assert comparison["spectral_distance"][0, 2] == pytest.approx(0, abs=1e-6)
+    assert np.all(np.diag(comparison["similarity"]) == 1)
+
+
+def test_compare_signals():
+    """
+    Test the pairwise matrices against the metrics computed pair by pair
+    """
+    time = np.arange(0, 2.0005, 0.001)
+    coarse = np.arange(0, 2.0005, 0.002)
+    signals = {"a": (time, _signal(time, 10, 1e-3)),
+               "b": (time, _signal(time, 10, 1e-3)),
+               "c": (time, _signal(time, 12, 2e-3, 0.5)),
+               "d": (coarse, _signal(coarse, 10, 0.5e-3))}
+    peaks = {key: {"peak_velocity_y": 1000 * np.max(np.abs(value)), "peak_v_eff": 1., "peak_fft": 0.}
+             for key, (_, value) in signals.items()}
+    comparison = compare_signals(signals, peaks)
+
+    cases = comparison["cases"]
+    assert cases == ["a", "b", "c", "d"]
+    grid = common_grid([signals[case][0] for case in cases])
+    block = np.array([np.interp(grid, *signals[case]) * 1000 for case in cases])
+    frequency, amplitude = spectra(grid, block)
+    amplitude = amplitude[:, frequency <= 100]
+    for i in range(len(cases)):
+        for j in range(len(cases)):
+            rms = np.sqrt(np.mean((block[i] - block[j]) ** 2))
+            assert comparison["rms_difference"][i, j] == pytest.approx(rms, abs=1e-9)
+            assert comparison["spectral_distance"][i, j] == pytest.approx(
+                np.sqrt(np.mean((amplitude[i] - amplitude[j]) ** 2)), abs=1e-9)
+
+    assert comparison["similarity"][0, 1] == pytest.approx(1)
+    assert np.all(np.diag(comparison["similarity"]) == 1)
+    assert np.all((comparison["similarity"] >= 0) & (comparison["similarity"] <= 1))
+    np.testing.assert_allclose(comparison["similarity"], comparison["similarity"].T)
+    assert comparison["peak_deviation"]["peak_velocity_y"][0, 3] == pytest.approx(0.5, rel=1e-2)
+    assert np.all(comparison["peak_deviation"]["peak_v_eff"] == 0)
+    assert np.all(comparison["peak_deviation"]["peak_fft"] == 0)
+
+
+def test_compare_records(tmp_path):
+    """
+    Test the comparison of the processed test cases from their pyramid files, and the heatmap and data file
+    """
+    time = np.arange(0.001, 2.0005, 0.001)
+    records = {}
+    for i, key in enumerate(["org/case-a", "org/case-b", "org/case-c"]):
+        velocity = _signal(time, 10 + i, 1e-3)
+        write_pyramid(str(tmp_path / f"{i}.pyr"), time, {"VELOCITY_Y": velocity})
+        records[key] = {"pyramid_location": f"{i}.pyr", "peak_velocity_y": 1., "peak_v_eff": 1., "peak_fft": 1.}
+    records["org/no-pyramid"] = {"peak_velocity_y": 1., "peak_v_eff": 1., "peak_fft": 1.}
+
+    read_time, velocity = read_reference_signal(str(tmp_path / "0.pyr"))
+    np.testing.assert_allclose(read_time, time)
+    np.testing.assert_allclose(velocity, _signal(time, 10, 1e-3), atol=1e-9)
+
+    comparison = compare_records(records, str(tmp_path))
+    assert comparison["cases"] == ["org/case-a", "org/case-b", "org/case-c"]
+    assert comparison["similarity"].shape == (3, 3)
+    assert compare_records({"org/case-a": records["org/case-a"]}, str(tmp_path)) is None
+
+    plot_heatmap(comparison, str(tmp_path / "comparison.png"), ["A", "B", "C"])
+    assert (tmp_path / "comparison.png").stat().st_size > 0
+
+    data_file = str(tmp_path / "data" / "comparison.json")
+    assert write_comparison(comparison, plot_location="plots/comparison.webp", data_file=data_file)
+    assert not write_comparison(comparison, plot_location="plots/comparison.webp", data_file=data_file)
+    with open(data_file) as f:
+        content = json.load(f)
+    assert content["labels"] == content["cases"]
+    assert len(content["peak_deviation"]["peak_fft"]) == 3
+
+    # a test case that does not overlap with the others, and an unreadable pyramid file, do not stop the comparison
+    write_pyramid(str(tmp_path / "late.pyr"), time + 10, {"VELOCITY_Y": _signal(time, 10, 1e-3)})
+    records["org/late"] = {"pyramid_location": "late.pyr", "peak_velocity_y": 1., "peak_v_eff": 1., "peak_fft": 1.}
+    (tmp_path / "broken.pyr").write_bytes(b"not a pyramid")
+    records["org/broken"] = {"pyramid_location": "broken.pyr", "peak_velocity_y": 1., "peak_v_eff": 1.,
+                             "peak_fft": 1.}
+    comparison = compare_records(records, str(tmp_path))
+    assert comparison["cases"] == ["org/case-a", "org/case-b", "org/case-c", "org/late"]
+    assert np.isnan(comparison["similarity"][0, 3])
+    plot_heatmap(comparison, str(tmp_path / "comparison.png"))
+    write_comparison(comparison, data_file=data_file)
+    with open(data_file) as f:
+        content = json.load(f)
+    assert content["similarity"][0][3] is None and content["similarity"][0][1] is not None
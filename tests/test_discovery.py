@@ -0,0 +1,42 @@
+import os
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.discovery import scan_cases
+
+
+def test_scan_cases(tmp_path, monkeypatch):
+    """
+    Test the discovery of the test cases and their files with one scan of the folder
+    """
+    generate_case(str(tmp_path), "case_a", n_nodes=2, n_steps=20, n_mesh_nodes=20)
+    generate_case(str(tmp_path), "case_b", n_nodes=2, n_steps=20, n_mesh_nodes=20)
+    os.remove(tmp_path / "case_b.mdpa")
+    (tmp_path / "json_output_case_b.json").write_text("{}")
+    (tmp_path / "case_c.yaml").write_text("organisation: Deltares\ntitle: c\n")
+
+    # only the folder is stat-ed, the stats of the files come from the scan of the folder
+    calls = []
+    stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda *args, **kwargs: calls.append(args) or stat(*args, **kwargs))
+    cases = scan_cases([str(tmp_path)])
+    assert calls == [(str(tmp_path),)]
+
+    assert [case["name"] for case in cases] == ["case_a.yaml", "case_b.yaml", "case_c.yaml"]
+    case = cases[0]
+    assert case["errors"] == []
+    assert case["meta"]["title"] == "Synthetic case_a"
+    assert case["files"] == {"yaml": str(tmp_path / "case_a.yaml"),
+                             "json": str(tmp_path / "json_output_case_a.json"),
+                             "input": str(tmp_path / "case_a.py"),
+                             "mdpa": str(tmp_path / "case_a.mdpa")}
+    assert case["stats"][case["files"]["mdpa"]][0] == stat(tmp_path / "case_a.mdpa").st_size
+
+    assert [(error["kind"], error["message"]) for error in cases[1]["errors"]] == [
+        ("json", "JSON file json_output_case_b.json is empty."),
+        ("mdpa", "MDPA file case_b.mdpa does not exist.")]
+    assert "Missing required metadata field: date" in [error["message"] for error in cases[2]["errors"]]
+
+    # a YAML file on its own, and a YAML file that does not exist
+    cases = scan_cases([str(tmp_path / "case_a.yaml"), str(tmp_path / "case_d.yaml")])
+    assert cases[0]["errors"] == []
+    assert cases[1]["errors"][0]["message"] == f"YAML file {tmp_path / 'case_d.yaml'} does not exist."
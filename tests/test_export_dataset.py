@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.export_dataset import export_dataset, load_dataset, case_data
+
+
+def test_export_dataset(tmp_path):
+    """
+    Test the export of the test cases into a columnar dataset and the reading of one test case
+    """
+    cases = tmp_path / "data"
+    output = tmp_path / "dataset"
+    generate_case(str(cases), "case_a", n_nodes=3, n_steps=50, n_mesh_nodes=20)
+    generate_case(str(cases), "case_b", n_nodes=2, n_steps=80, n_mesh_nodes=20, stem_version="1.2.4.a", seed=1)
+
+    metadata = export_dataset([str(cases)], str(output), compressed=True)
+    assert [case["case_key"] for case in metadata["cases"]] == ["synthetic/synthetic-case-a",
+                                                                "synthetic/synthetic-case-b"]
+
+    dataset = load_dataset(str(output))
+    assert isinstance(dataset["columns"]["velocity_y"], np.memmap)
+    assert dataset["columns"]["velocity_y"].shape == (3 * 50 + 2 * 80,)
+    assert dataset["columns"]["node_case"].tolist() == [0, 0, 0, 1, 1]
+
+    with open(cases / "json_output_case_b.json", "r") as f:
+        data = json.load(f)
+    nodes = sorted((key for key in data if key.startswith("NODE_")), key=lambda key: int(key[5:]))
+
+    case = case_data(dataset, "synthetic/synthetic-case-b")
+    assert case["VELOCITY_Y"].shape == (2, 80)
+    np.testing.assert_array_equal(case["time"], data["TIME"])
+    np.testing.assert_array_equal(case["VELOCITY_Y"][1], data[nodes[1]]["VELOCITY_Y"])
+    np.testing.assert_array_equal(case["coordinates"][0], data[nodes[0]]["COORDINATES"])
+    assert case["node_id"].tolist() == [int(key[5:]) for key in nodes]
+
+    # the coordinates of the 1.2.3 test case come from the MDPA file
+    assert case_data(dataset, "synthetic/synthetic-case-a")["coordinates"].shape == (3, 3)
+
+    with np.load(output / "dataset.npz") as archive:
+        np.testing.assert_array_equal(archive["velocity_x"], dataset["columns"]["velocity_x"])
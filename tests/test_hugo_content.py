@@ -0,0 +1,121 @@
+import os
+import json
+import datetime
+
+from scripts.hugo_content import edit_content_results, edit_content_summary, slugify
+
+
+def _summary(title: str, organisation: str) -> dict:
+    """
+    Builds a summary entry for a test case
+    """
+    return {"meta": {"title": title,
+                     "organisation": organisation,
+                     "test-description": "Description of the test case\n",
+                     "date": datetime.date(2025, 6, 30),
+                     "STEM-version": "1.2.3"},
+            "plot_location": f"{'_'.join(title.split())}.png",
+            "peak_velocity_y": 1.23456,
+            "peak_v_eff": 0.5,
+            "peak_fft": 0.01,
+            "freq_peak_fft": 12.}
+
+
+def test_slugify():
+    """
+    Test the conversion of titles into file names
+    """
+    assert slugify("Test case 0 soft soil") == "test-case-0-soft-soil"
+    assert slugify("  TU Delft / Deltares ") == "tu-delft-deltares"
+
+
+def test_results_pages(tmp_path):
+    """
+    Test that one page is written per case and per organisation, and that stale pages are removed
+    """
+    results = str(tmp_path / "results")
+    os.makedirs(results)
+    with open(os.path.join(results, "_index.md"), "w") as f:
+        f.write("index")
+
+    summary = {"a": _summary("Case A", "Deltares"),
+               "b": _summary("Case B", "Deltares"),
+               "c": _summary("Case C", "TU Delft")}
+    edit_content_results(summary, results_folder=results)
+
+    assert sorted(os.listdir(results)) == ["_index.md", "deltares", "tu-delft"]
+    assert sorted(os.listdir(os.path.join(results, "deltares"))) == ["_index.md", "case-a.md", "case-b.md"]
+    with open(os.path.join(results, "deltares", "case-a.md")) as f:
+        content = f.read()
+    assert 'title: "Case A"' in content
+    assert "![Case A](/TestCases/Case_A.png)" in content
+
+    # unchanged pages are not rewritten
+    page = os.path.join(results, "deltares", "case-a.md")
+    os.utime(page, (0, 0))
+    edit_content_results(summary, results_folder=results)
+    assert os.path.getmtime(page) == 0
+
+    # a partial run keeps the other pages, a full run removes them
+    edit_content_results({"a": summary["a"]}, prune=False, results_folder=results)
+    assert os.path.isfile(os.path.join(results, "tu-delft", "case-c.md"))
+    edit_content_results({"a": summary["a"]}, results_folder=results)
+    assert sorted(os.listdir(results)) == ["_index.md", "deltares"]
+    assert sorted(os.listdir(os.path.join(results, "deltares"))) == ["_index.md", "case-a.md"]
+    with open(os.path.join(results, "_index.md")) as f:
+        assert f.read() == "index"
+
+
+def test_summary_data(tmp_path):
+    """
+    Test that the summary data file is updated in place, only for the cases in the summary
+    """
+    data_file = str(tmp_path / "data" / "summary.json")
+
+    summary = {"a": _summary("Case A", "Deltares"),
+               "c": _summary("Case C", "TU Delft")}
+    edit_content_summary(summary, data_file=data_file)
+
+    with open(data_file) as f:
+        rows = json.load(f)["cases"]
+    assert sorted(rows.keys()) == ["deltares/case-a", "tu-delft/case-c"]
+    assert rows["deltares/case-a"]["peak_velocity_y"] == 1.23456
+    assert rows["deltares/case-a"]["page"] == "results/deltares/case-a/"
+
+    # a partial run only replaces the rows of its cases
+    changed = _summary("Case A", "Deltares")
+    changed["peak_v_eff"] = 2.
+    edit_content_summary({"a": changed}, prune=False, data_file=data_file)
+    with open(data_file) as f:
+        rows = json.load(f)["cases"]
+    assert sorted(rows.keys()) == ["deltares/case-a", "tu-delft/case-c"]
+    assert rows["deltares/case-a"]["peak_v_eff"] == 2.
+
+    # a full run removes the cases that no longer exist
+    edit_content_summary({"a": changed}, data_file=data_file)
+    with open(data_file) as f:
+        assert list(json.load(f)["cases"].keys()) == ["deltares/case-a"]
+
+
+def test_case_record(tmp_path):
+    """
+    Test that the content written from the compact records is the same as from the full summaries
+    """
+    from scripts.hugo_content import case_record
+
+    summary = {"a": _summary("Case A", "Deltares"),
+               "c": _summary("Case C", "TU Delft")}
+    summary["a"]["thumbnail_location"] = "plots/Case_A.thumb.webp"
+    records = {key: case_record(value) for key, value in summary.items()}
+    assert "meta" not in records["a"]
+    assert records["a"]["key"] == "deltares/case-a"
+    assert records["a"]["date"] == "2025-06-30"
+    assert case_record(records["a"]) is records["a"]
+
+    for name, content in [("summary", summary), ("records", records)]:
+        edit_content_results(content, results_folder=str(tmp_path / name / "results"))
+        edit_content_summary(content, data_file=str(tmp_path / name / "summary.json"))
+
+    for file in ["results/deltares/case-a.md", "results/tu-delft/case-c.md", "summary.json"]:
+        with open(tmp_path / "summary" / file) as f, open(tmp_path / "records" / file) as g:
+            assert f.read() == g.read()
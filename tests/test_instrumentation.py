@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import pstats
+import tracemalloc
+
+import scripts.instrumentation as instrumentation
+
+
+def test_disabled():
+    """
+    Test that the stages do nothing when the instrumentation is disabled
+    """
+    instrumentation.disable()
+    assert not instrumentation.is_enabled()
+    with instrumentation.stage("case", "stage") as context:
+        assert context is None
+    assert instrumentation.report()["records"] == []
+
+
+def test_stages(tmp_path):
+    """
+    Test the records, including the peak memory of nested stages
+    """
+    instrumentation.enable()
+    try:
+        with instrumentation.stage("case", "outer"):
+            with instrumentation.stage("case", "inner"):
+                data = bytearray(4 * 1024 ** 2)
+            del data
+            with instrumentation.stage("case", "small"):
+                pass
+
+        records = {r["stage"]: r for r in instrumentation.report()["records"]}
+        assert set(records) == {"outer", "inner", "small"}
+        assert records["inner"]["peak_tracemalloc_mb"] >= 4
+        assert records["outer"]["peak_tracemalloc_mb"] >= 4
+        assert records["small"]["peak_tracemalloc_mb"] < 1
+        assert records["outer"]["wall_time"] >= records["inner"]["wall_time"]
+
+        path = tmp_path / "report.json"
+        instrumentation.write_report(str(path), n=2)
+        report = json.loads(path.read_text())
+        assert report["stages"]["inner"]["calls"] == 1
+        assert len(instrumentation.top_table(2).splitlines()) == 3
+    finally:
+        instrumentation.disable()
+
+
+def test_environment(monkeypatch):
+    """
+    Test enabling the instrumentation with the environment variable
+    """
+    monkeypatch.setenv(instrumentation.ENV_VARIABLE, "0")
+    assert instrumentation.enable_from_environment() is None
+    assert not instrumentation.is_enabled()
+
+    monkeypatch.setenv(instrumentation.ENV_VARIABLE, "1")
+    try:
+        assert instrumentation.enable_from_environment() == instrumentation.DEFAULT_REPORT
+        assert instrumentation.is_enabled() and tracemalloc.is_tracing()
+        # without memory tracing, e.g. when the stages run in several threads
+        instrumentation.enable_from_environment(trace_memory=False)
+        assert instrumentation.is_enabled() and not tracemalloc.is_tracing()
+        with instrumentation.stage("case", "stage"):
+            pass
+        assert instrumentation.report()["records"][0]["peak_tracemalloc_mb"] is None
+    finally:
+        instrumentation.disable()
+
+
+def test_profiling_environment(tmp_path, monkeypatch):
+    """
+    Test enabling the profiling with the environment variables, and that the command line options take precedence
+    """
+    monkeypatch.delenv(instrumentation.PROFILE_ENV_VARIABLE, raising=False)
+    assert not instrumentation.enable_profiling_from_environment()
+
+    monkeypatch.setenv(instrumentation.PROFILE_ENV_VARIABLE, str(tmp_path / "environment"))
+    monkeypatch.setenv(instrumentation.PROFILE_THRESHOLD_ENV_VARIABLE, "5")
+    try:
+        assert instrumentation.enable_profiling_from_environment()
+        assert instrumentation._profile == {"folder": str(tmp_path / "environment"), "threshold": 5.}
+        assert instrumentation.enable_profiling_from_environment(threshold=0.5)
+        assert instrumentation._profile == {"folder": str(tmp_path / "environment"), "threshold": 0.5}
+        assert instrumentation.enable_profiling_from_environment(str(tmp_path / "cli"), 0.)
+        assert instrumentation._profile == {"folder": str(tmp_path / "cli"), "threshold": 0.}
+    finally:
+        instrumentation.disable_profiling()
+
+
+def test_profile_case(tmp_path):
+    """
+    Test that only the profiles of the cases slower than the threshold are written
+    """
+    with instrumentation.profile_case("case") as context:
+        assert context is None
+
+    instrumentation.enable_profiling(str(tmp_path), threshold=0.05)
+    try:
+        with instrumentation.profile_case("fast case.yaml"):
+            pass
+        with instrumentation.profile_case("slow case.yaml"):
+            time.sleep(0.1)
+    finally:
+        instrumentation.disable_profiling()
+
+    assert sorted(os.listdir(tmp_path)) == ["slow_case.yaml.prof"]
+    stats = pstats.Stats(str(tmp_path / "slow_case.yaml.prof"))
+    assert any(function[2] == "<built-in method time.sleep>" for function in stats.stats)
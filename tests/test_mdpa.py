@@ -0,0 +1,28 @@
+import numpy as np
+
+from scripts.mdpa import read_mdpa, node_table, submodel_part_nodes, node_coordinates, compare_nodes
+
+
+def test_node_table():
+    """
+    Test the parsing of the nodes and the json_output submodel part of a MDPA file
+    """
+    mdpa = read_mdpa("tests/data/example.mdpa")
+    ids, coordinates = node_table(mdpa)
+    assert ids.dtype == np.int64 and coordinates.shape == (len(ids), 3)
+    assert submodel_part_nodes(mdpa).tolist() == [76, 229]
+    np.testing.assert_array_equal(node_coordinates(mdpa, np.array([229, 76])), [[25, 0.7, 45], [18.5, 0.7, 45]])
+
+
+def test_compare_nodes():
+    """
+    Test the comparison of the node ids and coordinates with the json_output submodel part
+    """
+    mdpa = read_mdpa("tests/data/example.mdpa")
+    result = compare_nodes(np.array([76, 229]), mdpa, np.array([[18.5, 0.7, 45], [25, 0.7, 45]]))
+    assert [len(result[name]) for name in ["missing", "extra", "moved"]] == [0, 0, 0]
+
+    result = compare_nodes(np.array([76, 77]), mdpa, np.array([[18.5, 0.7, 45.1], [0, 0, 0]]))
+    assert result["missing"].tolist() == [229]
+    assert result["extra"].tolist() == [77]
+    assert result["moved"].tolist() == [76]
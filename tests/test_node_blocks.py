@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.node_blocks import (METRICS, spectra, v_eff, node_metrics, result_blocks, dataset_blocks,
+                                 merge_metrics)
+from scripts.process_data import signal_metrics
+from scripts.result_io import load_arrays
+from scripts.result_codec import write_compact
+from scripts.export_dataset import export_dataset, load_dataset, case_data
+
+
+def test_block_analysis():
+    """
+    Test that the spectra and effective velocities of a block match the processing of the single signals
+    """
+    data = load_arrays("tests/data/json_output_80.json")
+    nodes = [key for key in data if key.startswith("NODE_")]
+    block = np.array([data[node]["VELOCITY_Y"] for node in nodes])
+
+    # odd and even number of steps
+    for steps in [len(data["TIME"]), len(data["TIME"]) - 1]:
+        time = data["TIME"][:steps]
+        frequency, amplitude = spectra(time, block[:, :steps])
+        effective = v_eff(time, block[:, :steps])
+        for i, node in enumerate(nodes):
+            signal, _, metrics = signal_metrics(time, block[i, :steps])
+            np.testing.assert_allclose(frequency, signal.frequency)
+            np.testing.assert_allclose(amplitude[i], signal.amplitude, atol=1e-15)
+            np.testing.assert_allclose(effective[i], signal.v_eff, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 256])
+def test_node_metrics(tmp_path, block_size):
+    """
+    Test that the merged metrics do not depend on the block size nor on the source of the blocks
+    """
+    generate_case(str(tmp_path / "data"), "case", n_nodes=5, n_steps=400, n_mesh_nodes=20, dt=0.005)
+    json_file = str(tmp_path / "data" / "json_output_case.json")
+    data = load_arrays(json_file)
+
+    metrics = node_metrics(result_blocks(json_file, block_size))
+    assert metrics["nodes"] == [key for key in data if key.startswith("NODE_")]
+    for i, node in enumerate(metrics["nodes"]):
+        expected = signal_metrics(data["TIME"], data[node]["VELOCITY_Y"])[2]
+        for metric, value in expected.items():
+            assert metrics[metric][i] == pytest.approx(value, rel=1e-9)
+        assert metrics["ppv"][i] == pytest.approx(1000 * max(np.abs(data[node][component]).max()
+                                                             for component in ["VELOCITY_X", "VELOCITY_Y",
+                                                                               "VELOCITY_Z"]))
+    value, node = metrics["max"]["peak_v_eff"]
+    assert value == metrics["peak_v_eff"].max() and node == metrics["nodes"][np.argmax(metrics["peak_v_eff"])]
+
+    write_compact(str(tmp_path / "case.stemz"), data, 0)
+    compact = node_metrics(result_blocks(str(tmp_path / "case.stemz"), block_size))
+
+    export_dataset([str(tmp_path / "data")], str(tmp_path / "dataset"), compressed=False)
+    dataset = node_metrics(dataset_blocks(case_data(load_dataset(str(tmp_path / "dataset")),
+                                                    "synthetic/synthetic-case"), block_size))
+    order = [compact["nodes"].index(node) for node in dataset["nodes"]]
+    for metric in METRICS:
+        np.testing.assert_allclose(compact[metric], metrics[metric])
+        np.testing.assert_allclose(dataset[metric], metrics[metric][order])
+
+    assert merge_metrics([])["max"] == {}
@@ -0,0 +1,69 @@
+import time
+import threading
+
+import pytest
+
+from scripts.pipeline import prefetch
+
+
+def test_prefetch_order():
+    """
+    Test that the results are yielded in the order of the items, with and without a background thread
+    """
+    for depth in [0, 1, 3]:
+        assert list(prefetch(range(10), lambda x: x ** 2, depth)) == [(x, x ** 2) for x in range(10)]
+    assert list(prefetch([], lambda x: x, 2)) == []
+    # a one-shot iterator is read once for the producer and the consumer
+    assert list(prefetch(iter(range(10)), lambda x: x ** 2, 2)) == [(x, x ** 2) for x in range(10)]
+
+
+def test_prefetch_depth():
+    """
+    Test that the background thread runs at most depth + 1 items ahead of the consumer
+    """
+    started = []
+    lock = threading.Lock()
+
+    def load(item):
+        with lock:
+            started.append(item)
+        return item
+
+    results = prefetch(range(20), load, depth=2)
+    assert next(results) == (0, 0)
+    time.sleep(0.3)
+    # 1 consumed, 2 waiting in the queue and 1 waiting for a free place
+    assert len(started) <= 4
+    assert [item for item, _ in results] == list(range(1, 20))
+
+    # lazy in the calling thread
+    started.clear()
+    results = prefetch(range(20), load, depth=0)
+    next(results)
+    assert started == [0]
+
+
+def test_prefetch_error():
+    """
+    Test that an error is raised when its item is consumed, after the results of the previous items
+    """
+    def load(item):
+        if item == 3:
+            raise ValueError("invalid item")
+        return item
+
+    consumed = []
+    with pytest.raises(ValueError, match="invalid item"):
+        for item, _ in prefetch(range(10), load, depth=2):
+            consumed.append(item)
+    assert consumed == [0, 1, 2]
+
+
+def test_prefetch_stop():
+    """
+    Test that the background thread stops when the consumer stops early
+    """
+    results = prefetch(range(1000), lambda x: x, depth=1)
+    next(results)
+    results.close()
+    assert not any(thread.name == "prefetch" for thread in threading.enumerate())
@@ -0,0 +1,56 @@
+import numpy as np
+
+from scripts.pyramid import build_pyramid, iter_chunks, read_header, read_window, write_pyramid
+
+
+def test_build_pyramid_envelopes():
+    """
+    Test that every level holds the min/max of the power-of-two bins, independently of the chunk size
+    """
+    signal = np.random.default_rng(0).normal(size=1001)
+
+    reference = build_pyramid([signal])
+    for chunk_size in [1, 7, 64, 1000]:
+        levels = build_pyramid(iter_chunks(signal, chunk_size))
+        assert len(levels) == len(reference)
+        for (mins, maxs), (ref_mins, ref_maxs) in zip(levels, reference):
+            np.testing.assert_array_equal(mins, ref_mins)
+            np.testing.assert_array_equal(maxs, ref_maxs)
+
+    for k, (mins, maxs) in enumerate(reference):
+        factor = 2 ** k
+        assert mins.size == -(-signal.size // factor)
+        for i in [0, mins.size // 2, mins.size - 1]:
+            np.testing.assert_almost_equal(mins[i], np.min(signal[i * factor:(i + 1) * factor]))
+            np.testing.assert_almost_equal(maxs[i], np.max(signal[i * factor:(i + 1) * factor]))
+
+    # the top level is the envelope of the full signal
+    assert reference[-1][0].size == 1
+    assert reference[-1][0][0] == np.min(signal)
+    assert reference[-1][1][0] == np.max(signal)
+
+
+def test_read_window(tmp_path):
+    """
+    Test reading a time window from a pyramid file at full and reduced resolution
+    """
+    time = np.linspace(0, 9.999, 10000)
+    signal = np.sin(2 * np.pi * time)
+    path = tmp_path / "case.pyr"
+    write_pyramid(str(path), time, {"VELOCITY_Y": signal}, chunk_size=999)
+
+    header = read_header(str(path))
+    assert header["n_samples"] == 10000
+    assert header["data_start"] % 8 == 0
+
+    # small window: raw samples
+    t, mins, maxs = read_window(str(path), "VELOCITY_Y", 1., 1.1, max_points=1000)
+    np.testing.assert_array_equal(mins, maxs)
+    np.testing.assert_allclose(mins, signal[1000:1101], atol=1e-6)
+    np.testing.assert_allclose(t, time[1000:1101])
+
+    # full window: decimated envelope bounded by max_points
+    t, mins, maxs = read_window(str(path), "VELOCITY_Y", 0., 10., max_points=100)
+    assert len(t) <= 100
+    np.testing.assert_almost_equal(np.min(mins), -1, decimal=5)
+    np.testing.assert_almost_equal(np.max(maxs), 1, decimal=5)
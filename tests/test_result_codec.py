@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.result_io import compression, load_result
+from scripts.result_codec import encode_array, decode_array, write_compact, compare_metrics, METRICS
+
+
+@pytest.mark.parametrize("error_bound", [None, 0, 1e-7, 1e-5])
+def test_encode_array(error_bound):
+    """
+    Test the round trip of the codec within the error bound
+    """
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(scale=1e-4, size=5000))
+    blob, spec = encode_array(values, error_bound)
+    decoded = decode_array(blob, spec)
+
+    if error_bound is None:
+        np.testing.assert_array_equal(decoded, values.astype(np.float32))
+    else:
+        assert np.max(np.abs(decoded - values)) <= error_bound * (1 + 1e-9)
+    if error_bound != 0:
+        assert len(blob) < values.nbytes / 2
+
+    assert decode_array(*encode_array(np.array([]), error_bound)).shape == (0,)
+
+
+@pytest.mark.parametrize("error_bound", [None, 1e-6])
+def test_compact_metrics(tmp_path, error_bound):
+    """
+    Test that a compact result file is read as the JSON file, and does not change the summary metrics
+    """
+    generate_case(str(tmp_path), "case", n_nodes=3, n_steps=2000, n_mesh_nodes=20, stem_version="1.2.4.a")
+    json_file = str(tmp_path / "json_output_case.json")
+    compact_file = str(tmp_path / "case.stemz")
+    data = load_result(json_file)
+    write_compact(compact_file, data, error_bound)
+
+    assert compression(compact_file) == "compact"
+    decoded = load_result(compact_file)
+    assert decoded["TIME"] == data["TIME"]
+    node = next(key for key in data if key.startswith("NODE_"))
+    assert decoded[node]["COORDINATES"] == data[node]["COORDINATES"]
+
+    changes = compare_metrics(data, decoded, node)
+    assert set(changes) == set(METRICS)
+    assert all(change["relative_change"] < 1e-3 for change in changes.values())
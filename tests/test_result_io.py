@@ -0,0 +1,132 @@
+import gzip
+import json
+import lzma
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.result_io import compression, load_result, load_arrays, BACKENDS
+from scripts.validators import json_validator
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 20])
+def test_load_result(tmp_path, chunk_size):
+    """
+    Test the streaming parser on plain and compressed result files, with chunks that split the numbers
+    """
+    generate_case(str(tmp_path), "case", n_nodes=3, n_steps=200, n_mesh_nodes=20, stem_version="1.2.4.a")
+    json_file = tmp_path / "json_output_case.json"
+    text = json_file.read_text()
+    expected = json.loads(text)
+
+    with gzip.open(tmp_path / "case.json.gz", "wt") as f:
+        f.write(text)
+    with lzma.open(tmp_path / "case.json.xz", "wt") as f:
+        f.write(text)
+
+    assert compression(str(json_file)) is None
+    assert compression(str(tmp_path / "case.json.gz")) == "gzip"
+    assert compression(str(tmp_path / "case.json.xz")) == "xz"
+    for name in ["json_output_case.json", "case.json.gz", "case.json.xz"]:
+        assert load_result(str(tmp_path / name), chunk_size) == expected
+
+
+def test_load_result_values(tmp_path):
+    """
+    Test the parsing of the other JSON values and of invalid files
+    """
+    document = {"a": [], "b": [1, -2.5e-3, 3], "c": [{"d": "e\"f"}, True, None, [[1], []]], "g": -0.5,
+                # arrays that start with numbers, but hold other values
+                "h": [1, [2]], "i": [1, "x]"], "j": [1, 2, {"k": [3]}, 4]}
+    (tmp_path / "values.json").write_text(json.dumps(document))
+    for chunk_size in [1, 5, 1 << 20]:
+        assert load_result(str(tmp_path / "values.json"), chunk_size) == document
+
+    for text in ['{"a": [1, 2}', '{"a": [1, 2]', '{"a": [1, 2]} x']:
+        (tmp_path / "invalid.json").write_text(text)
+        with pytest.raises(ValueError):
+            load_result(str(tmp_path / "invalid.json"), 4)
+
+
+def test_json_validator_compressed(tmp_path):
+    """
+    Test the validation of a compressed result file
+    """
+    generate_case(str(tmp_path), "case", n_nodes=2, n_steps=50, n_mesh_nodes=20)
+    with gzip.open(tmp_path / "case.json.gz", "wt") as f:
+        f.write((tmp_path / "json_output_case.json").read_text())
+    assert json_validator(str(tmp_path / "case.json.gz"), "1.2.3")
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+def test_load_arrays(tmp_path, backend, chunk_size):
+    """
+    Test the parsing of the arrays of numbers directly into float64 arrays
+    """
+    generate_case(str(tmp_path), "case", n_nodes=2, n_steps=300, n_mesh_nodes=20, stem_version="1.2.4.a")
+    json_file = str(tmp_path / "json_output_case.json")
+    expected = load_result(json_file)
+
+    data = load_arrays(json_file, backend, chunk_size)
+    assert data.keys() == expected.keys()
+    assert isinstance(data["TIME"], np.ndarray) and data["TIME"].dtype == np.float64
+    np.testing.assert_array_equal(data["TIME"], expected["TIME"])
+    for key in expected:
+        if key.startswith("NODE_"):
+            for name, values in expected[key].items():
+                np.testing.assert_array_equal(data[key][name], values)
+    assert data[key]["COORDINATES"].shape == (3,)
+
+    (tmp_path / "nan.json").write_text('{"TIME": [0, 1, 2], "NODE_1": {"VELOCITY_Y": [NaN, 1e-3, -Infinity]}}')
+    data = load_arrays(str(tmp_path / "nan.json"), backend, chunk_size)
+    np.testing.assert_array_equal(data["NODE_1"]["VELOCITY_Y"], [np.nan, 1e-3, -np.inf])
+
+    (tmp_path / "invalid.json").write_text('{"TIME": [0, 1, x]}')
+    with pytest.raises(ValueError):
+        load_arrays(str(tmp_path / "invalid.json"), backend, chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 20])
+def test_backends_parity(tmp_path, chunk_size):
+    """
+    Test that all the backends accept the same arrays of numbers, and reject the same invalid arrays
+    """
+    valid = {"[1, 2.5, -3e-2]": [1, 2.5, -0.03], "[NaN, 1, -Infinity]": [np.nan, 1, -np.inf], "[]": [],
+             "[ 1 ,2 ]": [1, 2]}
+    invalid = ["[1,null,3]", "[1,2,true]", "[1,2,]", "[1,,2]", "[1, false]", "[NaN, null]", "[1, 2, ]", "[1, , 2]"]
+    for backend in BACKENDS:
+        for text, expected in valid.items():
+            (tmp_path / "valid.json").write_text(f'{{"TIME": {text}}}')
+            np.testing.assert_array_equal(load_arrays(str(tmp_path / "valid.json"), backend, chunk_size)["TIME"],
+                                          expected)
+        for text in invalid:
+            (tmp_path / "invalid.json").write_text(f'{{"TIME": {text}}}')
+            with pytest.raises(ValueError):
+                load_arrays(str(tmp_path / "invalid.json"), backend, chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+def test_iter_result(tmp_path, chunk_size):
+    """
+    Test the reading of the result files one entry at a time
+    """
+    from scripts.result_io import iter_result
+    from scripts.result_codec import write_compact
+
+    generate_case(str(tmp_path), "case", n_nodes=3, n_steps=100, n_mesh_nodes=20, stem_version="1.2.4.a")
+    json_file = str(tmp_path / "json_output_case.json")
+    expected = load_arrays(json_file)
+    write_compact(str(tmp_path / "case.stemz"), expected, 0)
+
+    for path in [json_file, str(tmp_path / "case.stemz")]:
+        entries = list(iter_result(path, chunk_size=chunk_size))
+        assert [key for key, _ in entries] == list(expected)
+        for key, value in entries[1:]:
+            for name in expected[key]:
+                np.testing.assert_array_equal(value[name], expected[key][name])
+
+    (tmp_path / "invalid.json").write_text('{"TIME": [0, 1, 2] "NODE_1": {}}')
+    with pytest.raises(ValueError):
+        list(iter_result(str(tmp_path / "invalid.json")))
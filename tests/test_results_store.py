@@ -0,0 +1,89 @@
+import os
+import sys
+import datetime
+import subprocess
+
+from benchmarks.synthetic_cases import generate_case
+from scripts import process_data
+from scripts.discovery import scan_cases
+from scripts.results_store import open_store, upsert_case, load_case, files_unchanged, remove_other_cases
+
+
+def _result(title: str) -> dict:
+    """
+    Builds the summary of a processed test case
+    """
+    return {"peak_velocity_y": 1.5, "peak_v_eff": 0.25, "peak_fft": 0.1, "freq_peak_fft": 12.5,
+            "plot_location": f"{title}.png", "pyramid_location": f"{title}.pyr", "node": "NODE_229",
+            "meta": {"organisation": "Deltares", "title": title, "test-description": "test",
+                     "date": datetime.date(2025, 6, 30), "STEM-version": "1.2.3"}}
+
+
+def test_store(tmp_path):
+    """
+    Test the upsert, query, change detection and removal of test cases
+    """
+    files = []
+    for name in ["case.yaml", "case.json"]:
+        (tmp_path / name).write_text(name)
+        files.append(str(tmp_path / name))
+
+    store = open_store(str(tmp_path / "build" / "results.sqlite"))
+    assert not files_unchanged(store, "deltares/a", files)
+
+    upsert_case(store, "deltares/a", files[0], _result("a"), files)
+    upsert_case(store, "deltares/b", files[0], _result("b"), files)
+    upsert_case(store, "deltares/a", files[0], _result("a"), files)
+
+    assert store.execute("SELECT count(*) FROM cases").fetchone()[0] == 2
+    assert store.execute("SELECT count(*) FROM metrics").fetchone()[0] == 8
+    rows = store.execute("SELECT case_key FROM cases JOIN metrics USING (case_key) "
+                         "WHERE metric = 'peak_v_eff' AND value > 0.2 ORDER BY case_key").fetchall()
+    assert rows == [("deltares/a",), ("deltares/b",)]
+
+    result = load_case(store, "deltares/a")
+    assert result["peak_fft"] == 0.1
+    assert result["node"] == "NODE_229"
+    assert result["meta"]["date"] == "2025-06-30"
+    assert load_case(store, "deltares/c") is None
+
+    # a touched file with the same content is unchanged, a modified file is not
+    assert files_unchanged(store, "deltares/a", files)
+    os.utime(files[1], (0, 0))
+    assert files_unchanged(store, "deltares/a", files)
+    (tmp_path / "case.json").write_text("changed")
+    assert not files_unchanged(store, "deltares/a", files)
+
+    remove_other_cases(store, ["deltares/b"])
+    assert store.execute("SELECT case_key FROM cases").fetchall() == [("deltares/b",)]
+    assert store.execute("SELECT DISTINCT case_key FROM metrics").fetchall() == [("deltares/b",)]
+    assert store.execute("SELECT DISTINCT case_key FROM file_hashes").fetchall() == [("deltares/b",)]
+
+
+def test_stored_result(tmp_path, monkeypatch):
+    """
+    Test that the stored results of an unchanged test case are reused only if its plot and pyramid file exist
+    """
+    generate_case(str(tmp_path), "case", n_nodes=2, n_steps=20, n_mesh_nodes=20)
+    case = scan_cases([str(tmp_path)])[0]
+    files = [case["files"][kind] for kind in ["yaml", "json", "input", "mdpa"]]
+    result = {**_result("case"), "meta": case["meta"]}
+    store = open_store(str(tmp_path / "results.sqlite"))
+    upsert_case(store, process_data.case_key(case["meta"]), case["yaml_file"], result, files, case["stats"])
+
+    monkeypatch.setattr(process_data, "RAW_PLOT_FOLDER", str(tmp_path))
+    monkeypatch.setattr(process_data, "PYRAMID_FOLDER", str(tmp_path))
+    (tmp_path / "case.png").write_bytes(b"png")
+    assert process_data.stored_result(case, store) is None
+    (tmp_path / "case.pyr").write_bytes(b"pyramid")
+    assert process_data.stored_result(case, store)["pyramid_location"] == "case.pyr"
+    os.remove(tmp_path / "case.png")
+    assert process_data.stored_result(case, store) is None
+
+
+def test_no_image_imports():
+    """
+    Test that the results store does not import the image libraries
+    """
+    code = "import sys; import results_store; assert 'PIL' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd="scripts", check=True)
@@ -0,0 +1,58 @@
+import json
+import bisect
+
+from scripts.search_index import build_search_index, tokenize, write_search_index
+
+
+ROWS = {"deltares/soft": {"title": "Test case 0 soft soil", "organisation": "Deltares",
+                          "description": "Soft soil with STEM 1.2.3", "stem_version": "1.2.3",
+                          "page": "results/deltares/soft/", "peak_velocity_y": 3., "peak_v_eff": 0.2,
+                          "peak_fft": 0.1, "freq_peak_fft": 10.},
+        "deltares/stiff": {"title": "Test case 0 stiff soil", "organisation": "Deltares",
+                           "description": "Stiff soil", "stem_version": "1.2.4.a",
+                           "page": "results/deltares/stiff/", "peak_velocity_y": 1., "peak_v_eff": 0.1,
+                           "peak_fft": 0.3, "freq_peak_fft": 20.},
+        "tu-delft/soft": {"title": "Soft", "organisation": "TU Delft",
+                          "description": "Soft soil", "stem_version": "1.2.3",
+                          "page": "results/tu-delft/soft/", "peak_velocity_y": 2., "peak_v_eff": 0.3,
+                          "peak_fft": 0.2, "freq_peak_fft": 15.}}
+
+
+def test_tokenize():
+    """
+    Test that terms are lower case and versions are kept as a single term
+    """
+    assert tokenize("Soft soil, STEM 1.2.4.a") == ["1.2.4.a", "soft", "soil", "stem"]
+
+
+def test_search_index():
+    """
+    Test the inverted indexes and the sorted numeric arrays
+    """
+    index = build_search_index(ROWS)
+
+    assert [case["key"] for case in index["cases"]] == ["deltares/soft", "deltares/stiff", "tu-delft/soft"]
+    assert index["fields"]["organisation"] == {"Deltares": [0, 1], "TU Delft": [2]}
+    assert index["fields"]["stem_version"] == {"1.2.3": [0, 2], "1.2.4.a": [1]}
+    assert index["terms"]["soft"] == [0, 2]
+    assert index["terms"]["soil"] == [0, 1, 2]
+
+    # range query 1.5 <= peak_velocity_y <= 3
+    metric = index["metrics"]["peak_velocity_y"]
+    assert metric["values"] == [1., 2., 3.]
+    start = bisect.bisect_left(metric["values"], 1.5)
+    end = bisect.bisect_right(metric["values"], 3.)
+    assert sorted(metric["cases"][start:end]) == [0, 2]
+
+
+def test_write_search_index(tmp_path):
+    """
+    Test that the index is only written when it changes
+    """
+    data_file = tmp_path / "summary.json"
+    data_file.write_text(json.dumps({"cases": ROWS}))
+    index_file = tmp_path / "search_index.json"
+
+    assert write_search_index(str(data_file), str(index_file))
+    assert not write_search_index(str(data_file), str(index_file))
+    assert json.loads(index_file.read_text())["terms"]["stiff"] == [1]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.result_io import load_arrays
+from scripts.signal_checks import check_signals
+from scripts.validators import signals_validator
+
+
+def test_check_signals(tmp_path, capsys):
+    """
+    Test the detection of non-finite values, non-increasing and non-uniform time, and blow-up
+    """
+    generate_case(str(tmp_path), "case", n_nodes=3, n_steps=1000, n_mesh_nodes=20)
+    json_file = str(tmp_path / "json_output_case.json")
+    assert signals_validator(json_file)
+
+    data = load_arrays(json_file)
+    report = check_signals(data)
+    assert report["problems"] == []
+    assert report["n_signals"] == 9 and report["n_steps"] == 1000
+    assert report["jitter"] < 1e-6 and report["growth"] < 1
+
+    node = next(key for key in data if key.startswith("NODE_"))
+    data[node]["VELOCITY_X"][10:13] = np.nan
+    data[node]["VELOCITY_Y"][-20:] = np.exp(np.arange(20))
+    data["TIME"][500] = data["TIME"][499]
+    problems = check_signals(data)["problems"]
+    assert f"{node} VELOCITY_X has 3 non-finite values." in problems
+    assert "TIME is not strictly increasing at 1 steps." in problems
+    assert any(problem.startswith("The time step is not uniform") for problem in problems)
+    assert any(problem.startswith(f"{node} VELOCITY_Y reaches") for problem in problems)
+    assert any(problem.startswith(f"{node} VELOCITY_Y grows by") for problem in problems)
+
+    assert not signals_validator(json_file, data)
+    assert f"{node} VELOCITY_X has 3 non-finite values." in capsys.readouterr().out
+
+
+def test_check_signals_late_arrival():
+    """
+    Test that a signal at rest until the wave arrives near its end is not a blow-up, unlike a signal that grows
+    from a non-negligible amplitude
+    """
+    time = np.arange(1001) * 0.001
+    late = np.where(np.arange(1001) >= 950, 1e-3 * np.sin(2 * np.pi * 20 * time), 0.)
+    growing = 1e-4 * np.sin(2 * np.pi * 20 * time) * np.where(np.arange(1001) >= 950, 100., 1.)
+    data = {"TIME": time,
+            "NODE_1": {"VELOCITY_X": np.zeros(1001), "VELOCITY_Y": late, "VELOCITY_Z": late * 1e-12},
+            "NODE_2": {"VELOCITY_X": np.zeros(1001), "VELOCITY_Y": growing, "VELOCITY_Z": np.zeros(1001)}}
+    report = check_signals(data)
+    assert report["problems"] == ["NODE_2 VELOCITY_Y grows by 100 times at the end of the signal."]
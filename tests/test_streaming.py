@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.streaming import (TimeAccumulator, PeakAccumulator, RMSAccumulator, HistogramSketch,
+                               VeffAccumulator, stream_metrics)
+from scripts.process_data import signal_metrics
+from scripts.node_blocks import sampling_frequency
+from scripts.result_io import load_arrays
+from scripts.result_codec import write_compact
+
+
+def _chunks(values, size):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def test_accumulators():
+    """
+    Test that the accumulators do not depend on the chunks, and match the batch computation
+    """
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=10000) * np.exp(rng.normal(size=10000))
+    time = np.arange(1, 10001) * 0.001
+
+    for size in [1, 333, 10000]:
+        clock, peak, rms, sketch = TimeAccumulator(), PeakAccumulator(), RMSAccumulator(), HistogramSketch(0.01)
+        for chunk in _chunks(time, size):
+            clock.update(chunk)
+        for chunk in _chunks(values, size):
+            peak.update(chunk)
+            rms.update(chunk)
+            sketch.update(chunk)
+
+        assert clock.count == 10000 and clock.sampling_frequency == sampling_frequency(time)
+        np.testing.assert_array_equal(clock.time, time)
+        assert peak.value == np.max(np.abs(values)) and peak.index == np.argmax(np.abs(values))
+        assert rms.value == pytest.approx(np.sqrt(np.mean(values ** 2)), rel=1e-12)
+        for q in [0., 0.5, 0.95, 1.]:
+            assert sketch.quantile(q) == pytest.approx(np.quantile(np.abs(values), q, method="lower"), rel=0.01)
+
+    # merged sketches
+    first, second = HistogramSketch(), HistogramSketch()
+    first.update(values[:5000])
+    second.update(np.append(values[5000:], [0., 0.]))
+    first.merge(second)
+    assert first.count == 10002 and first.zeros == 2
+    assert first.quantile(0.5) == pytest.approx(np.quantile(np.abs(values), 0.5, method="lower"), rel=0.01)
+    with pytest.raises(ValueError):
+        first.merge(HistogramSketch(0.1))
+
+
+def _veff(velocity, size, fs=1000):
+    accumulator = VeffAccumulator(fs)
+    return accumulator, np.concatenate([accumulator.update(chunk) for chunk in _chunks(velocity, size)] +
+                                       [accumulator.finish()])
+
+
+def test_v_eff():
+    """
+    Test that the effective velocity in chunks does not depend on the chunks, and matches the batch values,
+    also for a signal with content above the 50 Hz cut-off and an odd number of steps
+    """
+    rng = np.random.default_rng(1)
+    time = np.arange(1, 5002) * 0.001
+    velocity = 1e-3 * np.sin(2 * np.pi * 12 * time) * np.exp(-((time - 2.5) / 0.5) ** 2) + 2e-4 * rng.normal(
+        size=len(time))
+
+    _, expected = _veff(velocity, len(velocity))
+    batch = signal_metrics(time, velocity)[0].v_eff
+    assert len(expected) == len(batch) == 5000
+    # the batch weighting is circular: the signals only differ near the ends
+    np.testing.assert_allclose(expected[1000:-1000], batch[1000:-1000], rtol=0, atol=1e-2 * batch.max())
+    assert expected.max() == pytest.approx(batch.max(), rel=1e-3)
+
+    for size in [1, 77]:
+        accumulator, values = _veff(velocity, size)
+        np.testing.assert_allclose(values, expected, rtol=1e-9, atol=1e-12)
+        assert accumulator.peak.value == pytest.approx(expected.max(), rel=1e-12)
+    assert len(_veff(velocity[:-1], 1000)[1]) == 5000
+
+
+def test_stream_metrics_case():
+    """
+    Test the streaming metrics against the batch metrics on the STEM results of the repository
+    """
+    json_file = "data/json_output_case_0_soft.json"
+    data = load_arrays(json_file)
+    signals = [(key, "VELOCITY_Y") for key in data if key.startswith("NODE_")]
+    for chunk_size in [4096, 1 << 20]:
+        metrics = stream_metrics(json_file, signals, chunk_size=chunk_size)
+        for node, component in signals:
+            expected = signal_metrics(data["TIME"], data[node][component])[2]
+            assert metrics[(node, component)]["peak_velocity"] == expected["peak_velocity_y"]
+            assert metrics[(node, component)]["peak_v_eff"] == pytest.approx(expected["peak_v_eff"], rel=1e-3)
+
+
+@pytest.mark.parametrize("chunk_size", [64, 1 << 20])
+def test_stream_metrics(tmp_path, chunk_size):
+    """
+    Test the summary metrics computed in one pass over the result files, against the batch metrics
+    """
+    generate_case(str(tmp_path), "case", n_nodes=3, n_steps=2001, n_mesh_nodes=20, dt=0.001)
+    json_file = str(tmp_path / "json_output_case.json")
+    data = load_arrays(json_file)
+    write_compact(str(tmp_path / "case.stemz"), data, 0)
+    signals = [(key, "VELOCITY_Y") for key in data if key.startswith("NODE_")]
+
+    for path in [json_file, str(tmp_path / "case.stemz")]:
+        metrics = stream_metrics(path, signals, chunk_size=chunk_size)
+        for node, component in signals:
+            velocity = data[node][component]
+            expected = signal_metrics(data["TIME"], velocity)[2]
+            result = metrics[(node, component)]
+            assert result["peak_velocity"] == expected["peak_velocity_y"]
+            assert result["rms_velocity"] == pytest.approx(1000 * np.sqrt(np.mean(velocity ** 2)), rel=1e-12)
+            assert result["peak_v_eff"] == pytest.approx(expected["peak_v_eff"], rel=1e-3)
+            assert result["p95_velocity"] == pytest.approx(
+                1000 * np.quantile(np.abs(velocity), 0.95, method="lower"), rel=0.01)
+
+    with pytest.raises(ValueError, match="NODE_0"):
+        stream_metrics(json_file, [("NODE_0", "VELOCITY_Y")])
@@ -0,0 +1,36 @@
+import os
+
+import yaml
+import pytest
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.validators import json_validator, yaml_validator, mdpa_validator
+from scripts.process_data import find_reference_node
+
+
+@pytest.mark.parametrize("stem_version", ["1.2.3", "1.2.4.a"])
+def test_generate_case(tmp_path, stem_version):
+    """
+    Test that the synthetic cases pass the validators and contain the reference node
+    """
+    yaml_file = generate_case(str(tmp_path), "case", n_nodes=5, n_steps=100, n_mesh_nodes=50,
+                              stem_version=stem_version)
+
+    assert yaml_validator(yaml_file)
+    with open(yaml_file) as f:
+        meta = yaml.safe_load(f)
+    assert json_validator(os.path.join(tmp_path, meta["json-file"]), str(meta["STEM-version"]))
+    assert mdpa_validator(os.path.join(tmp_path, meta["mdpa-file"]))
+
+    with open(os.path.join(tmp_path, meta["mdpa-file"])) as f:
+        mdpa = f.read().splitlines()
+    assert find_reference_node(mdpa).startswith("NODE_")
+
+
+def test_reference_node():
+    """
+    Test the reference node search on the example MDPA file
+    """
+    with open("tests/data/example.mdpa") as f:
+        mdpa = f.read().splitlines()
+    assert find_reference_node(mdpa) == "NODE_229"
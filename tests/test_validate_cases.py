@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import subprocess
+
+from benchmarks.synthetic_cases import generate_case
+from scripts.discovery import scan_cases
+from scripts import validate_cases
+from scripts.validate_cases import main, validate_batch, check_case
+
+
+def test_validate_cases(tmp_path, capsys):
+    """
+    Test the validation of a folder with valid and invalid test cases
+    """
+    generate_case(str(tmp_path), "case_a", n_nodes=3, n_steps=50, n_mesh_nodes=20)
+    generate_case(str(tmp_path), "case_b", n_nodes=3, n_steps=50, n_mesh_nodes=20, stem_version="1.2.4.a")
+    assert [case["yaml_file"] for case in scan_cases([str(tmp_path)])] == [str(tmp_path / "case_a.yaml"),
+                                                                          str(tmp_path / "case_b.yaml")]
+    assert main([str(tmp_path)])
+
+    os.remove(tmp_path / "case_b.mdpa")
+    assert not main([str(tmp_path)])
+    captured = capsys.readouterr()
+    assert "1 of 2 test cases are valid." in captured.out
+    assert f"Invalid test case: {tmp_path / 'case_b.yaml'}" in captured.out
+
+
+def test_validate_batch(tmp_path, capsys):
+    """
+    Test that the batch validation collects all the failures of every test case, with a pool of processes
+    """
+    for name in ["case_a", "case_b", "case_c"]:
+        generate_case(str(tmp_path), name, n_nodes=2, n_steps=20, n_mesh_nodes=20)
+    # case_b has an invalid JSON file and no MDPA file
+    data = json.loads((tmp_path / "json_output_case_b.json").read_text())
+    data["TIME"] = data["TIME"][:-1]
+    (tmp_path / "json_output_case_b.json").write_text(json.dumps(data))
+    os.remove(tmp_path / "case_b.mdpa")
+
+    cases = scan_cases([str(tmp_path)])
+    report = validate_batch(cases, workers=2)
+    assert report["workers"] == 2
+    assert (report["valid"], report["invalid"]) == (2, 1)
+    assert [case["case"] for case in report["cases"]] == [case["yaml_file"] for case in cases]
+
+    case = report["cases"][1]
+    assert not case["valid"]
+    assert sorted((file["kind"], file["valid"]) for file in case["files"]) == [("input", True), ("json", False),
+                                                                              ("mdpa", False), ("yaml", True)]
+    assert all(file["time"] >= 0 for file in case["files"])
+    json_report = next(file for file in case["files"] if file["kind"] == "json")
+    assert any("Length mismatch" in message for message in json_report["messages"])
+
+    assert not main([str(tmp_path)], workers=1, report_file=str(tmp_path / "build" / "report.json"))
+    assert json.loads((tmp_path / "build" / "report.json").read_text())["invalid"] == 1
+    captured = capsys.readouterr()
+    assert f"mdpa {tmp_path / 'case_b.mdpa'}: MDPA file case_b.mdpa does not exist." in captured.out
+
+
+def test_check_case_decodes_once(tmp_path, monkeypatch):
+    """
+    Test that the JSON file of a test case is decoded once for all the validators
+    """
+    generate_case(str(tmp_path), "case", n_nodes=2, n_steps=20, n_mesh_nodes=20)
+    decoded = []
+    original = validate_cases.load_arrays
+
+    def load_arrays(path, *args):
+        decoded.append(path)
+        return original(path, *args)
+
+    for module in [validate_cases, sys.modules["validators"]]:
+        monkeypatch.setattr(module, "load_arrays", load_arrays)
+    report = check_case(scan_cases([str(tmp_path)])[0])
+    assert report["valid"]
+    assert decoded == [str(tmp_path / "json_output_case.json")]
+
+
+def test_no_heavy_imports():
+    """
+    Test that the validation does not import the plotting and signal processing libraries
+    """
+    code = ("import sys; import validate_cases; import process_data; "
+            "assert 'matplotlib.pyplot' not in sys.modules; "
+            "assert 'SignalProcessingTools.time_signal' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], cwd="scripts", check=True)
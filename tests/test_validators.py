@@ -1,4 +1,7 @@
-from scripts.validators import json_validator, yaml_validator, mdpa_validator
+from scripts.validators import (json_validator, yaml_validator, mdpa_validator, mdpa_nodes_validator, result_layout,
+                                compiled_schema, sniff_layout)
+from scripts.result_codec import write_compact
+from scripts.result_io import load_result
 
 
 def test_json_validator():
@@ -227,3 +230,38 @@ def test_mdpa_size(capsys):
     # Assert that the printed message is correct
     assert "MDPA file tests/data/empty.mdpa is empty." in captured.out
 
+
+
+def test_result_layouts(tmp_path, capsys):
+    """
+    Test the registry of STEM versions, the cached schemas and the sniffing of the layout
+    """
+    assert result_layout("1.2.3") == "velocity"
+    assert result_layout(" 1.2.3 ") == "velocity"
+    assert result_layout("1.2.4.a") == "velocity_coordinates"
+    assert result_layout("1.2.5") is None
+    # 1.2 is not a STEM release with a known layout
+    assert result_layout(1.2) is None
+    assert compiled_schema("velocity") is compiled_schema("velocity")
+
+    assert sniff_layout("tests/data/json_output_80.json", size=16) == "velocity"
+    assert sniff_layout("tests/data/json_output_80_alpha.json", size=16) == "velocity_coordinates"
+    assert sniff_layout("tests/data/json_output_empty.json") is None
+    write_compact(str(tmp_path / "alpha.stemz"), load_result("tests/data/json_output_80_alpha.json"))
+    assert sniff_layout(str(tmp_path / "alpha.stemz")) == "velocity_coordinates"
+
+    assert not json_validator("tests/data/json_output_80.json", 1.2)
+    assert "Unsupported STEM version: 1.2" in capsys.readouterr().out
+    assert not json_validator("tests/data/json_output_80_alpha.json", "1.2.3")
+    assert "has the velocity_coordinates layout" in capsys.readouterr().out
+
+
+def test_nodes_validator(capsys):
+    """
+    Test the comparison of the nodes of the JSON files with the MDPA file
+    """
+    assert mdpa_nodes_validator("tests/data/example.mdpa", "tests/data/json_output_80.json")
+    assert mdpa_nodes_validator("tests/data/example.mdpa", "tests/data/json_output_80_alpha.json")
+
+    assert not mdpa_nodes_validator("tests/data/example.mdpa", "tests/data/json_output_empty.json")
+    assert "Nodes of the json_output submodel part missing in the JSON file: [76, 229]" in capsys.readouterr().out